@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class ApiConfig(AppConfig):
     name = 'api'
+
+    def ready(self):
+        # connects the User signal receivers that invalidate cached users
+        from . import authentication  # noqa: F401
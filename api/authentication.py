@@ -0,0 +1,61 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+from core.metrics import record_cache_lookup
+
+
+def get_user_cache():
+    return caches[getattr(settings, 'AUTH_USER_CACHE_ALIAS', 'default')]
+
+
+def get_user_cache_key(user_id):
+    return 'auth-user:{}'.format(user_id)
+
+
+###############################################################################################
+# Cached JWT Authentication
+#
+# JWTAuthentication fetches the user by the token's user_id claim on every request. This
+# keeps the resolved user in the AUTH_USER_CACHE_ALIAS cache for AUTH_USER_CACHE_TIMEOUT
+# seconds so steady state requests make no authentication queries.
+#
+# Entries are dropped whenever the User row is saved or deleted (is_active, is_staff,
+# password, ...), right away and again after commit. Only a cache shared by every worker
+# makes that reach the other workers, the production settings require one for the
+# default alias. With an in process cache (development, tests) and in any case after
+# bulk queryset updates, which send no signals, other workers keep honoring the old user
+# for up to AUTH_USER_CACHE_TIMEOUT seconds.
+
+class CachedJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            return super().get_user(validated_token)
+
+        cache = get_user_cache()
+        cache_key = get_user_cache_key(user_id)
+        user = cache.get(cache_key)
+        record_cache_lookup('auth_user', user is not None)
+        if user is not None:
+            return user
+
+        # raises for unknown and inactive users so those are never cached
+        user = super().get_user(validated_token)
+        cache.set(cache_key, user, getattr(settings, 'AUTH_USER_CACHE_TIMEOUT', 60))
+        return user
+
+
+@receiver(post_save, sender=get_user_model(), dispatch_uid='api.authentication.invalidate_cached_user_on_save')
+@receiver(post_delete, sender=get_user_model(), dispatch_uid='api.authentication.invalidate_cached_user_on_delete')
+def invalidate_cached_user(sender, instance, **kwargs):
+    cache_key = get_user_cache_key(getattr(instance, api_settings.USER_ID_FIELD))
+    get_user_cache().delete(cache_key)
+    # a concurrent request may cache the old row until the write commits
+    transaction.on_commit(lambda: get_user_cache().delete(cache_key))
@@ -0,0 +1,138 @@
+import io
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import connections
+from django.urls import Resolver404, resolve
+
+from rest_framework.exceptions import ValidationError
+
+
+logger = logging.getLogger('timetracker.batch')
+
+API_PATH_PREFIX = '/api/'
+METHODS = ('GET', 'HEAD', 'OPTIONS', 'POST', 'PUT', 'PATCH', 'DELETE')
+READ_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+###############################################################################################
+# Batch Requests
+#
+# Runs a list of sub-requests against the api/urls.py routes inside one http request
+#
+#   POST /api/v1/batch/
+#   {"parallel": true,
+#    "requests": [{"id": "orgs", "method": "GET", "path": "/api/v1/organizations/"},
+#                 {"method": "POST", "path": "/api/v1/organizations/acme/members/", "body": {...}}]}
+#
+# Sub-requests reuse the batch request's headers and its already authenticated user (DRF
+# forced authentication) so the JWT is decoded and the user loaded once per batch. They
+# call the views directly, skipping the middleware stack the batch request went through.
+#
+# With "parallel" consecutive read requests (GET / HEAD / OPTIONS) run on a pool of
+# BATCH_MAX_WORKERS threads, each thread with its own database connection, while writes
+# run one at a time in request order and act as barriers between groups of reads.
+
+def validate_batch(data):
+    requests = data.get('requests') if isinstance(data, dict) else None
+    if not isinstance(requests, list) or not requests:
+        raise ValidationError({'requests': 'Expected a non-empty list of requests'})
+
+    max_requests = getattr(settings, 'BATCH_MAX_REQUESTS', 25)
+    if len(requests) > max_requests:
+        raise ValidationError({'requests': 'At most {} requests per batch'.format(max_requests)})
+
+    for i, spec in enumerate(requests):
+        if not isinstance(spec, dict):
+            raise ValidationError({'requests': 'Request {} is not an object'.format(i)})
+        if str(spec.get('method', 'GET')).upper() not in METHODS:
+            raise ValidationError({'requests': 'Request {} has an unsupported method'.format(i)})
+        if not str(spec.get('path', '')).startswith(API_PATH_PREFIX):
+            raise ValidationError({'requests': 'Request {} path must start with {}'.format(i, API_PATH_PREFIX)})
+    return requests
+
+
+def build_subrequest(request, method, path, query_string, body):
+    payload = b'' if body is None else json.dumps(body).encode('utf-8')
+    environ = dict(request.META)
+    environ.update({
+        'REQUEST_METHOD': method,
+        'PATH_INFO': path,
+        'QUERY_STRING': query_string,
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(payload)),
+        'wsgi.input': io.BytesIO(payload),
+    })
+    subrequest = WSGIRequest(environ)
+
+    # shared authentication, see rest_framework.request.Request
+    subrequest.user = request.user
+    subrequest._force_auth_user = request.user
+    subrequest._force_auth_token = request.auth
+    return subrequest
+
+
+def execute_subrequest(request, spec, batch_view_class):
+    method = str(spec.get('method', 'GET')).upper()
+    path, _, query_string = spec['path'].partition('?')
+    result = {'id': spec.get('id'), 'method': method, 'path': spec['path']}
+
+    try:
+        match = resolve('/' + path[len(API_PATH_PREFIX):], urlconf='api.urls')
+    except Resolver404:
+        return dict(result, status=404, body={'detail': 'Not found.'})
+
+    if getattr(match.func, 'view_class', None) is batch_view_class:
+        return dict(result, status=400, body={'detail': 'Batch requests cannot be nested.'})
+
+    subrequest = build_subrequest(request, method, path, query_string, spec.get('body'))
+    subrequest.resolver_match = match
+    try:
+        response = match.func(subrequest, *match.args, **match.kwargs)
+    except Exception:
+        logger.exception('Batch sub-request %s %s failed', method, spec['path'])
+        return dict(result, status=500, body={'detail': 'Internal server error.'})
+
+    body = getattr(response, 'data', None)
+    if body is None and response.get('Content-Type', '').startswith('application/json') and response.content:
+        body = json.loads(response.content)
+    return dict(result, status=response.status_code, body=body)
+
+
+def _execute_in_thread(request, spec, batch_view_class):
+    try:
+        return execute_subrequest(request, spec, batch_view_class)
+    finally:
+        # pool threads open their own connections, do not leak them
+        connections.close_all()
+
+
+def execute_batch(request, specs, batch_view_class, parallel=False):
+    max_workers = getattr(settings, 'BATCH_MAX_WORKERS', 4) if parallel else 0
+    results = [None] * len(specs)
+    reads = []
+
+    def run_reads():
+        if len(reads) > 1 and max_workers:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(reads))) as pool:
+                futures = [(i, pool.submit(_execute_in_thread, request, specs[i], batch_view_class)) for i in reads]
+                for i, future in futures:
+                    results[i] = future.result()
+        else:
+            for i in reads:
+                results[i] = execute_subrequest(request, specs[i], batch_view_class)
+        reads.clear()
+
+    for i, spec in enumerate(specs):
+        if str(spec.get('method', 'GET')).upper() in READ_METHODS:
+            reads.append(i)
+            continue
+
+        run_reads()
+        results[i] = execute_subrequest(request, spec, batch_view_class)
+    run_reads()
+
+    return results
@@ -0,0 +1,73 @@
+import threading
+from collections import Counter
+
+from django.conf import settings
+
+
+###############################################################################################
+# Request Coalescing
+#
+# Single flight execution of expensive reads: while a computation for a key is running,
+# other threads asking for the same key wait for it and share its result instead of
+# running the same queries again. When the computation fails the waiting threads run it
+# on their own, so every caller raises its own exception. Nothing is cached, the key is forgotten as
+# soon as the computation finishes, so a request never sees data older than the ones
+# already in flight when it arrived.
+#
+# Coalescing happens per process between the threads serving requests (threaded workers,
+# the batch endpoint's pool). Views opt in through CoalescedListMixin in api/views.py and
+# build keys from the absolute request url (responses hold absolute pagination links) and
+# the caller's visibility so only requests that would compute identical results share them.
+#
+# REQUEST_COALESCING = False turns it off, followers give up waiting and compute on their
+# own after REQUEST_COALESCING_TIMEOUT seconds.
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.failed = False
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.stats = Counter()
+
+    def do(self, key, fn, timeout=None):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            self.stats['computed' if leader else 'shared'] += 1
+
+        if not leader:
+            if not call.done.wait(timeout) or call.failed:
+                with self._lock:
+                    self.stats['shared'] -= 1
+                    self.stats['computed'] += 1
+                return fn()
+            return call.value
+
+        try:
+            call.value = fn()
+        except Exception:
+            call.failed = True
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.value
+
+
+single_flight = SingleFlight()
+
+
+def coalesce(key, fn):
+    '''Result of fn(), shared with concurrent callers using the same key'''
+    if not getattr(settings, 'REQUEST_COALESCING', True):
+        return fn()
+    return single_flight.do(key, fn, timeout=getattr(settings, 'REQUEST_COALESCING_TIMEOUT', 30))
@@ -0,0 +1,254 @@
+import json
+import statistics
+import time
+from collections import Counter
+from urllib.error import HTTPError
+from urllib.parse import urlencode
+from urllib.request import Request, urlopen
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils.timezone import now
+
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.urls import urlpatterns
+from core.models import Project, ProjectContributor, ActivityEntry
+
+
+def percentile(sorted_values, pct):
+    '''Nearest-rank percentile of an already sorted list'''
+    if not sorted_values:
+        return None
+    rank = max(int(round(pct / 100.0 * len(sorted_values))) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+###############################################################################################
+# Benchmark API
+#
+# Issues GET requests against every readable route in api/urls.py as the given user
+# and reports p50 / p95 / p99 latency and throughput per route. Requests are made
+# in-process through the django test Client by default, or against a running server
+# when --base-url is given. Results are written as JSON so runs can be diffed with
+# --compare.
+#
+# Only safe (GET) methods are exercised so it is fine to point at seeded data,
+# see core/management/commands/seed_load_data.py
+#
+# --no-auth-cache stops in-process runs from caching the users resolved from tokens
+# (see api/authentication.py) and --no-lean-api sends them through the full middleware
+# stack (see core/middleware.py) to measure what those save. Differences of a few
+# percent are within run to run noise, alternate several runs of each mode.
+#
+# Example:
+#   python manage.py benchmark_api --email seed-user-0-0@example.com --requests 200 \
+#       --output results/run-1.json --compare results/run-0.json
+
+class Command(BaseCommand):
+    help = 'Measures latency and throughput of the api endpoints'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--email', required=True,
+                            help='Email of the user the requests are authenticated as')
+        parser.add_argument('--requests', type=int, default=50,
+                            help='Number of timed requests per endpoint')
+        parser.add_argument('--warmup', type=int, default=5,
+                            help='Number of untimed requests per endpoint before measuring')
+        parser.add_argument('--endpoint', action='append', dest='endpoints', default=[],
+                            help='Only benchmark the given url name (may be repeated)')
+        parser.add_argument('--base-url', default=None,
+                            help='Benchmark a running server such as http://localhost:8000 instead of in-process')
+        parser.add_argument('--host', default='localhost',
+                            help='HTTP Host header used for in-process requests')
+        parser.add_argument('--output', default=None,
+                            help='Path of the JSON results file')
+        parser.add_argument('--compare', default=None,
+                            help='Path of a previous JSON results file to compare against')
+        parser.add_argument('--no-auth-cache', action='store_true',
+                            help='Resolve the token user from the database on every in-process request')
+        parser.add_argument('--no-lean-api', action='store_true',
+                            help='Send in-process token requests through the full middleware stack')
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(email=options['email'])
+        except get_user_model().DoesNotExist:
+            raise CommandError('User {} does not exist'.format(options['email']))
+
+        auth_header = 'Bearer {}'.format(AccessToken.for_user(user))
+        send = self.make_sender(options['base_url'], options['host'], auth_header)
+        sample_kwargs = self.get_sample_kwargs(user)
+
+        overrides = {}
+        if options['no_auth_cache']:
+            overrides['AUTH_USER_CACHE_TIMEOUT'] = 0
+        if options['no_lean_api']:
+            overrides['LEAN_API_PATH_PREFIX'] = None
+        with override_settings(**overrides):
+            results = self.run_endpoints(send, sample_kwargs, options)
+
+        report = {
+            'created_at': now().isoformat(),
+            'target': options['base_url'] or 'in-process',
+            'debug': settings.DEBUG,
+            'auth_cache': not options['no_auth_cache'],
+            'lean_api': not options['no_lean_api'],
+            'user': user.email,
+            'requests_per_endpoint': options['requests'],
+            'endpoints': results,
+        }
+
+        previous = self.load_previous(options['compare'])
+        self.print_report(results, previous)
+
+        if options['output']:
+            with open(options['output'], 'w') as fp:
+                json.dump(report, fp, indent=2)
+            self.stdout.write(self.style.SUCCESS('Wrote results to {}'.format(options['output'])))
+
+    def run_endpoints(self, send, sample_kwargs, options):
+        results = []
+        for name, path in self.get_endpoints(sample_kwargs, options['endpoints']):
+            for _ in range(options['warmup']):
+                send(path)
+
+            timings = []
+            status_codes = Counter()
+            started = time.perf_counter()
+            for _ in range(options['requests']):
+                request_started = time.perf_counter()
+                status_code = send(path)
+                timings.append((time.perf_counter() - request_started) * 1000)
+                status_codes[str(status_code)] += 1
+            elapsed = time.perf_counter() - started
+
+            results.append(self.summarize(name, path, timings, status_codes, elapsed))
+        return results
+
+    def make_sender(self, base_url, host, auth_header):
+        if base_url:
+            def send(path):
+                request = Request(base_url.rstrip('/') + path,
+                                  headers={'Authorization': auth_header,
+                                           'Accept': 'application/json'})
+                try:
+                    with urlopen(request) as response:
+                        response.read()
+                        return response.status
+                except HTTPError as e:
+                    return e.code
+            return send
+
+        client = Client(HTTP_HOST=host, HTTP_AUTHORIZATION=auth_header, HTTP_ACCEPT='application/json')
+
+        def send(path):
+            return client.get(path).status_code
+        return send
+
+    def get_sample_kwargs(self, user):
+        '''Picks existing objects visible to the user to fill in the url kwargs'''
+        if user.is_staff:
+            project = Project.objects.select_related('organization').first()
+        else:
+            contributor = (ProjectContributor.objects
+                            .select_related('project__organization')
+                            .filter(user=user)
+                            .first())
+            project = contributor.project if contributor else None
+
+        if project is None:
+            raise CommandError('User {} cannot see any projects, seed data first'.format(user.email))
+
+        kwargs = {
+            'org_slug': project.organization.slug,
+            'project_slug': project.slug,
+        }
+
+        contributor = ProjectContributor.objects.filter(project=project).order_by('id').first()
+        if contributor is not None:
+            # the only readable route taking a pk is project-contributor-detail
+            kwargs['pk'] = contributor.id
+
+        entry = ActivityEntry.objects.filter(project=project).order_by('id').first()
+        if entry is not None:
+            kwargs['activity_slug'] = entry.slug
+
+        # routes answering 400 without query parameters get realistic ones so their
+        # happy path is measured, a word of existing text and a prefix of a member
+        words = (entry.name if entry is not None else project.name).split()
+        kwargs['query_params'] = {
+            'search': {'q': words[0] if words else project.slug},
+            'organization-member-autocomplete': {'q': user.email[:3]},
+        }
+
+        return kwargs
+
+    def get_endpoints(self, sample_kwargs, only):
+        endpoints = []
+        for pattern in urlpatterns:
+            view_class = getattr(pattern.callback, 'view_class', None)
+            if view_class is None or not hasattr(view_class, 'get'):
+                continue
+
+            if only and pattern.name not in only:
+                continue
+
+            converters = pattern.pattern.converters
+            if any(kwarg not in sample_kwargs for kwarg in converters):
+                self.stderr.write('Skipping {}, no sample data for its url'.format(pattern.name))
+                continue
+
+            kwargs = {kwarg: sample_kwargs[kwarg] for kwarg in converters}
+            path = reverse(pattern.name, kwargs=kwargs)
+            query_params = sample_kwargs.get('query_params', {}).get(pattern.name)
+            if query_params:
+                path += '?' + urlencode(query_params)
+            endpoints.append((pattern.name, path))
+        return endpoints
+
+    def summarize(self, name, path, timings, status_codes, elapsed):
+        ordered = sorted(timings)
+        return {
+            'name': name,
+            'path': path,
+            'requests': len(timings),
+            'status_codes': dict(status_codes),
+            'mean_ms': round(statistics.mean(ordered), 3) if ordered else None,
+            'p50_ms': round(percentile(ordered, 50), 3) if ordered else None,
+            'p95_ms': round(percentile(ordered, 95), 3) if ordered else None,
+            'p99_ms': round(percentile(ordered, 99), 3) if ordered else None,
+            'max_ms': round(ordered[-1], 3) if ordered else None,
+            'throughput_rps': round(len(timings) / elapsed, 3) if elapsed else None,
+        }
+
+    def load_previous(self, path):
+        if not path:
+            return {}
+
+        with open(path) as fp:
+            previous = json.load(fp)
+        return {result['name']: result for result in previous['endpoints']}
+
+    def print_report(self, results, previous):
+        header = '{:<40} {:>8} {:>8} {:>8} {:>10}  {}'.format('endpoint', 'p50', 'p95', 'p99', 'req/s', 'status')
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for result in results:
+            line = '{:<40} {:>8} {:>8} {:>8} {:>10}  {}'.format(
+                result['name'],
+                result['p50_ms'],
+                result['p95_ms'],
+                result['p99_ms'],
+                result['throughput_rps'],
+                ','.join('{}x{}'.format(code, count) for code, count in result['status_codes'].items())
+            )
+            before = previous.get(result['name'])
+            if before and before.get('p95_ms') and result['p95_ms'] is not None:
+                change = (result['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100
+                line += '  p95 {:+.1f}%'.format(change)
+            self.stdout.write(line)
@@ -0,0 +1,164 @@
+import json
+import random
+import statistics
+import threading
+import time
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import CommandError
+from django.db import connection, connections
+from django.test.utils import override_settings
+from django.urls import NoReverseMatch, reverse
+from django.utils.timezone import now
+
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.coalescing import single_flight
+
+from .benchmark_api import Command as BenchmarkAPICommand, percentile
+
+
+###############################################################################################
+# Benchmark Bursts
+#
+# Simulates the "everyone opens the dashboard at 9am" pattern: each burst releases
+# --concurrency threads at once (each delayed by up to --jitter-ms) that GET the same
+# endpoint as one of the --email users, then waits --pause-ms before the next burst.
+# Reports latency percentiles, how many computations the bursts needed with request
+# coalescing (see api/coalescing.py) and the database queries executed in-process. Run
+# it once with --no-coalescing to get the baseline.
+#
+# In-process requests share the GIL so the gain mostly shows as saved queries and
+# serialization, point --base-url at a threaded server for end to end numbers. The
+# computed / shared counts and queries live in the server process then and are left out
+# of the report (null in the JSON file).
+#
+# Example:
+#   python manage.py benchmark_bursts --email seed-user-0-0@example.com \
+#       --email seed-user-0-1@example.com --endpoint activity-entry-list-create \
+#       --bursts 20 --concurrency 40 --output results/bursts.json
+
+class Command(BenchmarkAPICommand):
+    help = 'Measures an api endpoint under bursts of identical concurrent requests'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--email', action='append', dest='emails', required=True,
+                            help='Email of a user the requests are authenticated as (may be repeated)')
+        parser.add_argument('--endpoint', default='activity-entry-list-create',
+                            help='Url name of the endpoint to request')
+        parser.add_argument('--bursts', type=int, default=10,
+                            help='Number of bursts')
+        parser.add_argument('--concurrency', type=int, default=20,
+                            help='Concurrent requests per burst')
+        parser.add_argument('--jitter-ms', type=float, default=5,
+                            help='Maximum random delay of a request within its burst')
+        parser.add_argument('--pause-ms', type=float, default=100,
+                            help='Pause between bursts')
+        parser.add_argument('--no-coalescing', action='store_true',
+                            help='Disable request coalescing to measure the baseline')
+        parser.add_argument('--base-url', default=None,
+                            help='Benchmark a running server such as http://localhost:8000 instead of in-process')
+        parser.add_argument('--host', default='localhost',
+                            help='HTTP Host header used for in-process requests')
+        parser.add_argument('--random-seed', type=int, default=None,
+                            help='Seed for the jitter to make runs reproducible')
+        parser.add_argument('--output', default=None,
+                            help='Path of the JSON results file')
+
+    def handle(self, *args, **options):
+        UserModel = get_user_model()
+        users = list(UserModel.objects.filter(email__in=options['emails']))
+        missing = set(options['emails']) - {user.email for user in users}
+        if missing:
+            raise CommandError('Users {} do not exist'.format(', '.join(sorted(missing))))
+
+        path = self.get_path(options['endpoint'], self.get_sample_kwargs(users[0]))
+        rng = random.Random(options['random_seed'])
+        auth_headers = ['Bearer {}'.format(AccessToken.for_user(user)) for user in users]
+
+        with override_settings(REQUEST_COALESCING=not options['no_coalescing']):
+            stats_before = Counter(single_flight.stats)
+            timings, status_codes, queries, elapsed = self.run_bursts(path, auth_headers, rng, options)
+            stats = Counter(single_flight.stats)
+            stats.subtract(stats_before)
+
+        ordered = sorted(timings)
+        report = {
+            'created_at': now().isoformat(),
+            'target': options['base_url'] or 'in-process',
+            'endpoint': options['endpoint'],
+            'path': path,
+            'coalescing': not options['no_coalescing'],
+            'bursts': options['bursts'],
+            'concurrency': options['concurrency'],
+            'requests': len(timings),
+            'status_codes': dict(status_codes),
+            'computed': None if options['base_url'] else stats['computed'],
+            'shared': None if options['base_url'] else stats['shared'],
+            'queries': None if options['base_url'] else queries,
+            'mean_ms': round(statistics.mean(ordered), 3),
+            'p50_ms': round(percentile(ordered, 50), 3),
+            'p95_ms': round(percentile(ordered, 95), 3),
+            'p99_ms': round(percentile(ordered, 99), 3),
+            'max_ms': round(ordered[-1], 3),
+            'throughput_rps': round(len(timings) / elapsed, 3),
+        }
+
+        for name in ('requests', 'computed', 'shared', 'queries', 'p50_ms', 'p95_ms', 'p99_ms', 'throughput_rps'):
+            if report[name] is None:
+                continue
+            self.stdout.write('{:<16} {}'.format(name, report[name]))
+        self.stdout.write('{:<16} {}'.format('status', ','.join(
+            '{}x{}'.format(code, count) for code, count in report['status_codes'].items()
+        )))
+
+        if options['output']:
+            with open(options['output'], 'w') as fp:
+                json.dump(report, fp, indent=2)
+            self.stdout.write(self.style.SUCCESS('Wrote results to {}'.format(options['output'])))
+
+    def get_path(self, endpoint, sample_kwargs):
+        for kwargs in (sample_kwargs, {}):
+            try:
+                return reverse(endpoint, kwargs={k: v for k, v in kwargs.items() if k in ('org_slug', 'project_slug')})
+            except NoReverseMatch:
+                continue
+        raise CommandError('Cannot build a url for {}'.format(endpoint))
+
+    def run_bursts(self, path, auth_headers, rng, options):
+        timings, status_codes, queries = [], Counter(), [0]
+        lock = threading.Lock()
+        concurrency = options['concurrency']
+        senders = [self.make_sender(options['base_url'], options['host'], auth_headers[i % len(auth_headers)])
+                   for i in range(concurrency)]
+
+        def worker(send, delay, barrier):
+            try:
+                # record the queries of in-process requests, each thread has its own connection
+                connection.force_debug_cursor = True
+                barrier.wait()
+                time.sleep(delay)
+                started = time.perf_counter()
+                status_code = send(path)
+                duration = (time.perf_counter() - started) * 1000
+                with lock:
+                    timings.append(duration)
+                    status_codes[str(status_code)] += 1
+                    queries[0] += len(connection.queries)
+            finally:
+                connections.close_all()
+
+        started = time.perf_counter()
+        for _ in range(options['bursts']):
+            barrier = threading.Barrier(concurrency)
+            threads = [threading.Thread(target=worker,
+                                        args=(send, rng.uniform(0, options['jitter_ms']) / 1000, barrier))
+                       for send in senders]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            time.sleep(options['pause_ms'] / 1000)
+        elapsed = time.perf_counter() - started - options['bursts'] * options['pause_ms'] / 1000
+        return timings, status_codes, queries[0], elapsed
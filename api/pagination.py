@@ -0,0 +1,13 @@
+from rest_framework.pagination import PageNumberPagination
+
+
+class ActivityEntryPagination(PageNumberPagination):
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+
+class SearchPagination(PageNumberPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
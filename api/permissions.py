@@ -1,10 +1,10 @@
-from django.core.exceptions import ObjectDoesNotExist
 from django.db.models import Q
-from django.shortcuts import get_object_or_404
 
 from rest_framework.permissions import BasePermission, SAFE_METHODS, IsAdminUser
 
-from core.models import Organization, Project, ProjectContributor
+from core.access import get_organization_access, get_project_access, get_project_access_or_404
+from core.models import ActivityEntry, Organization, Project, ProjectContributor, UserAccess
+from core.object_cache import organization_cache
 
 
 ###############################################################################################
@@ -35,53 +35,65 @@ from core.models import Organization, Project, ProjectContributor
 # Deleting Project
 # - Can be done by Admin (is_staff = True)
 # - 403 if not matching permissions, 401 if unauthenticated
+#
+# Every check is a single primary key lookup of core.models.UserAccess. The checks
+# themselves are the allows / allows_object static methods taking the UserAccess row,
+# which the capabilities below reuse.
 
 class OrganizationProjectPermission(BasePermission):
 
     def has_permission(self, request, view):
         if request.user.is_staff:
             return True
-        
-        org_slug = view.kwargs.get('org_slug')
+
+        access = get_organization_access(request.user, view.kwargs.get('org_slug'))
+        return self.allows(request.user, access, request.method)
+
+    def has_object_permission(self, request, view, obj):
+        access = None
+        if not request.user.is_staff and request.method != 'DELETE':
+            access = get_project_access(request.user, obj.slug)
+        return self.allows_object(request.user, access, request.method)
+
+    @staticmethod
+    def allows(user, access, method):
+        '''access is the user's organization UserAccess row'''
+        if user.is_staff:
+            return True
+
+        if access is None:
+            return False
 
         # if listing projects for org user must have
         # ProjectContributor project_admin, activity_viewer, or activity_editor
         # for at least one project associated with Organization
-        if request.method == 'GET':
-            return ProjectContributor.objects.filter(
-                        user=request.user,
-                        project__in=Project.objects.filter(organization__slug=org_slug)
-                      ).filter(
-                        Q(project_admin=True) | Q(activity_viewer=True) | Q(activity_editor=True)
-                      ).count() > 0
-          
+        if method == 'GET':
+            return access.roles != 0
+
         # if creating a project for org must must be org contact
-        elif request.method not in SAFE_METHODS:
-            org = Organization.objects.get(slug=org_slug)
-            return org.contact == request.user
-        
+        elif method not in SAFE_METHODS:
+            return access.is_contact
+
         return False
-        
-    def has_object_permission(self, request, view, obj):
-        if request.user.is_staff:
+
+    @staticmethod
+    def allows_object(user, access, method):
+        '''access is the user's project UserAccess row'''
+        if user.is_staff:
             return True
 
-        if request.method == 'DELETE':
+        if method == 'DELETE' or access is None:
             return False
 
-        try:
-            contributor = ProjectContributor.objects.get(project=obj, user=request.user)
-        except ProjectContributor.DoesNotExist:
-            return False
-        
         # user with ProjectContributor project_admin can do all but delete
-        if contributor.project_admin:
+        if access.has_role(ProjectContributor.PROJECT_ADMIN):
             return True
 
         # if viewing user should be a ProjectContributor with project_admin
-        if request.method in SAFE_METHODS and (contributor.activity_editor or contributor.activity_viewer):
+        if method in SAFE_METHODS and \
+                access.has_role(ProjectContributor.ACTIVITY_EDITOR | ProjectContributor.ACTIVITY_VIEWER):
             return True
-        
+
         return False
 
 
@@ -90,15 +102,23 @@ class OrganizationMemberPermission(BasePermission):
         if request.user.is_staff:
             return True
 
-        org = Organization.objects.get(slug=view.kwargs.get('org_slug'))
-        return org.members.filter(id=request.user.id).count() > 0
+        access = get_organization_access(request.user, view.kwargs.get('org_slug'))
+        return self.allows(request.user, access)
 
     def has_object_permission(self, request, view, obj):
         if request.user.is_staff:
             return True
-        
-        org = Organization.objects.get(slug=view.kwargs.get('org_slug'))
-        return org.contact == request.user
+
+        access = get_organization_access(request.user, view.kwargs.get('org_slug'))
+        return self.allows_object(request.user, access)
+
+    @staticmethod
+    def allows(user, access):
+        return user.is_staff or (access is not None and access.is_member)
+
+    @staticmethod
+    def allows_object(user, access):
+        return user.is_staff or (access is not None and access.is_contact)
 
 
 class ProjectListPermission(BasePermission):
@@ -134,11 +154,9 @@ class OrganizationPermission(BasePermission):
             return True
 
         if 'org_slug' in view.kwargs:
-            try:
-                Organization.objects.get(slug=view.kwargs.get('org_slug'), contact=request.user)
-            except ObjectDoesNotExist:
-                return False
-        return Organization.objects.filter(contact=request.user).count() > 0
+            access = get_organization_access(request.user, view.kwargs.get('org_slug'))
+            return access is not None and access.is_contact
+        return UserAccess.objects.filter(user_id=request.user.id, is_contact=True).exists()
 
     def has_object_permission(self, request, view, obj):
         if request.user.is_staff:
@@ -150,11 +168,12 @@ class OrganizationPermission(BasePermission):
 
         if hasattr(obj, 'contact'):
             # dealing with Organization object
-            return obj.contact == request.user
+            return obj.contact_id == request.user.id
         
         if hasattr(obj, 'organization'):
             # dealing with Project object
-            return obj.organization.contact == request.user
+            organization = organization_cache.get_current(obj.organization_id)
+            return organization is not None and organization.contact_id == request.user.id
         
         return False
 
@@ -183,25 +202,26 @@ class ProjectContributorPermission(BasePermission):
         if request.user.is_staff:
             return True
 
-        project_contributor = get_object_or_404(ProjectContributor,
-            user=request.user,
-            project__slug=view.kwargs['project_slug']
-        )
-
-        return project_contributor.project_admin
+        access = get_project_access_or_404(request.user, view.kwargs['project_slug'])
+        return self.allows(request.user, access)
 
     def has_object_permission(self, request, view, obj):
         if request.user.is_staff:
             return True
-        
-        user_project_contributor = get_object_or_404(ProjectContributor,
-            user=request.user,
-            project__slug=view.kwargs['project_slug']
-        )
-        if request.method in SAFE_METHODS and user_project_contributor.user == request.user:
+
+        access = get_project_access_or_404(request.user, view.kwargs['project_slug'])
+        return self.allows_object(request.user, access, request.method)
+
+    @staticmethod
+    def allows(user, access):
+        return user.is_staff or (access is not None and access.has_role(ProjectContributor.PROJECT_ADMIN))
+
+    @staticmethod
+    def allows_object(user, access, method):
+        if user.is_staff or method in SAFE_METHODS:
             return True
-        
-        return user_project_contributor.project_admin
+
+        return access is not None and access.has_role(ProjectContributor.PROJECT_ADMIN)
 
 
 #################################################################################
@@ -238,46 +258,166 @@ class ProjectContributorPermission(BasePermission):
 # - Can be done by Project Contributor for which they are activity_editor for
 # - returns 403 if conditions are not met, 401 if unauthenticated
 class ActivityEntryPermission(BasePermission):
-    def get_project_contributor(self, user, project_slug):
-        return get_object_or_404(ProjectContributor,
-                                 user=user,
-                                 project__slug=project_slug)
-        
     def has_permission(self, request, view):
-        if request.method == 'POST' and request.user.is_staff:
-            return False
-        
+        if request.user.is_staff:
+            return self.allows(request.user, None, request.method)
+
+        access = get_project_access_or_404(request.user, view.kwargs['project_slug'])
+        contributor_id = request.data.get('contributor') if request.method == 'POST' else None
+        return self.allows(request.user, access, request.method, contributor_id)
+
+    def has_object_permission(self, request, view, obj):
         if request.user.is_staff:
             return True
 
-        contributor = self.get_project_contributor(request.user,
-                                                  view.kwargs['project_slug'])
+        access = get_project_access_or_404(request.user, view.kwargs['project_slug'])
+        return self.allows_object(request.user, access, request.method, obj.contributor_id == access.contributor_id)
+
+    @staticmethod
+    def allows(user, access, method, contributor_id=None):
+        '''contributor_id is the contributor a POST creates the entry for'''
+        if user.is_staff:
+            return method != 'POST'
 
-        if request.method == 'POST':
+        if access is None:
+            return False
+
+        if method == 'POST':
             # project admins can create a activity entry
-            if contributor.project_admin:
+            if access.has_role(ProjectContributor.PROJECT_ADMIN):
                 return False
 
             # contributor's with editor perm can make their own activity entries
-            if contributor.activity_editor and request.data['contributor'] == contributor.id:
-                return True
+            return access.has_role(ProjectContributor.ACTIVITY_EDITOR) and contributor_id == access.contributor_id
+
+        return access.roles != 0
+
+    @staticmethod
+    def allows_object(user, access, method, own):
+        '''own tells whether the entry belongs to the access row's contributor'''
+        if user.is_staff:
+            return True
 
+        if access is None:
             return False
 
-        return contributor.project_admin or contributor.activity_viewer \
-                  or contributor.activity_editor
+        if own or access.has_role(ProjectContributor.PROJECT_ADMIN):
+            return True
+
+        return method == 'GET' and access.has_role(ProjectContributor.ACTIVITY_VIEWER)
 
-    def has_object_permission(self, request, view, obj):
+
+#################################################################################
+# Timesheet Permission
+#
+# Viewing an Organization timesheet
+# - Can be done by Admin (is_staff = True)
+# - Can be done by members, contacts and project contributors of the Organization,
+#   the grid only contains the entries ActivityEntryPermission lets them view
+#   (see visible_activity_entries)
+# - returns 403 if conditions are not met, 401 if unauthenticated
+class TimesheetPermission(BasePermission):
+    def has_permission(self, request, view):
         if request.user.is_staff:
             return True
 
-        contributor = self.get_project_contributor(request.user,
-                                                  view.kwargs['project_slug'])
+        return get_organization_access(request.user, view.kwargs['org_slug']) is not None
 
-        if obj.contributor == contributor or contributor.project_admin:
-            return True
 
-        if request.method == 'GET' and contributor.activity_viewer:
-            return True
+#################################################################################
+# Capabilities
+#
+# What a user may do per organization / project, computed by running the checks of the
+# permission classes above (their allows / allows_object methods) on the UserAccess rows
+# those check, so clients can hide actions up front instead of probing for 403s (see the
+# bootstrap endpoint). Each flag runs every check of the endpoint it stands for, e.g.
+# adding members only checks OrganizationMemberPermission.has_permission while removing
+# them also checks has_object_permission. Entry view / edit capabilities are 'all',
+# 'own' (only the user's own entries) or None.
+
+def organization_capabilities(user, access):
+    view_members = OrganizationMemberPermission.allows(user, access)
+    return {
+        'create_projects': OrganizationProjectPermission.allows(user, access, 'POST'),
+        'view_members': view_members,
+        'add_members': view_members,
+        'remove_members': view_members and OrganizationMemberPermission.allows_object(user, access),
+    }
+
+
+def project_capabilities(user, access, organization_access):
+    '''access is the user's project UserAccess row, organization_access the row of the
+    project's organization'''
+    def project(method):
+        return (OrganizationProjectPermission.allows(user, organization_access, method)
+                and OrganizationProjectPermission.allows_object(user, access, method))
+
+    def entries(method):
+        if not ActivityEntryPermission.allows(user, access, method):
+            return None
+        if ActivityEntryPermission.allows_object(user, access, method, own=False):
+            return 'all'
+        if ActivityEntryPermission.allows_object(user, access, method, own=True):
+            return 'own'
+        return None
+
+    contributors = ProjectContributorPermission.allows(user, access)
+    contributor_id = access.contributor_id if access is not None else None
+    return {
+        'project': {'view': project('GET'), 'edit': project('PUT'), 'delete': project('DELETE')},
+        'contributors': {
+            'view': contributors,
+            'edit': contributors and ProjectContributorPermission.allows_object(user, access, 'PUT'),
+        },
+        'entries': {
+            'view': entries('GET'),
+            'create': ActivityEntryPermission.allows(user, access, 'POST', contributor_id),
+            'edit': entries('PUT'),
+        },
+    }
 
-        return False
+
+#################################################################################
+# Visibility
+#
+# The rows a user may read according to the permission classes above, for endpoints
+# that span projects and organizations (timesheets, search)
+#
+# - Organizations: staff see all, others the organizations they are the contact of
+#   (see OrganizationListCreateAPIView)
+# - Projects: staff see all, others the projects they have any contributor role on
+# - Activity entries: staff see all, project admins and activity viewers every entry of
+#   their projects, activity editors only their own entries
+
+def visible_organizations(user):
+    qs = Organization.objects.all()
+    if user.is_staff:
+        return qs
+    return qs.filter(contact=user)
+
+
+def visible_projects(user):
+    qs = Project.objects.all()
+    if user.is_staff:
+        return qs
+    return qs.contributed_to_by(user)
+
+
+def visible_activity_entries(user, organization=None):
+    qs = ActivityEntry.objects.all()
+    if organization is not None:
+        qs = qs.filter(organization=organization)
+    if user.is_staff:
+        return qs
+
+    full_projects, own_projects = [], []
+    project_rows = UserAccess.objects.filter(user_id=user.id, project_id__isnull=False)
+    if organization is not None:
+        project_rows = project_rows.filter(organization_id=organization.id)
+    for project_id, roles in project_rows.values_list('project_id', 'roles'):
+        if roles & (ProjectContributor.PROJECT_ADMIN | ProjectContributor.ACTIVITY_VIEWER):
+            full_projects.append(project_id)
+        elif roles & ProjectContributor.ACTIVITY_EDITOR:
+            own_projects.append(project_id)
+
+    return qs.filter(Q(project_id__in=full_projects) | Q(project_id__in=own_projects, user_id=user.id))
@@ -7,7 +7,8 @@ from django.shortcuts import get_object_or_404
 from rest_framework import serializers
 
 from core.models import Organization, Project, ProjectContributor, ActivityEntry
-from core.utils import send_activate_account_email
+from core.slug_cache import get_organization_or_404, get_project_or_404
+from core.utils import normalize_ulid, send_activate_account_email
 
 
 UserModel = get_user_model()
@@ -34,6 +35,43 @@ class UserSerializer(serializers.ModelSerializer):
         return user
 
 
+class IncludeSerializerMixin:
+    '''Replaces (or adds) the fields named in context['include'] with the nested
+    serializers of include_serializers, see api.views.IncludeViewMixin'''
+    include_serializers = {}
+
+    def get_fields(self):
+        fields = super().get_fields()
+        for name in self.context.get('include', ()):
+            if name in self.include_serializers:
+                fields[name] = self.include_serializers[name](read_only=True)
+        return fields
+
+
+class UserSummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = UserModel
+        fields = ('id', 'email', 'name')
+
+
+class OrganizationSummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Organization
+        fields = ('id', 'name', 'slug')
+
+
+class ProjectSummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Project
+        fields = ('id', 'name', 'slug', 'organization')
+
+
+class ProjectContributorSummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ProjectContributor
+        fields = ('id', 'user', 'project')
+
+
 class OrganizationSerializer(serializers.ModelSerializer):
     members = UserSerializer(many=True, read_only=True)
     class Meta:
@@ -48,27 +86,48 @@ class OrganizationSerializer(serializers.ModelSerializer):
         return instance
 
 
-class ProjectsListSerializer(serializers.ModelSerializer):
+class ProjectRolesSerializerMixin(serializers.Serializer):
+    '''Caller's roles annotated by ProjectQuerySet.with_roles_for, omitted from the
+    output when the instance was not annotated (create / detail)'''
+    project_admin = serializers.BooleanField(read_only=True)
+    activity_viewer = serializers.BooleanField(read_only=True)
+    activity_editor = serializers.BooleanField(read_only=True)
+
+
+class ProjectsListSerializer(IncludeSerializerMixin, ProjectRolesSerializerMixin, serializers.ModelSerializer):
+    include_serializers = {
+        'organization': OrganizationSummarySerializer,
+        'creator': UserSummarySerializer,
+    }
+
     class Meta:
         model = Project
-        fields = ('id', 'name', 'description', 'slug', 'created_at', 'updated_at', 'creator', 'organization')
+        fields = ('id', 'name', 'description', 'slug', 'created_at', 'updated_at', 'creator', 'organization',
+                  'project_admin', 'activity_viewer', 'activity_editor')
         read_only_fields = ('slug', 'created_at', 'updated_at', 'creator')
 
 
 def get_organization_for_project_serializer(view, slug_name='slug'):
-    return get_object_or_404(Organization, slug=view.kwargs.get(slug_name))
+    return get_organization_or_404(view.kwargs.get(slug_name))
 
 
 def get_project_for_org_project_serializer(view, slug_name='slug'):
-    org = get_organization_for_project_serializer(view, slug_name='org_slug')
-    return get_object_or_404(Project, organization=org, slug=view.kwargs.get(slug_name))
+    return get_project_or_404(view.kwargs.get('org_slug'), view.kwargs.get(slug_name))
+
 
+class OrganizationProjectSerializer(IncludeSerializerMixin, ProjectRolesSerializerMixin, serializers.ModelSerializer):
+    include_serializers = {
+        'organization': OrganizationSummarySerializer,
+        'creator': UserSummarySerializer,
+    }
 
-class OrganizationProjectSerializer(serializers.ModelSerializer):
     class Meta:
         model = Project
-        fields = ('id', 'name', 'description', 'slug', 'created_at', 'updated_at', 'creator', 'organization')
-        read_only_fields = ('slug', 'created_at', 'updated_at', 'organization')
+        fields = ('id', 'name', 'description', 'slug', 'created_at', 'updated_at', 'creator', 'organization',
+                  'project_admin', 'activity_viewer', 'activity_editor',
+                  'entry_count', 'total_minutes', 'contributor_count')
+        read_only_fields = ('slug', 'created_at', 'updated_at', 'organization',
+                            'entry_count', 'total_minutes', 'contributor_count')
 
     def get_organization(self):
         return get_organization_for_project_serializer(self.context['view'], slug_name='org_slug')
@@ -150,10 +209,22 @@ class ProjectContributorCreateUpdateSerializer(serializers.Serializer):
         return instance
 
 
-class ProjectContributorSerializer(serializers.ModelSerializer):
+class ProjectContributorSerializer(IncludeSerializerMixin, serializers.ModelSerializer):
+    include_serializers = {
+        'user': UserSummarySerializer,
+        'project': ProjectSummarySerializer,
+    }
+
+    # boolean views of ProjectContributor.roles
+    project_admin = serializers.BooleanField(required=False)
+    activity_viewer = serializers.BooleanField(required=False)
+    activity_editor = serializers.BooleanField(required=False)
+
     class Meta:
         model = ProjectContributor
-        fields = ('id', 'project', 'user', 'project_admin', 'activity_viewer', 'activity_editor', 'created_at', 'updated_at')
+        fields = ('id', 'project', 'user', 'project_admin', 'activity_viewer', 'activity_editor', 'created_at', 'updated_at',
+                  'entry_count', 'total_minutes')
+        read_only_fields = ('entry_count', 'total_minutes')
 
     def get_organization(self):
         return get_organization_for_project_serializer(self.context['view'], slug_name='org_slug')
@@ -170,7 +241,28 @@ class ProjectContributorSerializer(serializers.ModelSerializer):
         return data
 
 
-class ActivityEntrySerializer(serializers.ModelSerializer):
+class ActivityEntrySerializer(IncludeSerializerMixin, serializers.ModelSerializer):
+    include_serializers = {
+        # the contributor's user, denormalized onto the entry
+        'user': UserSummarySerializer,
+        'project': ProjectSummarySerializer,
+        'contributor': ProjectContributorSummarySerializer,
+    }
+
     class Meta:
         model = ActivityEntry
-        fields = ('id', 'name', 'description', 'project', 'contributor', 'start', 'end', 'minutes')
+        fields = ('id', 'ulid', 'slug', 'name', 'description', 'project', 'contributor', 'start', 'end', 'minutes')
+        read_only_fields = ('slug',)
+
+    def validate_ulid(self, value):
+        if value in (None, ''):
+            return None
+
+        ulid = normalize_ulid(value)
+        if ulid is None:
+            raise serializers.ValidationError('Not a valid ULID')
+        if self.instance is not None and self.instance.ulid and self.instance.ulid != ulid:
+            raise serializers.ValidationError('ULID cannot be changed')
+        if ActivityEntry.objects.filter(ulid=ulid).exclude(pk=getattr(self.instance, 'pk', None)).exists():
+            raise serializers.ValidationError('Activity entry with this ULID already exists')
+        return ulid
@@ -25,6 +25,7 @@ from core.models import (
     ProjectContributor,
     ActivityEntry
 )
+from core.utils import generate_ulid
 
 
 class ActivityEntryTests(TestCase):
@@ -345,6 +346,50 @@ class ActivityEntryTests(TestCase):
         self.assertIsNone(data['end'])
         self.assertEquals(payload['minutes'], data['minutes'])
 
+    def test_create_activity_entry_with_ulid_succeeds(self):
+        '''Tests that an activity entry can be created with a client generated ULID
+        and looked up by it'''
+        org1 = create_organization('Org 1', self.johndoe_user)
+        project1 = create_project('Org 1 Project 1', 'abc', self.johndoe_user, org1)
+        batman_contrib = ProjectContributor.objects.create(user=self.batman_user, project=project1, activity_editor=True)
+
+        batman_client = APIClient()
+        authenticate_jwt(batman_creds, batman_client)
+
+        url = reverse(self.create_list_view_name, kwargs={
+            'org_slug': org1.slug,
+            'project_slug': project1.slug
+        })
+        ulid = generate_ulid()
+        payload = {
+            'ulid': ulid.lower(),
+            'name': 'An Activity',
+            'description': 'Activity description',
+            'contributor': batman_contrib.id,
+            'project': project1.id,
+            'minutes': 60
+        }
+        response = batman_client.post(url, payload, format='json')
+        self.assertEqual(status.HTTP_201_CREATED, response.status_code)
+        self.assertEqual(ulid, response.data['ulid'])
+        self.assertEqual(ulid.lower(), response.data['slug'])
+
+        # duplicate and malformed ULIDs are rejected
+        response = batman_client.post(url, payload, format='json')
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+        response = batman_client.post(url, dict(payload, ulid='not-a-ulid'), format='json')
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+
+        ae = ActivityEntry.objects.get(ulid=ulid)
+        detail_url = reverse(self.detail_view_name, kwargs={
+            'org_slug': org1.slug,
+            'project_slug': project1.slug,
+            'activity_slug': ulid
+        })
+        response = batman_client.get(detail_url, format='json')
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(ae.id, response.data['id'])
+
     def test_create_activity_entry_by_activity_viewer_fails(self):
         '''Tests that a activity entry cannot be created by a project
         contributor with activity_viewer = True'''
@@ -460,6 +505,39 @@ class ActivityEntryTests(TestCase):
         self.assertIn('end', data)
         self.assertIn('minutes', data)
 
+    def test_activity_entry_slugs_unique_per_project_succeeds(self):
+        '''Tests activity entries with the same name in different projects share a slug
+        and each resolves within its own project'''
+        org1 = create_organization('Org 1', self.johndoe_user)
+        project1 = create_project('Org 1 Project 1', 'abc', self.johndoe_user, org1)
+        project2 = create_project('Org 1 Project 2', 'abc', self.johndoe_user, org1)
+
+        janedoe_contrib = ProjectContributor.objects.create(user=self.janedoe_user, project=project1, activity_editor=True)
+        batman_contrib = ProjectContributor.objects.create(user=self.batman_user, project=project2, activity_editor=True)
+
+        ae1 = ActivityEntry.objects.create(name='Standup', description='abc', contributor=janedoe_contrib,
+                                           project=project1, minutes=15)
+        ae2 = ActivityEntry.objects.create(name='Standup', description='abc', contributor=batman_contrib,
+                                           project=project2, minutes=30)
+        ae3 = ActivityEntry.objects.create(name='Standup', description='abc', contributor=janedoe_contrib,
+                                           project=project1, minutes=45)
+        self.assertEqual('standup', ae1.slug)
+        self.assertEqual('standup', ae2.slug)
+        self.assertEqual('standup-2', ae3.slug)
+
+        admin_client = APIClient()
+        authenticate_jwt(admin_creds, admin_client)
+
+        for project, entry in ((project1, ae1), (project2, ae2), (project1, ae3)):
+            url = reverse(self.detail_view_name, kwargs={
+                'org_slug': org1.slug,
+                'project_slug': project.slug,
+                'activity_slug': entry.slug
+            })
+            response = admin_client.get(url, format='json')
+            self.assertEqual(status.HTTP_200_OK, response.status_code)
+            self.assertEqual(entry.id, response.data['id'])
+
     def test_view_activity_entry_by_project_admin_succeeds(self):
         '''Tests that a project admin (ProjectContributor.project_admin = True)
         can view an activity entry'''
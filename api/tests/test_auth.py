@@ -1,13 +1,19 @@
+from django.db import connection
 from django.shortcuts import reverse
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
 from rest_framework import status
 from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.authentication import get_user_cache
 
 from api.tests.testing_utils import (
     create_user,
     authenticate_jwt,
-    admin_creds
+    admin_creds,
+    johndoe_creds,
 )
 
 
@@ -102,3 +108,40 @@ class TestAuthAPI(TestCase):
         self.assertNotIn('phone_number', data)
         self.assertNotIn('is_staff', data)
         self.assertNotIn('is_superuser', data)
+
+
+class TestCachedJWTAuthentication(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.johndoe_user = johndoe_creds.create_user(is_active=True)
+
+    def setUp(self):
+        get_user_cache().clear()
+        self.client = APIClient()
+        # token only, logging in through the api would also start a session
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.johndoe_user)}')
+        self.url = reverse('projects-list')
+
+    def get_user_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url, format='json')
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        return [q['sql'] for q in ctx.captured_queries if 'FROM "core_user"' in q['sql']]
+
+    def test_steady_state_requests_make_no_user_queries(self):
+        '''Tests the user is only fetched on the first request for a token'''
+        self.assertEqual(1, len(self.get_user_queries()))
+        self.assertEqual(0, len(self.get_user_queries()))
+        self.assertEqual(0, len(self.get_user_queries()))
+
+    def test_deactivating_user_invalidates_cache(self):
+        '''Tests saving the user drops the cached copy so deactivation applies immediately'''
+        self.get_user_queries()
+
+        self.johndoe_user.is_active = False
+        self.johndoe_user.save()
+
+        response = self.client.get(self.url, format='json')
+        self.assertNotEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual('user_inactive', response.data['code'])
@@ -0,0 +1,112 @@
+from django.shortcuts import reverse
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from api.tests.testing_utils import (
+    authenticate_jwt,
+    admin_creds,
+    johndoe_creds,
+    batman_creds,
+    create_organization,
+    create_project,
+)
+from core.models import Organization
+from core.slug_cache import slug_cache
+
+
+class BatchAPITests(TestCase):
+    batch_view_name = 'batch'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = admin_creds.create_user(is_active=True, is_staff=True)
+        cls.johndoe_user = johndoe_creds.create_user(is_active=True)
+        cls.batman_user = batman_creds.create_user(is_active=True)
+        cls.org = create_organization('Org 1', cls.johndoe_user)
+        cls.project = create_project('Org 1 Project 1', 'abc', cls.johndoe_user, cls.org)
+
+    def post(self, creds, payload):
+        client = APIClient()
+        authenticate_jwt(creds, client)
+        return client.post(reverse(self.batch_view_name), payload, format='json')
+
+    def test_batch_executes_sub_requests_in_order_succeeds(self):
+        '''Tests reads and writes of a batch run with the caller's authentication'''
+        response = self.post(johndoe_creds, {'requests': [
+            {'id': 'orgs', 'method': 'GET', 'path': '/api/v1/organizations/'},
+            {'id': 'members', 'method': 'POST', 'path': '/api/v1/organizations/{}/members/'.format(self.org.slug),
+             'body': {'user_id': self.batman_user.id}},
+            {'id': 'projects', 'method': 'GET',
+             'path': '/api/v1/organizations/{}/projects/?format=json'.format(self.org.slug)},
+            {'id': 'missing', 'method': 'GET', 'path': '/api/v1/nope/'},
+        ]})
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+
+        responses = {r['id']: r for r in response.data['responses']}
+        self.assertEqual(['orgs', 'members', 'projects', 'missing'], [r['id'] for r in response.data['responses']])
+        self.assertEqual(200, responses['orgs']['status'])
+        self.assertEqual([self.org.slug], [o['slug'] for o in responses['orgs']['body']])
+        self.assertEqual(201, responses['members']['status'])
+        self.assertTrue(self.org.members.filter(pk=self.batman_user.pk).exists())
+        self.assertEqual([self.project.id], [p['id'] for p in responses['projects']['body']])
+        self.assertEqual(404, responses['missing']['status'])
+
+    def test_batch_sub_requests_keep_permissions(self):
+        '''Tests sub-requests are checked against the caller's permissions'''
+        response = self.post(batman_creds, {'requests': [
+            {'method': 'GET', 'path': '/api/v1/organizations/{}/'.format(self.org.slug)},
+            {'method': 'DELETE', 'path': '/api/v1/organizations/{}/'.format(self.org.slug)},
+        ]})
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual([403, 403], [r['status'] for r in response.data['responses']])
+        self.assertTrue(Organization.objects.filter(pk=self.org.pk).exists())
+
+    def test_batch_invalid_payload_fails(self):
+        '''Tests malformed, oversized, nested or non api batches are rejected'''
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, self.post(johndoe_creds, {'requests': []}).status_code)
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, self.post(johndoe_creds, {'requests': [
+            {'method': 'GET', 'path': '/admin/'}
+        ]}).status_code)
+        with override_settings(BATCH_MAX_REQUESTS=1):
+            self.assertEqual(status.HTTP_400_BAD_REQUEST, self.post(johndoe_creds, {'requests': [
+                {'method': 'GET', 'path': '/api/v1/projects/'}
+            ] * 2}).status_code)
+
+        response = self.post(johndoe_creds, {'requests': [{'method': 'POST', 'path': '/api/v1/batch/'}]})
+        self.assertEqual(400, response.data['responses'][0]['status'])
+
+    def test_batch_unauthenticated_fails(self):
+        '''Tests the batch endpoint requires authentication'''
+        response = APIClient().post(reverse(self.batch_view_name), {'requests': [
+            {'method': 'GET', 'path': '/api/v1/organizations/'}
+        ]}, format='json')
+        self.assertEqual(status.HTTP_403_FORBIDDEN, response.status_code)
+
+
+class ParallelBatchAPITests(TransactionTestCase):
+    '''Pool threads use their own database connections which only see committed data'''
+
+    def setUp(self):
+        # committed slugs get cached, the ids are gone once the tables are flushed
+        self.addCleanup(slug_cache.clear)
+        self.johndoe_user = johndoe_creds.create_user(is_active=True)
+        self.orgs = [create_organization('Org {}'.format(i), self.johndoe_user) for i in range(3)]
+        for org in self.orgs:
+            create_project('{} Project'.format(org.name), 'abc', self.johndoe_user, org)
+
+    @override_settings(BATCH_MAX_WORKERS=3)
+    def test_parallel_batch_reads_succeeds(self):
+        '''Tests read sub-requests run on the thread pool and keep their order'''
+        client = APIClient()
+        authenticate_jwt(johndoe_creds, client)
+        response = client.post(reverse('batch'), {'parallel': True, 'requests': [
+            {'id': org.slug, 'method': 'GET', 'path': '/api/v1/organizations/{}/projects/'.format(org.slug)}
+            for org in self.orgs
+        ]}, format='json')
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual([org.slug for org in self.orgs], [r['id'] for r in response.data['responses']])
+        self.assertEqual([200] * 3, [r['status'] for r in response.data['responses']])
+        self.assertEqual([1] * 3, [len(r['body']) for r in response.data['responses']])
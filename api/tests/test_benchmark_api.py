@@ -0,0 +1,124 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.cache import caches
+from django.core.management.base import CommandError
+from django.db import connection
+from django.middleware.clickjacking import XFrameOptionsMiddleware
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from api.tests.testing_utils import (
+    johndoe_creds,
+    janedoe_creds,
+    create_organization,
+    create_project,
+)
+from core.models import ProjectContributor, ActivityEntry
+
+
+class BenchmarkAPICommandTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.johndoe_user = johndoe_creds.create_user(is_active=True)
+        cls.janedoe_user = janedoe_creds.create_user(is_active=True)
+
+        org = create_organization('Org 1', cls.johndoe_user)
+        project = create_project('Org 1 Project 1', 'abc', cls.johndoe_user, org)
+        contributor = ProjectContributor.objects.create(user=cls.janedoe_user,
+                                                        project=project,
+                                                        activity_editor=True)
+        ActivityEntry.objects.create(name='Benchmark Entry',
+                                     description='abc',
+                                     contributor=contributor,
+                                     project=project,
+                                     minutes=60)
+
+    def test_benchmark_writes_results_for_readable_endpoints(self):
+        '''Tests benchmarking records latency percentiles for every GET route'''
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            output = os.path.join(tmp_dir, 'results.json')
+            call_command('benchmark_api',
+                         email=johndoe_creds.email,
+                         requests=3,
+                         warmup=0,
+                         host='testserver',
+                         output=output,
+                         stdout=StringIO(),
+                         stderr=StringIO())
+
+            with open(output) as fp:
+                report = json.load(fp)
+
+            call_command('benchmark_api',
+                         email=johndoe_creds.email,
+                         requests=2,
+                         warmup=0,
+                         host='testserver',
+                         endpoints=['projects-list'],
+                         compare=output,
+                         stdout=StringIO(),
+                         stderr=StringIO())
+
+        names = {result['name'] for result in report['endpoints']}
+        self.assertIn('projects-list', names)
+        self.assertIn('activity-entry-detail', names)
+        # delete only routes are never exercised
+        self.assertNotIn('organization-member-delete', names)
+
+        # routes requiring query parameters are measured with sample ones
+        results = {result['name']: result for result in report['endpoints']}
+        self.assertEqual('/api/v1/search/?q=Benchmark', results['search']['path'])
+        self.assertEqual({'200': 3}, results['search']['status_codes'])
+        self.assertEqual({'200': 3}, results['organization-member-autocomplete']['status_codes'])
+
+        for result in report['endpoints']:
+            self.assertEqual(3, result['requests'])
+            self.assertLessEqual(result['p50_ms'], result['p95_ms'])
+            self.assertLessEqual(result['p95_ms'], result['p99_ms'])
+
+    def count_user_queries(self, **options):
+        caches['default'].clear()
+        with CaptureQueriesContext(connection) as context:
+            call_command('benchmark_api',
+                         email=johndoe_creds.email,
+                         requests=4,
+                         warmup=1,
+                         host='testserver',
+                         endpoints=['projects-list'],
+                         stdout=StringIO(),
+                         stderr=StringIO(),
+                         **options)
+        return sum(1 for query in context.captured_queries if 'FROM "core_user"' in query['sql'])
+
+    def test_benchmark_without_auth_cache_resolves_every_user(self):
+        '''Tests --no-auth-cache makes every request look the token user up again'''
+        cached = self.count_user_queries()
+        uncached = self.count_user_queries(no_auth_cache=True)
+        self.assertEqual(uncached - cached, 4)
+
+    def test_benchmark_without_lean_api_runs_full_middleware_stack(self):
+        '''Tests --no-lean-api sends token requests through the session style middleware'''
+        for options, expected_calls in (({}, 0), ({'no_lean_api': True}, 3)):
+            with mock.patch.object(XFrameOptionsMiddleware, 'process_response', autospec=True,
+                                   side_effect=lambda self, request, response: response) as process_response:
+                call_command('benchmark_api',
+                             email=johndoe_creds.email,
+                             requests=3,
+                             warmup=0,
+                             host='testserver',
+                             endpoints=['projects-list'],
+                             stdout=StringIO(),
+                             stderr=StringIO(),
+                             **options)
+            self.assertEqual(expected_calls, process_response.call_count)
+
+    def test_benchmark_unknown_user_fails(self):
+        '''Tests benchmarking as a non existent user is rejected'''
+        with self.assertRaises(CommandError):
+            call_command('benchmark_api', email='nobody@mail.com', stdout=StringIO())
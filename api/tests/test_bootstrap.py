@@ -0,0 +1,186 @@
+from django.db import connection, transaction
+from django.shortcuts import reverse
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from api.tests.testing_utils import (
+    authenticate_jwt,
+    admin_creds,
+    johndoe_creds,
+    janedoe_creds,
+    batman_creds,
+    robin_creds,
+    create_organization,
+    create_project,
+)
+from core.models import ActivityEntry, Organization, ProjectContributor
+
+
+class BootstrapTests(TestCase):
+    bootstrap_view_name = 'bootstrap'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = admin_creds.create_user(is_active=True, is_staff=True)
+        cls.johndoe_user = johndoe_creds.create_user(is_active=True)
+        cls.janedoe_user = janedoe_creds.create_user(is_active=True)
+        cls.batman_user = batman_creds.create_user(is_active=True)
+
+        cls.org1 = create_organization('Org 1', cls.johndoe_user)
+        cls.org2 = create_organization('Org 2', cls.janedoe_user)
+        cls.project1 = create_project('Org 1 Project 1', 'abc', cls.johndoe_user, cls.org1)
+        cls.project2 = create_project('Org 2 Project 1', 'abc', cls.janedoe_user, cls.org2)
+        create_project('Org 2 Project 2', 'abc', cls.janedoe_user, cls.org2)
+
+        cls.org1.members.add(cls.batman_user)
+        ProjectContributor.objects.create(user=cls.batman_user, project=cls.project1, activity_editor=True)
+        ProjectContributor.objects.create(user=cls.batman_user, project=cls.project2, activity_viewer=True)
+
+    def get(self, creds):
+        client = APIClient()
+        authenticate_jwt(creds, client)
+        return client.get(reverse(self.bootstrap_view_name), format='json')
+
+    def test_bootstrap_contributor_succeeds(self):
+        '''Tests the bootstrap payload lists the user's organizations and projects with capabilities'''
+        response = self.get(batman_creds)
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+
+        data = response.data
+        self.assertEqual(self.batman_user.email, data['user']['email'])
+        orgs = {o['slug']: o for o in data['organizations']}
+        self.assertEqual({self.org1.slug, self.org2.slug}, set(orgs))
+        self.assertTrue(orgs[self.org1.slug]['is_member'])
+        self.assertFalse(orgs[self.org1.slug]['capabilities']['create_projects'])
+
+        projects = {p['id']: p['capabilities'] for p in data['projects']}
+        self.assertEqual({self.project1.id, self.project2.id}, set(projects))
+        self.assertEqual({'view': 'own', 'create': True, 'edit': 'own'}, projects[self.project1.id]['entries'])
+        # activity viewers may still edit the entries filed under their own contributor
+        self.assertEqual({'view': 'all', 'create': False, 'edit': 'own'}, projects[self.project2.id]['entries'])
+        self.assertFalse(projects[self.project1.id]['contributors']['view'])
+
+    def test_bootstrap_org_contact_succeeds(self):
+        '''Tests organization contacts get project admin and organization management capabilities'''
+        data = self.get(johndoe_creds).data
+        self.assertEqual([self.org1.slug], [o['slug'] for o in data['organizations']])
+        self.assertTrue(data['organizations'][0]['capabilities']['create_projects'])
+        self.assertEqual([self.project1.id], [p['id'] for p in data['projects']])
+        capabilities = data['projects'][0]['capabilities']
+        self.assertTrue(capabilities['project']['edit'])
+        self.assertTrue(capabilities['contributors']['edit'])
+        self.assertEqual('all', capabilities['entries']['edit'])
+
+    def test_bootstrap_admin_succeeds(self):
+        '''Tests admins (is_staff = True) see every organization and project'''
+        data = self.get(admin_creds).data
+        self.assertEqual(2, len(data['organizations']))
+        self.assertEqual(3, len(data['projects']))
+        self.assertTrue(all(p['capabilities']['project']['delete'] for p in data['projects']))
+
+    def probe(self, client, method, url, payload=None):
+        '''Whether the request succeeds, rolled back so probes do not affect each other'''
+        with transaction.atomic():
+            response = getattr(client, method)(url, payload, format='json')
+            transaction.set_rollback(True)
+        allowed = status.is_success(response.status_code)
+        self.assertTrue(allowed or response.status_code in (status.HTTP_403_FORBIDDEN, status.HTTP_404_NOT_FOUND),
+                        (method, url, response.data))
+        return allowed
+
+    def test_bootstrap_capabilities_match_endpoints(self):
+        '''Tests every capability agrees with what the corresponding endpoint allows'''
+        robin_user = robin_creds.create_user(is_active=True)
+        self.org1.members.add(robin_user)
+        self.org2.members.add(robin_user)
+        entries = {}
+        for contrib in ProjectContributor.objects.select_related('project'):
+            entries[contrib.user_id, contrib.project_id] = contrib, ActivityEntry.objects.create(
+                name='Entry', description='abc', contributor=contrib, project=contrib.project, minutes=30)
+
+        for creds, user in ((admin_creds, self.admin_user), (johndoe_creds, self.johndoe_user),
+                            (janedoe_creds, self.janedoe_user), (batman_creds, self.batman_user)):
+            client = APIClient()
+            authenticate_jwt(creds, client)
+            data = client.get(reverse(self.bootstrap_view_name), format='json').data
+
+            for org in data['organizations']:
+                capabilities = org['capabilities']
+                kwargs = {'org_slug': org['slug']}
+                members_url = reverse('organization-member-list-create', kwargs=kwargs)
+                checks = {
+                    'create_projects': self.probe(
+                        client, 'post', reverse('organization-projects-list-create', kwargs=kwargs),
+                        {'name': 'Probe', 'description': 'abc'}),
+                    'view_members': self.probe(client, 'get', members_url),
+                    'add_members': self.probe(client, 'post', members_url, {'user_id': self.admin_user.id}),
+                    'remove_members': self.probe(client, 'delete', reverse(
+                        'organization-member-delete', kwargs=dict(kwargs, pk=robin_user.id))),
+                }
+                self.assertEqual(checks, {k: capabilities[k] for k in checks}, (user.email, org['slug']))
+
+            for project in data['projects']:
+                capabilities = project['capabilities']
+                org = Organization.objects.get(id=project['organization'])
+                # the contact is project admin of every project of the organization
+                contrib, other = entries[org.contact_id, project['id']]
+                kwargs = {'org_slug': org.slug, 'project_slug': project['slug']}
+                project_url = reverse('organization-projects-detail', kwargs=kwargs)
+                contributors_url = reverse('project-contributor-list-create', kwargs=kwargs)
+                contributor_url = reverse('project-contributor-detail', kwargs=dict(kwargs, pk=contrib.id))
+                own = entries.get((user.id, project['id']), (None, None))[1]
+
+                def entry_url(entry):
+                    return reverse('activity-entry-detail', kwargs=dict(kwargs, activity_slug=entry.slug))
+
+                def entry_payload(entry):
+                    return {'name': 'Probe', 'description': 'abc', 'contributor': entry.contributor_id,
+                            'project': project['id'], 'minutes': 15}
+
+                def scope(method):
+                    if self.probe(client, method, entry_url(other), entry_payload(other)):
+                        return 'all'
+                    if own is not None and self.probe(client, method, entry_url(own), entry_payload(own)):
+                        return 'own'
+                    return None
+
+                checks = {
+                    'project': {
+                        'view': self.probe(client, 'get', project_url),
+                        'edit': self.probe(client, 'put', project_url, {'name': project['name'], 'description': 'probe'}),
+                        'delete': self.probe(client, 'delete', project_url),
+                    },
+                    'contributors': {
+                        'view': self.probe(client, 'get', contributors_url),
+                        'edit': self.probe(client, 'put', contributor_url, {
+                            'email': contrib.user.email, 'project': project['id'], 'project_admin': True,
+                            'activity_viewer': False, 'activity_editor': False}),
+                    },
+                    'entries': {
+                        'view': scope('get'),
+                        'create': own is not None and self.probe(
+                            client, 'post', reverse('activity-entry-list-create', kwargs=kwargs), entry_payload(own)),
+                        'edit': scope('put'),
+                    },
+                }
+                self.assertEqual(checks, capabilities, (user.email, project['slug']))
+
+    def test_bootstrap_query_count_is_fixed(self):
+        '''Tests the number of queries does not grow with organizations and projects'''
+        client = APIClient()
+        authenticate_jwt(janedoe_creds, client)
+        url = reverse(self.bootstrap_view_name)
+        client.get(url, format='json')
+
+        with CaptureQueriesContext(connection) as before:
+            client.get(url, format='json')
+        for i in range(5):
+            create_project('Org 2 Extra {}'.format(i), 'abc', self.janedoe_user, self.org2)
+        with CaptureQueriesContext(connection) as after:
+            response = client.get(url, format='json')
+
+        self.assertEqual(7, len(response.data['projects']))
+        self.assertEqual(len(before), len(after))
@@ -0,0 +1,209 @@
+import threading
+import time
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.shortcuts import reverse
+from django.test import SimpleTestCase, TransactionTestCase
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from api.coalescing import SingleFlight, single_flight
+from api.tests.testing_utils import (
+    authenticate_jwt,
+    johndoe_creds,
+    janedoe_creds,
+    batman_creds,
+    create_organization,
+    create_project,
+)
+from core.models import ProjectContributor, ActivityEntry
+from core.slug_cache import slug_cache
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError('Timed out waiting')
+        time.sleep(0.005)
+
+
+class SingleFlightTests(SimpleTestCase):
+
+    def run_followers(self, flight, key, count):
+        results = [None] * count
+
+        def follower(i):
+            try:
+                results[i] = flight.do(key, lambda: 'follower computed')
+            except Exception as e:
+                results[i] = e
+
+        threads = [threading.Thread(target=follower, args=(i,)) for i in range(count)]
+        for thread in threads:
+            thread.start()
+        wait_for(lambda: flight.stats['shared'] == count)
+        return threads, results
+
+    def test_concurrent_calls_share_one_computation(self):
+        '''Tests callers arriving while a key is computed wait for and share its result'''
+        flight = SingleFlight()
+        release = threading.Event()
+        leader = threading.Thread(target=flight.do, args=('key', lambda: release.wait() and 'leader computed'))
+        leader.start()
+        wait_for(lambda: flight.stats['computed'] == 1)
+
+        threads, results = self.run_followers(flight, 'key', 3)
+        release.set()
+        for thread in threads + [leader]:
+            thread.join()
+
+        self.assertEqual(['leader computed'] * 3, results)
+        self.assertEqual('computed again', flight.do('key', lambda: 'computed again'))
+        self.assertEqual({'computed': 2, 'shared': 3}, dict(flight.stats))
+
+    def test_followers_compute_after_errors(self):
+        '''Tests waiting callers run the computation themselves when the leader's fails'''
+        flight = SingleFlight()
+        release = threading.Event()
+
+        def fail():
+            release.wait()
+            raise ValueError('boom')
+
+        def lead():
+            try:
+                flight.do('key', fail)
+            except ValueError:
+                pass
+
+        leader = threading.Thread(target=lead)
+        leader.start()
+        wait_for(lambda: flight.stats['computed'] == 1)
+
+        threads, results = self.run_followers(flight, 'key', 2)
+        release.set()
+        for thread in threads + [leader]:
+            thread.join()
+        self.assertEqual(['follower computed'] * 2, results)
+        self.assertEqual({'computed': 3, 'shared': 0}, dict(flight.stats))
+
+    def test_followers_compute_after_timeout(self):
+        '''Tests waiting callers stop waiting for a stuck computation'''
+        flight = SingleFlight()
+        release = threading.Event()
+        leader = threading.Thread(target=flight.do, args=('key', release.wait))
+        leader.start()
+        wait_for(lambda: flight.stats['computed'] == 1)
+
+        self.assertEqual('own', flight.do('key', lambda: 'own', timeout=0.01))
+        release.set()
+        leader.join()
+
+
+class CoalescedViewTests(TransactionTestCase):
+    '''Requests run on other threads, which only see committed data'''
+    list_view_name = 'activity-entry-list-create'
+
+    def setUp(self):
+        self.addCleanup(slug_cache.clear)
+        self.johndoe_user = johndoe_creds.create_user(is_active=True)
+        self.janedoe_user = janedoe_creds.create_user(is_active=True)
+        self.batman_user = batman_creds.create_user(is_active=True)
+
+        org = create_organization('Org 1', self.johndoe_user)
+        self.project = create_project('Org 1 Project 1', 'abc', self.johndoe_user, org)
+        ProjectContributor.objects.create(user=self.janedoe_user, project=self.project, activity_viewer=True)
+        contributor = ProjectContributor.objects.create(user=self.batman_user, project=self.project,
+                                                        activity_editor=True)
+        ActivityEntry.objects.create(name='Entry', description='abc', contributor=contributor,
+                                     project=self.project, minutes=60)
+        self.url = reverse(self.list_view_name, kwargs={'org_slug': org.slug, 'project_slug': self.project.slug})
+
+    def get_in_thread(self, creds, **extra):
+        client = APIClient()
+        authenticate_jwt(creds, client)
+        response = {}
+        thread = threading.Thread(
+            target=lambda: response.update(result=client.get(self.url, format='json', **extra)))
+        thread.start()
+        return thread, response
+
+    def test_requests_with_the_same_visibility_share_results(self):
+        '''Tests project viewers join an in flight listing, activity editors do not'''
+        release = threading.Event()
+        key = ('ActivityEntryListCreateAPIView', 'http://testserver' + self.url, 'project')
+        leader = threading.Thread(target=single_flight.do, args=(key, lambda: release.wait() and ['shared']))
+        leader.start()
+        wait_for(lambda: key in single_flight._calls)
+        shared_before = single_flight.stats['shared']
+
+        viewer_thread, viewer_response = self.get_in_thread(janedoe_creds)
+        wait_for(lambda: single_flight.stats['shared'] == shared_before + 1)
+
+        editor_thread, editor_response = self.get_in_thread(batman_creds)
+        editor_thread.join()
+        self.assertEqual(['Entry'], [e['name'] for e in editor_response['result'].data])
+
+        release.set()
+        for thread in (viewer_thread, leader):
+            thread.join()
+        self.assertEqual(status.HTTP_200_OK, viewer_response['result'].status_code)
+        self.assertEqual(['shared'], viewer_response['result'].data)
+
+    def test_requests_to_other_hosts_do_not_share_results(self):
+        '''Tests the shared data, whose pagination links are absolute, is only reused for
+        requests with the same scheme and host'''
+        keys = []
+
+        def record(key, fn):
+            keys.append(key)
+            return fn()
+
+        client = APIClient()
+        authenticate_jwt(janedoe_creds, client)
+        with mock.patch('api.views.coalesce', record):
+            client.get(self.url, format='json')
+            client.get(self.url, format='json', secure=True)
+            client.get(self.url, format='json', HTTP_HOST='api.example.com')
+        self.assertEqual(3, len(set(keys)))
+
+    def test_benchmark_bursts_reports_coalesced_computations(self):
+        '''Tests the burst benchmark accounts every request as computed or shared'''
+        out = StringIO()
+        call_command('benchmark_bursts',
+                     emails=[johndoe_creds.email, janedoe_creds.email],
+                     bursts=2,
+                     concurrency=4,
+                     pause_ms=0,
+                     host='testserver',
+                     random_seed=1,
+                     stdout=out)
+
+        report = dict(line.split(None, 1) for line in out.getvalue().splitlines())
+        self.assertEqual('8', report['requests'])
+        self.assertEqual(8, int(report['computed']) + int(report['shared']))
+        self.assertEqual('200x8', report['status'])
+
+    def test_benchmark_bursts_leaves_out_server_side_counts_for_remote_runs(self):
+        '''Tests runs against --base-url do not report the computed / shared counts of
+        this process, the requests are served by another one'''
+        out = StringIO()
+        with mock.patch('api.management.commands.benchmark_bursts.Command.make_sender',
+                        lambda self, base_url, host, auth_header: lambda path: 200):
+            call_command('benchmark_bursts',
+                         emails=[johndoe_creds.email],
+                         bursts=1,
+                         concurrency=2,
+                         pause_ms=0,
+                         base_url='http://localhost:8000',
+                         stdout=out)
+
+        report = dict(line.split(None, 1) for line in out.getvalue().splitlines())
+        self.assertEqual('2', report['requests'])
+        self.assertNotIn('computed', report)
+        self.assertNotIn('shared', report)
+        self.assertNotIn('queries', report)
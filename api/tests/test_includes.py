@@ -0,0 +1,86 @@
+from django.db import connection
+from django.shortcuts import reverse
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from api.tests.testing_utils import (
+    authenticate_jwt,
+    admin_creds,
+    johndoe_creds,
+    janedoe_creds,
+    batman_creds,
+    create_organization,
+    create_project,
+)
+from core.models import ProjectContributor, ActivityEntry
+
+
+class IncludeTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = admin_creds.create_user(is_active=True, is_staff=True)
+        cls.johndoe_user = johndoe_creds.create_user(is_active=True, name='John Doe')
+        cls.janedoe_user = janedoe_creds.create_user(is_active=True, name='Jane Doe')
+        cls.batman_user = batman_creds.create_user(is_active=True, name='Batman')
+
+        cls.org = create_organization('Org 1', cls.johndoe_user)
+        cls.project = create_project('Org 1 Project 1', 'abc', cls.johndoe_user, cls.org)
+        for user in (cls.janedoe_user, cls.batman_user):
+            contributor = ProjectContributor.objects.create(user=user, project=cls.project, activity_editor=True)
+            for i in range(3):
+                ActivityEntry.objects.create(name='Entry {}'.format(i), description='abc',
+                                             contributor=contributor, project=cls.project, minutes=10)
+
+    def setUp(self):
+        self.client = APIClient()
+        authenticate_jwt(admin_creds, self.client)
+
+    def entries_url(self):
+        return reverse('activity-entry-list-create', kwargs={'org_slug': self.org.slug,
+                                                            'project_slug': self.project.slug})
+
+    def test_include_activity_entry_relations_succeeds(self):
+        '''Tests entries inline the contributor's user, project and contributor when included'''
+        response = self.client.get(self.entries_url(), {'include': 'user,project,contributor'}, format='json')
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+
+        entry = response.data[0]
+        self.assertEqual({'id': self.janedoe_user.id, 'email': self.janedoe_user.email, 'name': 'Jane Doe'},
+                         dict(entry['user']))
+        self.assertEqual(self.project.slug, entry['project']['slug'])
+        self.assertEqual(self.janedoe_user.id, entry['contributor']['user'])
+
+        response = self.client.get(self.entries_url(), format='json')
+        self.assertEqual(self.project.id, response.data[0]['project'])
+        self.assertNotIn('user', response.data[0])
+
+    def test_include_does_not_add_queries_per_row(self):
+        '''Tests included relations are joined instead of loaded once per row'''
+        url = self.entries_url()
+        self.client.get(url, format='json')
+
+        with CaptureQueriesContext(connection) as plain:
+            self.client.get(url, format='json')
+        with CaptureQueriesContext(connection) as included:
+            self.client.get(url, {'include': 'user,project,contributor'}, format='json')
+        self.assertEqual(len(plain), len(included))
+
+    def test_include_contributor_user_and_project_organization_succeeds(self):
+        '''Tests contributors inline their user and projects their organization'''
+        url = reverse('project-contributor-list-create', kwargs={'org_slug': self.org.slug,
+                                                                 'project_slug': self.project.slug})
+        response = self.client.get(url, {'include': 'user'}, format='json')
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual({'John Doe', 'Jane Doe', 'Batman'}, {c['user']['name'] for c in response.data})
+
+        response = self.client.get(reverse('projects-list'), {'include': 'organization'}, format='json')
+        self.assertEqual(self.org.slug, response.data[0]['organization']['slug'])
+
+    def test_unknown_include_fails(self):
+        '''Tests unknown include names are rejected'''
+        response = self.client.get(self.entries_url(), {'include': 'password'}, format='json')
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
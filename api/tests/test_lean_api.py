@@ -0,0 +1,68 @@
+from django.shortcuts import reverse
+from django.test import TestCase
+
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.tests.testing_utils import (
+    authenticate_jwt,
+    johndoe_creds,
+    create_organization,
+    create_project,
+)
+
+
+class LeanAPIPipelineTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.johndoe_user = johndoe_creds.create_user(is_active=True)
+        org = create_organization('Org 1', cls.johndoe_user)
+        create_project('Org 1 Project 1', 'abc', cls.johndoe_user, org)
+
+    def test_token_request_skips_session_stack_and_renders_json(self):
+        '''Tests Bearer token api requests skip the session middleware and only render JSON'''
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.johndoe_user)}')
+
+        response = client.get(reverse('projects-list'), HTTP_ACCEPT='text/html,*/*;q=0.8')
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual('application/json', response['Content-Type'])
+        self.assertNotIn('X-Frame-Options', response)
+        self.assertFalse(hasattr(response.wsgi_request, 'session'))
+        self.assertEqual(1, len(response.data))
+
+    def test_invalid_token_request_is_unauthorized(self):
+        '''Tests a bad token on a lean api request is rejected with 401'''
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION='Bearer not-a-token')
+
+        response = client.get(reverse('projects-list'))
+        self.assertEqual(status.HTTP_401_UNAUTHORIZED, response.status_code)
+
+    def test_session_request_keeps_full_stack(self):
+        '''Tests requests without a token still use the session and middleware stack'''
+        client = APIClient()
+        client.login(email=johndoe_creds.email, password=johndoe_creds.password)
+
+        response = client.get(reverse('projects-list'), format='json')
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertIn('X-Frame-Options', response)
+        self.assertTrue(hasattr(response.wsgi_request, 'session'))
+
+    def test_auth_endpoints_keep_full_stack(self):
+        '''Tests logging out with a token still has a session to flush'''
+        client = APIClient()
+        authenticate_jwt(johndoe_creds, client)
+
+        response = client.post(reverse('rest_logout'), format='json')
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+
+    def test_admin_keeps_full_stack(self):
+        '''Tests admin pages still get the X-Frame-Options header'''
+        response = self.client.get(reverse('admin:login'))
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertIn('X-Frame-Options', response)
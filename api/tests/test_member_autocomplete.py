@@ -0,0 +1,96 @@
+from django.contrib.auth import get_user_model
+from django.shortcuts import reverse
+from django.test import TestCase
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from api.tests.testing_utils import (
+    authenticate_jwt,
+    johndoe_creds,
+    janedoe_creds,
+    batman_creds,
+    robin_creds,
+    create_organization,
+)
+
+
+class OrganizationMemberAutocompleteTests(TestCase):
+    view_name = 'organization-member-autocomplete'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.johndoe_user = johndoe_creds.create_user(is_active=True, name='John Doe')
+        cls.janedoe_user = janedoe_creds.create_user(is_active=True, name='Jane Doe')
+        cls.batman_user = batman_creds.create_user(is_active=True, name='Bruce Wayne')
+        cls.robin_user = robin_creds.create_user(is_active=True, name='Dick Grayson')
+
+        cls.org = create_organization('Wayne Enterprises', cls.johndoe_user)
+        cls.org.members.add(cls.batman_user, cls.robin_user)
+        create_organization('Daily Planet', cls.janedoe_user)
+
+    def get(self, creds, org_slug=None, headers=None, **params):
+        client = APIClient()
+        authenticate_jwt(creds, client)
+        url = reverse(self.view_name, kwargs={'org_slug': org_slug or self.org.slug})
+        return client.get(url, params, format='json', **(headers or {}))
+
+    def emails(self, response):
+        return [user['email'] for user in response.data['results']]
+
+    def test_lookup_fields_follow_email_and_name(self):
+        '''Tests save() keeps the case normalized lookup columns in sync'''
+        self.robin_user.name = '  Richard   GRAYSON '
+        self.robin_user.save(update_fields=['name'])
+
+        user = get_user_model().objects.get(pk=self.robin_user.pk)
+        self.assertEqual('richard grayson', user.name_lookup)
+        self.assertEqual('robin@wayneenterprises.com', user.email_lookup)
+
+    def test_autocomplete_matches_email_and_name_prefixes(self):
+        '''Tests email and name prefixes match case insensitively, ordered by name'''
+        response = self.get(johndoe_creds, q='BRU')
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(['batman@wayneenterprises.com'], self.emails(response))
+        self.assertEqual({'id', 'email', 'name'}, set(response.data['results'][0]))
+
+        response = self.get(johndoe_creds, q='robin@')
+        self.assertEqual(['robin@wayneenterprises.com'], self.emails(response))
+
+        response = self.get(johndoe_creds, q='wayne')
+        self.assertEqual([], self.emails(response))
+
+    def test_autocomplete_is_scoped_to_members(self):
+        '''Tests only members of the organization are returned'''
+        response = self.get(johndoe_creds, q='j')
+        self.assertEqual(['johndoe@mail.com'], self.emails(response))
+
+    def test_autocomplete_limits_results(self):
+        '''Tests ?limit= caps the results and is itself capped'''
+        response = self.get(johndoe_creds, q='', limit=1)
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+
+        response = self.get(batman_creds, q='d', limit=1)
+        self.assertEqual(['robin@wayneenterprises.com'], self.emails(response))
+
+        response = self.get(batman_creds, q='d', limit='x')
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+
+    def test_autocomplete_caching_headers(self):
+        '''Tests responses are privately cacheable and revalidate with the ETag'''
+        response = self.get(johndoe_creds, q='bru')
+        self.assertIn('private', response['Cache-Control'])
+        self.assertIn('max-age=30', response['Cache-Control'])
+        etag = response['ETag']
+
+        response = self.get(johndoe_creds, q='bru', headers={'HTTP_IF_NONE_MATCH': etag})
+        self.assertEqual(status.HTTP_304_NOT_MODIFIED, response.status_code)
+        self.assertEqual(etag, response['ETag'])
+
+        response = self.get(johndoe_creds, q='d', headers={'HTTP_IF_NONE_MATCH': etag})
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+
+    def test_autocomplete_non_member_fails(self):
+        '''Tests users outside the organization cannot list its members'''
+        response = self.get(janedoe_creds, q='bru')
+        self.assertEqual(status.HTTP_403_FORBIDDEN, response.status_code)
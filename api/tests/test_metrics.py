@@ -0,0 +1,69 @@
+from django.shortcuts import reverse
+from django.test import TestCase, override_settings
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from api.tests.testing_utils import (
+    authenticate_jwt,
+    johndoe_creds,
+    create_organization,
+    create_project,
+)
+
+
+class MetricsEndpointTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.johndoe_user = johndoe_creds.create_user(is_active=True)
+        org = create_organization('Org 1', cls.johndoe_user)
+        create_project('Org 1 Project 1', 'abc', cls.johndoe_user, org)
+
+    def get_sample_value(self, metrics_text, line_prefix):
+        for line in metrics_text.splitlines():
+            if line.startswith(line_prefix):
+                return float(line.rsplit(' ', 1)[1])
+        return 0.0
+
+    def test_metrics_records_requests_by_route(self):
+        '''Tests request counts, latency and query counts are exposed by route name'''
+        client = APIClient()
+        authenticate_jwt(johndoe_creds, client)
+
+        requests_prefix = 'timetracker_http_requests_total{method="GET",route="projects-list",status="200"}'
+        latency_prefix = 'timetracker_http_request_duration_seconds_count{method="GET",route="projects-list"}'
+        queries_prefix = 'timetracker_db_queries_total{route="projects-list"}'
+
+        before = client.get(reverse('metrics')).content.decode()
+
+        response = client.get(reverse('projects-list'), format='json')
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        client.get(reverse('projects-list'), format='json')
+
+        response = client.get(reverse('metrics'))
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        after = response.content.decode()
+
+        self.assertEqual(2, self.get_sample_value(after, requests_prefix) - self.get_sample_value(before, requests_prefix))
+        self.assertEqual(2, self.get_sample_value(after, latency_prefix) - self.get_sample_value(before, latency_prefix))
+        self.assertGreater(self.get_sample_value(after, queries_prefix), self.get_sample_value(before, queries_prefix))
+        self.assertIn('timetracker_http_requests_in_flight', after)
+
+    @override_settings(METRICS_ALLOWED_IPS=['10.0.0.1'], METRICS_TOKEN='scrape-token')
+    def test_metrics_restricted_to_allowed_ips_and_token(self):
+        '''Tests metrics are forbidden to other addresses unless the bearer token is sent'''
+        client = APIClient()
+        authenticate_jwt(johndoe_creds, client)
+        response = client.get(reverse('metrics'))
+        self.assertEqual(status.HTTP_403_FORBIDDEN, response.status_code)
+
+        response = APIClient().get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer wrong-token')
+        self.assertEqual(status.HTTP_403_FORBIDDEN, response.status_code)
+
+        response = APIClient().get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer scrape-token')
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+
+        response = APIClient().get(reverse('metrics'), REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
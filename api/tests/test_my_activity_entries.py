@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta
+
+from django.shortcuts import reverse
+from django.test import TestCase
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from api.tests.testing_utils import (
+    authenticate_jwt,
+    johndoe_creds,
+    janedoe_creds,
+    batman_creds,
+    create_organization,
+    create_project,
+)
+from core.models import ProjectContributor, ActivityEntry
+
+
+class MyActivityEntriesTests(TestCase):
+    list_view_name = 'my-activity-entry-list'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.johndoe_user = johndoe_creds.create_user(is_active=True)
+        cls.janedoe_user = janedoe_creds.create_user(is_active=True)
+        cls.batman_user = batman_creds.create_user(is_active=True)
+
+        org1 = create_organization('Org 1', cls.johndoe_user)
+        org2 = create_organization('Org 2', cls.janedoe_user)
+        project1 = create_project('Org 1 Project 1', 'abc', cls.johndoe_user, org1)
+        project2 = create_project('Org 2 Project 1', 'abc', cls.janedoe_user, org2)
+
+        batman_contrib1 = ProjectContributor.objects.create(user=cls.batman_user, project=project1, activity_editor=True)
+        batman_contrib2 = ProjectContributor.objects.create(user=cls.batman_user, project=project2, activity_editor=True)
+        janedoe_contrib = ProjectContributor.objects.create(user=cls.janedoe_user, project=project1, activity_editor=True)
+
+        cls.day = timezone.make_aware(datetime(2020, 8, 3, 9))
+        for i, contributor in enumerate([batman_contrib1, batman_contrib2, batman_contrib1, janedoe_contrib]):
+            ActivityEntry.objects.create(name='Entry {}'.format(i),
+                                         description='abc',
+                                         contributor=contributor,
+                                         project=contributor.project,
+                                         start=cls.day + timedelta(days=i),
+                                         end=cls.day + timedelta(days=i, hours=1),
+                                         minutes=60)
+
+    def get(self, creds, **params):
+        client = APIClient()
+        authenticate_jwt(creds, client)
+        return client.get(reverse(self.list_view_name), params, format='json')
+
+    def test_list_my_activity_entries_across_projects_succeeds(self):
+        '''Tests listing returns only the caller's entries from every project, newest first'''
+        response = self.get(batman_creds)
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(3, response.data['count'])
+        self.assertEqual(['Entry 2', 'Entry 1', 'Entry 0'], [e['name'] for e in response.data['results']])
+        self.assertEqual(2, len({e['project'] for e in response.data['results']}))
+
+        response = self.get(johndoe_creds)
+        self.assertEqual(0, response.data['count'])
+
+    def test_list_my_activity_entries_date_filter_and_pagination_succeeds(self):
+        '''Tests from / to limit entries by start date and results are paginated'''
+        response = self.get(batman_creds, **{'from': '2020-08-04', 'to': '2020-08-05'})
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(['Entry 2', 'Entry 1'], [e['name'] for e in response.data['results']])
+
+        response = self.get(batman_creds, page_size=2, page=2)
+        self.assertEqual(['Entry 0'], [e['name'] for e in response.data['results']])
+        self.assertIsNotNone(response.data['previous'])
+
+    def test_list_my_activity_entries_invalid_date_fails(self):
+        '''Tests malformed date filters are rejected'''
+        for value in ('last week', '2020-02-30', '2020-01-01T25:00:00'):
+            response = self.get(batman_creds, **{'from': value})
+            self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+
+    def test_list_my_activity_entries_unauthenticated_fails(self):
+        '''Tests unauthenticated requests are rejected'''
+        # session authentication comes first so unauthenticated requests get a 403
+        response = APIClient().get(reverse(self.list_view_name), format='json')
+        self.assertEqual(status.HTTP_403_FORBIDDEN, response.status_code)
@@ -1,8 +1,10 @@
 from copy import deepcopy
+from unittest import mock
 
+from django.core.cache import caches
 from django.core.exceptions import ObjectDoesNotExist
 from django.shortcuts import reverse
-from django.test import TestCase
+from django.test import TestCase, TransactionTestCase
 
 from rest_framework import status
 from rest_framework.test import APIClient
@@ -16,6 +18,7 @@ from api.tests.testing_utils import (
     batman_creds,
 )
 from core.models import Organization
+from core.object_cache import organization_cache
 
 
 class TestOrganizationAPI(TestCase):
@@ -356,3 +359,45 @@ class TestOrganizationAPI(TestCase):
         self.assertEqual(status.HTTP_403_FORBIDDEN, response.status_code)
 
         self.assertIsNotNone(Organization.objects.get(slug=slug))
+
+
+class OrganizationDetailObjectCacheTests(TransactionTestCase):
+    '''Rows are only cached once committed so these tests commit'''
+
+    def setUp(self):
+        for alias in ('default', 'local'):
+            caches[alias].clear()
+            self.addCleanup(caches[alias].clear)
+        self.admin_user = admin_creds.create_user(is_active=True, is_staff=True)
+        self.johndoe_user = johndoe_creds.create_user(is_active=True)
+        self.janedoe_user = janedoe_creds.create_user(is_active=True)
+        self.org = Organization.objects.create(name='Org 1', slug='org-1', contact=self.johndoe_user)
+        self.url = reverse('organization-detail', kwargs={'org_slug': self.org.slug})
+
+        # another worker replaces the contact, this worker's cache still has the old row
+        stale = organization_cache.get(self.org.id)
+        self.org.contact = self.janedoe_user
+        self.org.save()
+        organization_cache.store(organization_cache.object_key(self.org.id, organization_cache.get_version(self.org.id)),
+                                 stale)
+
+        self.client = APIClient()
+        authenticate_jwt(admin_creds, self.client)
+
+    def test_reads_skip_a_cache_not_shared_by_every_worker(self):
+        '''Tests detail reads use the database while the shared tier is per process'''
+        response = self.client.get(self.url, format='json')
+        self.assertEqual(self.janedoe_user.id, response.data['contact'])
+
+        with mock.patch('api.views.is_shared', return_value=True):
+            response = self.client.get(self.url, format='json')
+        self.assertEqual(self.johndoe_user.id, response.data['contact'])
+
+    def test_writes_never_save_cached_rows(self):
+        '''Tests updates start from the current row even with a shared cache'''
+        with mock.patch('api.views.is_shared', return_value=True):
+            response = self.client.patch(self.url, {'name': 'Renamed'}, format='json')
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+
+        self.org.refresh_from_db()
+        self.assertEqual(('Renamed', self.janedoe_user.id), (self.org.name, self.org.contact_id))
@@ -0,0 +1,60 @@
+import os
+import tempfile
+
+from django.shortcuts import reverse
+from django.test import TestCase, override_settings
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from api.tests.testing_utils import (
+    authenticate_jwt,
+    johndoe_creds,
+    create_organization,
+    create_project,
+)
+
+
+class ProfilingMiddlewareTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.johndoe_user = johndoe_creds.create_user(is_active=True)
+        org = create_organization('Org 1', cls.johndoe_user)
+        create_project('Org 1 Project 1', 'abc', cls.johndoe_user, org)
+
+    def get_projects(self, **extra):
+        client = APIClient()
+        authenticate_jwt(johndoe_creds, client)
+        return client.get(reverse('projects-list'), format='json', **extra)
+
+    def test_profiling_disabled_adds_no_server_timing(self):
+        '''Tests the middleware removes itself unless PROFILING_ENABLED'''
+        response = self.get_projects()
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertNotIn('Server-Timing', response)
+
+    @override_settings(PROFILING_ENABLED=True, PROFILING_OUTPUT_DIR=None)
+    def test_profiling_enabled_adds_server_timing(self):
+        '''Tests phase, SQL and total timings are emitted as a Server-Timing header'''
+        with self.assertLogs('timetracker.profiling', level='INFO') as logs:
+            response = self.get_projects()
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        metrics = [metric.split(';')[0] for metric in response['Server-Timing'].split(', ')]
+        for name in ('auth', 'perm', 'view', 'render', 'db', 'total'):
+            self.assertIn(name, metrics)
+        self.assertIn('"route": "projects-list"', logs.output[-1])
+
+    def test_profiling_trigger_header_writes_cprofile(self):
+        '''Tests a cProfile dump is written only when the trigger header carries the token'''
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            with override_settings(PROFILING_ENABLED=True,
+                                   PROFILING_OUTPUT_DIR=tmp_dir,
+                                   PROFILING_SAMPLE_RATE=0,
+                                   PROFILING_TRIGGER_TOKEN='secret'):
+                self.get_projects(HTTP_X_PROFILE='wrong')
+                self.assertEqual([], os.listdir(tmp_dir))
+
+                self.get_projects(HTTP_X_PROFILE='secret')
+                self.assertEqual(1, len(os.listdir(tmp_dir)))
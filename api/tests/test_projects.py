@@ -1,4 +1,5 @@
 from copy import deepcopy
+from types import SimpleNamespace
 
 from django.core.exceptions import ObjectDoesNotExist
 from django.shortcuts import reverse
@@ -17,7 +18,10 @@ from api.tests.testing_utils import (
     create_organization,
     create_project,
 )
+from api.views import OrgProjectListCreateAPIView
 from core.models import Organization, Project, ProjectContributor
+from core.object_cache import organization_cache
+from core.slug_cache import slug_cache
 
 
 class TestProjectListAPI(TestCase):
@@ -225,6 +229,43 @@ class TestOrganizationProjectAPI(TestCase):
         self.assertNotIn('creator', data)
         self.assertNotIn('organization', data)
 
+    def test_list_org_projects_scoped_to_org_with_roles_succeeds(self):
+        '''Tests listing organization projects only returns that organization's projects
+        along with the caller's roles in a single query'''
+        org1 = create_organization('Org 1', self.johndoe_user)
+        org2 = create_organization('Org 2', self.janedoe_user)
+
+        p1 = create_project('Org 1 Project 1', description='p1', creator=self.johndoe_user, organization=org1)
+        create_project('Org 1 Project 2', description='p2', creator=self.johndoe_user, organization=org1)
+        p3 = create_project('Org 2 Project 1', description='p3', creator=self.janedoe_user, organization=org2)
+        ProjectContributor.objects.create(user=self.johndoe_user, project=p3, activity_viewer=True)
+
+        johndoe_client = APIClient()
+        authenticate_jwt(johndoe_creds, johndoe_client)
+
+        url = reverse(self.project_create_list_view_name, kwargs={'org_slug': org2.slug})
+        response = johndoe_client.get(url, format='json')
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual([p3.id], [p['id'] for p in response.data])
+        self.assertFalse(response.data[0]['project_admin'])
+        self.assertTrue(response.data[0]['activity_viewer'])
+        self.assertFalse(response.data[0]['activity_editor'])
+
+        url = reverse(self.project_create_list_view_name, kwargs={'org_slug': org1.slug})
+        response = johndoe_client.get(url, format='json')
+        self.assertEqual(2, len(response.data))
+        self.assertEqual(p1.id, response.data[0]['id'])
+        self.assertTrue(all(p['project_admin'] for p in response.data))
+
+        # the organization slug resolves from the slug cache once warm
+        slug_cache.set(('organization', org1.slug), ('organization', org1.id), org1.id,
+                       organization_cache.get_version(org1.id))
+        self.addCleanup(slug_cache.clear)
+        view = OrgProjectListCreateAPIView(kwargs={'org_slug': org1.slug})
+        view.request = SimpleNamespace(user=self.johndoe_user)
+        with self.assertNumQueries(1):
+            list(view.get_queryset())
+
     def test_view_project_with_admin_succeeds(self):
         '''Tests that an admin (is_staff = True) can view project'''
         org = create_organization('Org 1', self.johndoe_user)
@@ -0,0 +1,144 @@
+from datetime import datetime, timedelta
+
+from django.shortcuts import reverse
+from django.test import TestCase
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from api.tests.testing_utils import (
+    authenticate_jwt,
+    johndoe_creds,
+    janedoe_creds,
+    batman_creds,
+    create_organization,
+    create_project,
+)
+from core.models import ProjectContributor, ActivityEntry
+from core.search import fts_match_expression
+
+
+class SearchTests(TestCase):
+    view_name = 'search'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.johndoe_user = johndoe_creds.create_user(is_active=True)
+        cls.janedoe_user = janedoe_creds.create_user(is_active=True)
+        cls.batman_user = batman_creds.create_user(is_active=True)
+
+        cls.org1 = create_organization('Wayne Enterprises', cls.johndoe_user)
+        cls.org2 = create_organization('Daily Planet', cls.janedoe_user)
+        cls.project1 = create_project('Batmobile Tuning', 'engine and armor work', cls.johndoe_user, cls.org1)
+        cls.project2 = create_project('Newsroom', 'printing press upgrade', cls.janedoe_user, cls.org2)
+
+        cls.batman_contrib = ProjectContributor.objects.create(user=cls.batman_user, project=cls.project1,
+                                                               activity_editor=True)
+        cls.janedoe_contrib = ProjectContributor.objects.create(user=cls.janedoe_user, project=cls.project1,
+                                                                activity_editor=True)
+        cls.janedoe_contrib2 = ProjectContributor.objects.create(user=cls.janedoe_user, project=cls.project2,
+                                                                 activity_editor=True)
+
+        cls.batman_entry = cls.create_entry(cls.batman_contrib, 'Engine rebuild', 'replaced the turbine engine')
+        cls.janedoe_entry = cls.create_entry(cls.janedoe_contrib, 'Armor polish', 'engine bay cleanup')
+        cls.newsroom_entry = cls.create_entry(cls.janedoe_contrib2, 'Press engine oiling', 'printing press')
+
+    @classmethod
+    def create_entry(cls, contributor, name, description):
+        start = timezone.make_aware(datetime(2020, 8, 3, 9))
+        return ActivityEntry.objects.create(name=name,
+                                            description=description,
+                                            contributor=contributor,
+                                            project=contributor.project,
+                                            start=start,
+                                            end=start + timedelta(hours=1),
+                                            minutes=60)
+
+    def get(self, creds, **params):
+        client = APIClient()
+        authenticate_jwt(creds, client)
+        return client.get(reverse(self.view_name), params, format='json')
+
+    def names(self, response):
+        return [row['name'] for row in response.data['results']]
+
+    def test_match_expression_quotes_words_and_prefixes_the_last(self):
+        '''Tests user input is turned into quoted FTS5 terms so it cannot inject query syntax'''
+        self.assertEqual('"engine" "reb"*', fts_match_expression('engine  reb'))
+        self.assertEqual('"NEAR" "x"*', fts_match_expression('NEAR(x"'))
+        self.assertIsNone(fts_match_expression(' -*" '))
+
+    def test_search_entries_applies_entry_visibility(self):
+        '''Tests project admins see every matching entry, activity editors only their own'''
+        response = self.get(johndoe_creds, q='engine')
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual({'Engine rebuild', 'Armor polish'}, set(self.names(response)))
+
+        response = self.get(batman_creds, q='engine')
+        self.assertEqual(['Engine rebuild'], self.names(response))
+
+        response = self.get(janedoe_creds, q='engine')
+        self.assertEqual({'Armor polish', 'Press engine oiling'}, set(self.names(response)))
+
+    def test_search_entries_ranks_and_matches_prefixes(self):
+        '''Tests every word has to match, the last word as a prefix, best matches first'''
+        response = self.get(johndoe_creds, q='engin')
+        self.assertEqual(2, response.data['count'])
+        # "engine" appears in both the name and description of the first entry
+        self.assertEqual('Engine rebuild', self.names(response)[0])
+
+        response = self.get(johndoe_creds, q='engine reb')
+        self.assertEqual(['Engine rebuild'], self.names(response))
+
+        response = self.get(johndoe_creds, q='ENGINE Turbine')
+        self.assertEqual(['Engine rebuild'], self.names(response))
+
+    def test_search_index_follows_updates_deletes_and_bulk_creates(self):
+        '''Tests the triggers keep the index in sync without going through model signals'''
+        ActivityEntry.objects.filter(pk=self.batman_entry.pk).update(name='Wheel alignment')
+        self.assertEqual(['Wheel alignment'], self.names(self.get(johndoe_creds, q='wheel')))
+
+        self.janedoe_entry.delete()
+        self.assertEqual(['Wheel alignment'], self.names(self.get(johndoe_creds, q='engine')))
+
+        ActivityEntry.objects.bulk_create([
+            ActivityEntry(name='Bulk wheel {}'.format(i), description='', slug='bulk-wheel-{}'.format(i),
+                          contributor=self.batman_contrib, project=self.project1, organization=self.org1,
+                          user=self.batman_user, start=self.batman_entry.start, end=self.batman_entry.end,
+                          minutes=60)
+            for i in range(3)
+        ])
+        self.assertEqual(4, self.get(johndoe_creds, q='wheel').data['count'])
+
+    def test_search_projects_and_organizations(self):
+        '''Tests ?type= searches the projects and organizations the user may see'''
+        response = self.get(batman_creds, q='batmobile', type='projects')
+        self.assertEqual(['Batmobile Tuning'], self.names(response))
+        self.assertTrue(response.data['results'][0]['activity_editor'])
+
+        response = self.get(batman_creds, q='printing', type='projects')
+        self.assertEqual([], self.names(response))
+
+        response = self.get(johndoe_creds, q='wayne', type='organizations')
+        self.assertEqual(['Wayne Enterprises'], self.names(response))
+
+        response = self.get(johndoe_creds, q='planet', type='organizations')
+        self.assertEqual([], self.names(response))
+
+    def test_search_paginates(self):
+        '''Tests results are paginated with ?page_size='''
+        response = self.get(janedoe_creds, q='engine', page_size=1)
+        self.assertEqual(2, response.data['count'])
+        self.assertEqual(1, len(response.data['results']))
+        self.assertIsNotNone(response.data['next'])
+
+    def test_search_invalid_params_fails(self):
+        '''Tests a missing ?q= or unknown ?type= is rejected'''
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, self.get(johndoe_creds).status_code)
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, self.get(johndoe_creds, q='engine', type='users').status_code)
+
+    def test_search_unauthenticated_fails(self):
+        '''Tests anonymous requests are rejected'''
+        response = APIClient().get(reverse(self.view_name), {'q': 'engine'})
+        self.assertEqual(status.HTTP_403_FORBIDDEN, response.status_code)
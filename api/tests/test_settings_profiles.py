@@ -0,0 +1,114 @@
+import gc
+import importlib
+import os
+import tracemalloc
+from io import BytesIO
+from unittest import mock
+from wsgiref.util import setup_testing_defaults
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connection
+from django.shortcuts import reverse
+from django.test import TestCase, SimpleTestCase, override_settings
+
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.tests.testing_utils import (
+    johndoe_creds,
+    create_organization,
+    create_project,
+)
+
+
+class ProductionSettingsTests(SimpleTestCase):
+
+    def import_production(self, **environ):
+        with mock.patch.dict(os.environ, environ):
+            module = importlib.import_module('timetracker_backend.settings.production')
+            return importlib.reload(module)
+
+    def test_production_profile_disables_debug_features(self):
+        '''Tests the production profile drops DEBUG, django_extensions and the browsable API'''
+        production = self.import_production(CACHE_LOCATION='127.0.0.1:11211')
+
+        self.assertFalse(production.DEBUG)
+        self.assertNotIn('django_extensions', production.INSTALLED_APPS)
+        self.assertEqual(('rest_framework.renderers.JSONRenderer',),
+                         production.REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'])
+
+    def test_production_profile_requires_a_shared_cache(self):
+        '''Tests the production profile refuses per process default caches'''
+        production = self.import_production(CACHE_LOCATION='10.0.0.1:11211 10.0.0.2:11211')
+        self.assertEqual(['10.0.0.1:11211', '10.0.0.2:11211'], production.CACHES['default']['LOCATION'])
+        self.assertEqual('django.core.cache.backends.locmem.LocMemCache', production.CACHES['local']['BACKEND'])
+        self.assertEqual('default', production.AUTH_USER_CACHE_ALIAS)
+        self.assertEqual('default', production.OBJECT_CACHE_SHARED_ALIAS)
+
+        with self.assertRaises(ImproperlyConfigured):
+            self.import_production(CACHE_LOCATION='default',
+                                   CACHE_BACKEND='django.core.cache.backends.locmem.LocMemCache')
+
+    def test_development_profile_keeps_debug_features(self):
+        '''Tests the development profile still has DEBUG and django_extensions'''
+        development = importlib.import_module('timetracker_backend.settings.development')
+
+        self.assertTrue(development.DEBUG)
+        self.assertIn('django_extensions', development.INSTALLED_APPS)
+
+
+class WorkerMemoryTests(TestCase):
+    request_count = 2000
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.johndoe_user = johndoe_creds.create_user(is_active=True)
+        org = create_organization('Org 1', cls.johndoe_user)
+        create_project('Org 1 Project 1', 'abc', cls.johndoe_user, org)
+
+    def get(self, handler, path, token):
+        # the handler is driven directly like a wsgi server would, the test
+        # client itself leaks a signal receiver per request
+        environ = {
+            'REQUEST_METHOD': 'GET',
+            'PATH_INFO': path,
+            'HTTP_HOST': 'testserver',
+            'HTTP_AUTHORIZATION': 'Bearer {}'.format(token),
+            'HTTP_ACCEPT': 'application/json',
+            'wsgi.input': BytesIO(),
+        }
+        setup_testing_defaults(environ)
+        statuses = []
+        response = handler(environ, lambda status, headers: statuses.append(status))
+        b''.join(response)
+        response.close()
+        return statuses[0]
+
+    @override_settings(DEBUG=False)
+    def test_memory_stays_flat_across_requests_without_debug(self):
+        '''Tests no queries are retained and memory does not grow over thousands of requests'''
+        handler = WSGIHandler()
+        token = str(AccessToken.for_user(self.johndoe_user))
+        url = reverse('projects-list')
+        connection.queries_log.clear()
+
+        # warm up caches (url resolver, serializer fields, ...) before measuring
+        for _ in range(100):
+            self.assertEqual('200 OK', self.get(handler, url, token))
+
+        tracemalloc.start()
+        try:
+            # collect reference cycles so only memory that is actually retained is measured
+            gc.collect()
+            baseline, _ = tracemalloc.get_traced_memory()
+            for _ in range(self.request_count):
+                self.get(handler, url, token)
+            gc.collect()
+            current, _ = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        # with DEBUG on the queries of the last request would still be retained here,
+        # and code running outside a request such as exports keeps every query
+        self.assertEqual(0, len(connection.queries_log))
+        self.assertLess(current - baseline, 256 * 1024)
@@ -0,0 +1,110 @@
+import json
+from unittest import mock
+
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.shortcuts import reverse
+from django.test import TestCase, SimpleTestCase, override_settings
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from api.tests.testing_utils import (
+    authenticate_jwt,
+    johndoe_creds,
+    create_organization,
+    create_project,
+)
+from core.slow_queries import RateLimiter, install_slow_query_logger, normalize_sql, slow_query_logger
+
+
+class NormalizeSqlTests(SimpleTestCase):
+
+    def test_normalize_sql_groups_literals_and_in_lists(self):
+        '''Tests statements differing only by literals normalize the same'''
+        self.assertEqual(
+            'SELECT "a" FROM "t" WHERE "t"."id" IN (...) AND "t"."slug" = ? LIMIT ?',
+            normalize_sql('SELECT "a"  FROM "t"\nWHERE "t"."id" IN (%s, %s, %s) AND "t"."slug" = \'abc\' LIMIT 21')
+        )
+
+    def test_rate_limiter_limits_per_key_and_globally(self):
+        '''Tests a key is allowed once per interval and the total per interval is capped'''
+        limiter = RateLimiter(interval=60, max_events=2)
+        self.assertTrue(limiter.allow('a', now=100))
+        self.assertFalse(limiter.allow('a', now=101))
+        self.assertTrue(limiter.allow('b', now=102))
+        self.assertFalse(limiter.allow('c', now=103))
+        self.assertTrue(limiter.allow('a', now=161))
+
+
+class SlowQueryLogTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.johndoe_user = johndoe_creds.create_user(is_active=True)
+        org = create_organization('Org 1', cls.johndoe_user)
+        create_project('Org 1 Project 1', 'abc', cls.johndoe_user, org)
+
+    def setUp(self):
+        slow_query_logger.rate_limiter.reset()
+        self.addCleanup(slow_query_logger.rate_limiter.reset)
+
+    def test_reconnects_during_requests_keep_execute_wrappers_balanced(self):
+        '''Tests connections reopened while middleware wrap queries do not leak wrappers'''
+        client = APIClient()
+        authenticate_jwt(johndoe_creds, client)
+        ensure_connection = connection.ensure_connection
+        # as in a fresh worker whose connection has not been opened yet
+        connection.execute_wrappers.remove(slow_query_logger)
+        self.addCleanup(install_slow_query_logger, sender=connection.__class__, connection=connection)
+
+        def reconnect():
+            # close() is ignored for the in memory test database, announce a new
+            # connection before every query instead as with CONN_MAX_AGE = 0
+            ensure_connection()
+            connection_created.send(sender=connection.__class__, connection=connection)
+
+        sizes = []
+        with mock.patch.object(connection, 'ensure_connection', reconnect):
+            for _ in range(3):
+                response = client.get(reverse('projects-list'), format='json')
+                self.assertEqual(status.HTTP_200_OK, response.status_code)
+                sizes.append(len(connection.execute_wrappers))
+        self.assertEqual([sizes[0]] * 3, sizes)
+        self.assertIn(slow_query_logger, connection.execute_wrappers)
+
+    def test_slow_query_disabled_logs_nothing(self):
+        '''Tests nothing is logged with the default threshold of 0'''
+        client = APIClient()
+        authenticate_jwt(johndoe_creds, client)
+        with self.assertRaises(AssertionError):
+            with self.assertLogs('timetracker.slow_queries'):
+                client.get(reverse('projects-list'), format='json')
+
+    def test_slow_query_logged_with_route_and_explain(self):
+        '''Tests queries over the threshold are logged with view, route and query plan'''
+        client = APIClient()
+        authenticate_jwt(johndoe_creds, client)
+
+        with override_settings(SLOW_QUERY_THRESHOLD_MS=0.000001), \
+                self.assertLogs('timetracker.slow_queries', level='WARNING') as logs:
+            response = client.get(reverse('projects-list'), format='json')
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+
+        records = [json.loads(output.split(':', 2)[2]) for output in logs.output]
+        project_records = [r for r in records if 'FROM "core_projectcontributor"' in r['sql']]
+        self.assertEqual(1, len(project_records))
+
+        record = project_records[0]
+        self.assertEqual('projects-list', record['route'])
+        self.assertEqual('api.views.ProjectListAPIView', record['view'])
+        self.assertIn('?', record['normalized_sql'])
+        self.assertEqual([str(self.johndoe_user.id)], record['params'][:1])
+        self.assertTrue(record['explain'])
+
+        # identical statements are rate limited
+        with override_settings(SLOW_QUERY_THRESHOLD_MS=0.000001), \
+                self.assertLogs('timetracker.slow_queries', level='WARNING') as logs:
+            slow_query_logger.log('SELECT 1', (), False, connection, 1.0)
+            client.get(reverse('projects-list'), format='json')
+        self.assertFalse(any('core_projectcontributor' in output for output in logs.output))
@@ -0,0 +1,120 @@
+from datetime import date, datetime, timedelta
+
+from django.shortcuts import reverse
+from django.test import TestCase
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from api.tests.testing_utils import (
+    CredsHelper,
+    authenticate_jwt,
+    admin_creds,
+    johndoe_creds,
+    janedoe_creds,
+    batman_creds,
+    robin_creds,
+    create_organization,
+    create_project,
+)
+from api.timesheets import build_timesheet
+from core.models import ActivityEntry, ProjectContributor
+
+
+class OrganizationTimesheetTests(TestCase):
+    timesheet_view_name = 'organization-timesheet'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = admin_creds.create_user(is_active=True, is_staff=True)
+        cls.johndoe_user = johndoe_creds.create_user(is_active=True)
+        cls.janedoe_user = janedoe_creds.create_user(is_active=True)
+        cls.batman_user = batman_creds.create_user(is_active=True)
+        cls.robin_user = robin_creds.create_user(is_active=True)
+
+        cls.org = create_organization('Org 1', cls.johndoe_user)
+        cls.project1 = create_project('Org 1 Project 1', 'abc', cls.johndoe_user, cls.org)
+        cls.project2 = create_project('Org 1 Project 2', 'abc', cls.johndoe_user, cls.org)
+
+        batman_contrib1 = ProjectContributor.objects.create(user=cls.batman_user, project=cls.project1, activity_editor=True)
+        batman_contrib2 = ProjectContributor.objects.create(user=cls.batman_user, project=cls.project2, activity_editor=True)
+        janedoe_contrib = ProjectContributor.objects.create(user=cls.janedoe_user, project=cls.project1, activity_editor=True)
+        ProjectContributor.objects.create(user=cls.robin_user, project=cls.project1, activity_viewer=True)
+
+        # monday 2020-08-03
+        monday = timezone.make_aware(datetime(2020, 8, 3, 9))
+        for contributor, days, minutes in ((batman_contrib1, 0, 60),
+                                           (batman_contrib1, 0, 30),
+                                           (batman_contrib2, 2, 45),
+                                           (janedoe_contrib, 6, 120),
+                                           (janedoe_contrib, 7, 15)):
+            start = monday + timedelta(days=days)
+            ActivityEntry.objects.create(name='Entry', description='abc', contributor=contributor,
+                                         project=contributor.project, start=start,
+                                         end=start + timedelta(minutes=minutes), minutes=minutes)
+
+    def get(self, creds, **params):
+        client = APIClient()
+        authenticate_jwt(creds, client)
+        url = reverse(self.timesheet_view_name, kwargs={'org_slug': self.org.slug})
+        return client.get(url, params, format='json')
+
+    def rows(self, response):
+        return {(row['user'], row['project']): row['minutes'] for row in response.data['rows']}
+
+    def test_week_timesheet_by_admin_succeeds(self):
+        '''Tests an admin gets every user and project bucketed per day with totals'''
+        response = self.get(admin_creds, date='2020-08-05')
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+
+        data = response.data
+        self.assertEqual(date(2020, 8, 3), data['start'])
+        self.assertEqual(date(2020, 8, 9), data['end'])
+        self.assertEqual({
+            (self.batman_user.id, self.project1.id): [90, 0, 0, 0, 0, 0, 0],
+            (self.batman_user.id, self.project2.id): [0, 0, 45, 0, 0, 0, 0],
+            (self.janedoe_user.id, self.project1.id): [0, 0, 0, 0, 0, 0, 120],
+        }, self.rows(response))
+        self.assertEqual([90, 0, 45, 0, 0, 0, 120], data['day_totals'])
+        self.assertEqual(255, data['total'])
+        self.assertEqual([45, 90, 120], sorted(row['total'] for row in data['rows']))
+
+    def test_month_timesheet_succeeds(self):
+        '''Tests the month period covers every day of the month'''
+        response = self.get(admin_creds, period='month', date='2020-08-20')
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(31, len(response.data['days']))
+        self.assertEqual(270, response.data['total'])
+
+    def test_timesheet_follows_activity_entry_viewer_rules(self):
+        '''Tests editors only see their own entries while viewers see their project's entries'''
+        response = self.get(batman_creds, date='2020-08-03')
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual({(self.batman_user.id, self.project1.id), (self.batman_user.id, self.project2.id)},
+                         set(self.rows(response)))
+
+        response = self.get(robin_creds, date='2020-08-03')
+        self.assertEqual({(self.batman_user.id, self.project1.id), (self.janedoe_user.id, self.project1.id)},
+                         set(self.rows(response)))
+
+        response = self.get(robin_creds, date='2020-08-03', user=self.janedoe_user.id)
+        self.assertEqual({(self.janedoe_user.id, self.project1.id)}, set(self.rows(response)))
+
+    def test_timesheet_by_non_member_fails(self):
+        '''Tests users without access to the organization cannot view its timesheet'''
+        outsider_creds = CredsHelper('outsider@mail.com', 'password1')
+        outsider_creds.create_user(is_active=True)
+        response = self.get(outsider_creds)
+        self.assertEqual(status.HTTP_403_FORBIDDEN, response.status_code)
+
+    def test_timesheet_invalid_parameters_fail(self):
+        '''Tests unknown periods and malformed dates are rejected'''
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, self.get(admin_creds, period='year').status_code)
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, self.get(admin_creds, date='08/03/2020').status_code)
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, self.get(admin_creds, date='2020-02-30').status_code)
+
+    def test_timesheet_is_one_aggregation_query(self):
+        '''Tests the grid is computed by a single query'''
+        with self.assertNumQueries(1):
+            build_timesheet(ActivityEntry.objects.filter(organization=self.org), 'week', date(2020, 8, 3))
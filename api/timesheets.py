@@ -0,0 +1,58 @@
+import calendar
+from datetime import datetime, timedelta
+
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+
+PERIODS = ('week', 'month')
+
+
+def period_days(period, day):
+    '''Days of the ISO week (Monday first) or calendar month containing day'''
+    if period == 'week':
+        first = day - timedelta(days=day.weekday())
+        length = 7
+    else:
+        first = day.replace(day=1)
+        length = calendar.monthrange(day.year, day.month)[1]
+    return [first + timedelta(days=i) for i in range(length)]
+
+
+def build_timesheet(entries, period, day):
+    '''user x project rows of per day minutes with row, column and grand totals,
+    aggregated by the database in a single GROUP BY query'''
+    days = period_days(period, day)
+    tz = timezone.get_current_timezone()
+    start = timezone.make_aware(datetime.combine(days[0], datetime.min.time()), tz)
+    end = timezone.make_aware(datetime.combine(days[-1] + timedelta(days=1), datetime.min.time()), tz)
+
+    buckets = (entries.filter(start__gte=start, start__lt=end)
+                      .annotate(day=TruncDate('start', tzinfo=tz))
+                      .order_by()
+                      .values('user_id', 'project_id', 'day')
+                      .annotate(minutes=Sum('minutes'), entries=Count('id')))
+
+    index = {d: i for i, d in enumerate(days)}
+    rows = {}
+    day_totals = [0] * len(days)
+    for bucket in buckets:
+        key = (bucket['user_id'], bucket['project_id'])
+        row = rows.setdefault(key, {'user': key[0], 'project': key[1], 'minutes': [0] * len(days),
+                                    'entries': 0, 'total': 0})
+        i = index[bucket['day']]
+        row['minutes'][i] += bucket['minutes']
+        row['entries'] += bucket['entries']
+        row['total'] += bucket['minutes']
+        day_totals[i] += bucket['minutes']
+
+    return {
+        'period': period,
+        'start': days[0],
+        'end': days[-1],
+        'days': days,
+        'rows': sorted(rows.values(), key=lambda row: (row['user'] or 0, row['project'])),
+        'day_totals': day_totals,
+        'total': sum(day_totals),
+    }
@@ -5,6 +5,7 @@ from api.views import (
     OrganizationDetailAPIView,
     OrganizationMemberListCreateAPIView,
     OrganizationMemberDestroyAPIView,
+    OrganizationMemberAutocompleteAPIView,
     ProjectListAPIView,
     OrgProjectListCreateAPIView,
     OrgProjectDetailAPIView,
@@ -12,6 +13,11 @@ from api.views import (
     ProjectContributorDetailAPIView,
     ActivityEntryListCreateAPIView,
     ActivityEntryDetailAPIVIew,
+    MyActivityEntryListAPIView,
+    OrganizationTimesheetAPIView,
+    BatchAPIView,
+    BootstrapAPIView,
+    SearchAPIView,
 )
 
 urlpatterns = [
@@ -27,6 +33,10 @@ urlpatterns = [
          OrganizationMemberListCreateAPIView.as_view(),
          name='organization-member-list-create'),
 
+    path('v1/organizations/<slug:org_slug>/members/autocomplete/',
+         OrganizationMemberAutocompleteAPIView.as_view(),
+         name='organization-member-autocomplete'),
+
     path('v1/organizations/<slug:org_slug>/members/<int:pk>/',
         OrganizationMemberDestroyAPIView.as_view(),
         name='organization-member-delete'),
@@ -57,5 +67,25 @@ urlpatterns = [
     
     path('v1/organizations/<slug:org_slug>/projects/<slug:project_slug>/activity-entries/<slug:activity_slug>/',
          ActivityEntryDetailAPIVIew.as_view(),
-         name='activity-entry-detail')
+         name='activity-entry-detail'),
+
+    path('v1/organizations/<slug:org_slug>/timesheet/',
+         OrganizationTimesheetAPIView.as_view(),
+         name='organization-timesheet'),
+
+    path('v1/me/activity-entries/',
+         MyActivityEntryListAPIView.as_view(),
+         name='my-activity-entry-list'),
+
+    path('v1/me/bootstrap/',
+         BootstrapAPIView.as_view(),
+         name='bootstrap'),
+
+    path('v1/search/',
+         SearchAPIView.as_view(),
+         name='search'),
+
+    path('v1/batch/',
+         BatchAPIView.as_view(),
+         name='batch'),
 ]
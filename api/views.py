@@ -1,12 +1,20 @@
+import hashlib
+import json
+from datetime import datetime, time
+
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db.models import Q
 from django.http import Http404
 from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import Q
 from django.shortcuts import render, get_object_or_404
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.utils.dateparse import parse_date, parse_datetime
 
 from rest_framework import status
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAuthenticated, SAFE_METHODS
 from rest_framework.response import Response
 
 from rest_framework.generics import (
@@ -18,14 +26,35 @@ from rest_framework.generics import (
     RetrieveUpdateDestroyAPIView,
 )
 from rest_framework.permissions import IsAdminUser
-
+from rest_framework.renderers import JSONRenderer
+from rest_framework.views import APIView
+
+from core.access import get_project_access
+from core.middleware import is_token_api_request
+from core.object_cache import is_shared
+from core.profiling import profile_phase
+from core.search import search
+from core.slug_cache import (
+    get_organization_id_or_404,
+    get_organization_or_404,
+    get_project_id_or_404,
+    get_project_or_404,
+    resolve_organization_id,
+)
+from core.utils import normalize_lookup_text, normalize_ulid, prefix_range
 from core.models import (
     Organization,
     Project,
     ProjectContributor,
-    ActivityEntry
+    ActivityEntry,
+    UserAccess,
 )
 
+from .authentication import CachedJWTAuthentication
+from .batch import execute_batch, validate_batch
+from .coalescing import coalesce
+from .pagination import ActivityEntryPagination, SearchPagination
+from .timesheets import PERIODS, build_timesheet
 from .permissions import (
     OrganizationPermission,
     ProjectListPermission,
@@ -33,6 +62,12 @@ from .permissions import (
     OrganizationProjectPermission,
     ProjectContributorPermission,
     ActivityEntryPermission,
+    TimesheetPermission,
+    organization_capabilities,
+    project_capabilities,
+    visible_activity_entries,
+    visible_organizations,
+    visible_projects,
 )
 from .serializers import (
     UserSerializer,
@@ -42,39 +77,141 @@ from .serializers import (
     ProjectContributorSerializer,
     ProjectContributorCreateUpdateSerializer,
     ActivityEntrySerializer,
+    OrganizationSummarySerializer,
+    ProjectSummarySerializer,
+    UserSummarySerializer,
 )
 
 
-class OrganizationListCreateAPIView(ListCreateAPIView):
+class APIViewMixin:
+    '''Behaviour shared by every api view
+
+    - token authenticated requests (see core.middleware.is_token_api_request) only try
+      JWT authentication and only render JSON
+    - records authentication, permission and view phases for
+      core.profiling.ProfilingMiddleware, a no-op when profiling is disabled
+    '''
+    token_authentication_classes = (CachedJWTAuthentication,)
+    token_renderer_classes = (JSONRenderer,)
+
+    def initialize_request(self, request, *args, **kwargs):
+        self.token_api_request = is_token_api_request(request)
+        return super().initialize_request(request, *args, **kwargs)
+
+    def get_authenticators(self):
+        if getattr(self, 'token_api_request', False):
+            return [auth() for auth in self.token_authentication_classes]
+        return super().get_authenticators()
+
+    def get_renderers(self):
+        if getattr(self, 'token_api_request', False):
+            return [renderer() for renderer in self.token_renderer_classes]
+        return super().get_renderers()
+
+    def dispatch(self, request, *args, **kwargs):
+        with profile_phase('view'):
+            return super().dispatch(request, *args, **kwargs)
+
+    def perform_authentication(self, request):
+        with profile_phase('auth'):
+            super().perform_authentication(request)
+
+    def check_permissions(self, request):
+        with profile_phase('perm'):
+            super().check_permissions(request)
+
+    def check_object_permissions(self, request, obj):
+        with profile_phase('perm'):
+            super().check_object_permissions(request, obj)
+
+
+class IncludeViewMixin:
+    '''?include=a,b inlines related objects of the names in include_relations (name ->
+    select_related path) for GET requests. The list queryset joins them in so they cost
+    no extra query per row, the serializer nests them (see IncludeSerializerMixin).'''
+    include_relations = {}
+
+    def get_includes(self):
+        if self.request.method not in SAFE_METHODS:
+            return ()
+
+        names = [name for name in self.request.query_params.get('include', '').split(',') if name]
+        unknown = [name for name in names if name not in self.include_relations]
+        if unknown:
+            raise ValidationError({'include': 'Unknown include {}, expected any of {}'.format(
+                ', '.join(unknown), ', '.join(sorted(self.include_relations))
+            )})
+        return tuple(names)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['include'] = self.get_includes()
+        return context
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        includes = self.get_includes()
+        if includes:
+            queryset = queryset.select_related(*[self.include_relations[name] for name in includes])
+        return queryset
+
+
+class CoalescedListMixin:
+    '''Concurrent GET list requests for the same url whose get_coalescing_key() is equal
+    share one queryset evaluation and serialization (see api/coalescing.py). Requests
+    still authenticate and check permissions on their own. The default key is the user,
+    views whose results only depend on coarser visibility override it.'''
+
+    def get_coalescing_key(self):
+        return ('user', self.request.user.id)
+
+    def list(self, request, *args, **kwargs):
+        # absolute, the pagination links of the shared data carry the scheme and host
+        key = (type(self).__name__, request.build_absolute_uri(), self.get_coalescing_key())
+        data = coalesce(key, lambda: super(CoalescedListMixin, self).list(request, *args, **kwargs).data)
+        return Response(data)
+
+
+PROJECT_INCLUDES = {'organization': 'organization', 'creator': 'creator'}
+PROJECT_CONTRIBUTOR_INCLUDES = {'user': 'user', 'project': 'project'}
+ACTIVITY_ENTRY_INCLUDES = {'user': 'user', 'project': 'project', 'contributor': 'contributor'}
+
+
+class OrganizationListCreateAPIView(APIViewMixin, ListCreateAPIView):
     serializer_class = OrganizationSerializer
     permission_classes = (IsAuthenticated, OrganizationPermission,)
 
     def get_queryset(self):
-        qs = Organization.objects.all()
-        if self.request.user.is_staff:
-            return qs
-        
-        return qs.filter(contact=self.request.user)
+        return visible_organizations(self.request.user)
+
+
+def current_row_queryset(request, queryset):
+    '''None to read the row of a detail view from core.object_cache, or queryset when the
+    row gets written or the cache is not shared by every worker so that permissions and
+    updates never act on a stale row'''
+    if request.method in SAFE_METHODS and is_shared():
+        return None
+    return queryset
 
 
-class OrganizationDetailAPIView(RetrieveUpdateDestroyAPIView):
+class OrganizationDetailAPIView(APIViewMixin, RetrieveUpdateDestroyAPIView):
     serializer_class = OrganizationSerializer
     permission_classes = (IsAuthenticated, OrganizationPermission,)
 
     def get_object(self):
-        org_slug = self.kwargs.get('org_slug')
-        obj = get_object_or_404(Organization, slug=org_slug)
+        queryset = current_row_queryset(self.request, Organization.objects.all())
+        obj = get_organization_or_404(self.kwargs.get('org_slug'), queryset)
         self.check_object_permissions(self.request, obj)
         return obj
 
 
-class OrganizationMemberDestroyAPIView(DestroyAPIView):
+class OrganizationMemberDestroyAPIView(APIViewMixin, DestroyAPIView):
     permission_classes = (IsAuthenticated, OrganizationMemberPermission,)
 
     def get_object(self):
-        org = get_object_or_404(Organization, slug=self.kwargs['org_slug'])
+        org_id = get_organization_id_or_404(self.kwargs['org_slug'])
         try:
-            member = org.members.get(pk=self.kwargs['pk'])
+            member = get_user_model().objects.get(organization=org_id, pk=self.kwargs['pk'])
         except ObjectDoesNotExist:
             raise Http404('Entity not found')
 
@@ -83,7 +220,7 @@ class OrganizationMemberDestroyAPIView(DestroyAPIView):
 
     def delete(self, request, *args, **kwargs):
         member = self.get_object()
-        org = get_object_or_404(Organization, slug=self.kwargs['org_slug'])
+        org = get_organization_or_404(self.kwargs['org_slug'])
         org.members.remove(member)
 
         ProjectContributor.objects.filter(user=member,
@@ -92,76 +229,116 @@ class OrganizationMemberDestroyAPIView(DestroyAPIView):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class OrganizationMemberListCreateAPIView(ListCreateAPIView):
+class OrganizationMemberListCreateAPIView(APIViewMixin, ListCreateAPIView):
     serializer_class = UserSerializer
     permission_classes = (IsAuthenticated, OrganizationMemberPermission,)
 
     def get_queryset(self):
-        organization = get_object_or_404(Organization, slug=self.kwargs['org_slug'])
-        return organization.members.all()
+        org_id = get_organization_id_or_404(self.kwargs['org_slug'])
+        return get_user_model().objects.filter(organization=org_id)
 
     def post(self, request, *args, **kwargs):
         user_id = request.data.get('user_id')
-        org = get_object_or_404(Organization, slug=self.kwargs['org_slug'])
+        org = get_organization_or_404(self.kwargs['org_slug'])
         org.members.add(get_object_or_404(get_user_model(), pk=user_id))
         serializer = OrganizationSerializer(org)
         data = serializer.data
         return Response(data=data, status=status.HTTP_201_CREATED)
 
 
-class ProjectListAPIView(ListAPIView):
+class OrganizationMemberAutocompleteAPIView(APIViewMixin, APIView):
+    '''Members of an organization whose email or name starts with ?q= (case insensitive),
+    at most ?limit= of them. Prefixes are range scans of the User email_lookup /
+    name_lookup indexes. Responses carry an ETag and a short private max-age so
+    clients can debounce keystrokes against their cache.'''
+    permission_classes = (IsAuthenticated, OrganizationMemberPermission,)
+    default_limit = 10
+    max_limit = 25
+    max_age = 30
+
+    def get_limit(self):
+        limit = self.request.query_params.get('limit', '')
+        if not limit:
+            return self.default_limit
+        if not limit.isdigit() or int(limit) < 1:
+            raise ValidationError({'limit': 'Expected a positive number'})
+        return min(int(limit), self.max_limit)
+
+    def get(self, request, *args, **kwargs):
+        prefix = normalize_lookup_text(request.query_params.get('q'))
+        if not prefix:
+            raise ValidationError({'q': 'This query parameter is required'})
+        limit = self.get_limit()
+
+        org_id = get_organization_id_or_404(self.kwargs['org_slug'])
+        users = (get_user_model().objects
+                    .filter(Q(**prefix_range('email_lookup', prefix)) | Q(**prefix_range('name_lookup', prefix)),
+                            organization=org_id)
+                    .order_by('name_lookup', 'email_lookup')[:limit])
+        data = {'results': UserSummarySerializer(users, many=True).data}
+
+        etag = '"{}"'.format(hashlib.md5(json.dumps(data, sort_keys=True).encode()).hexdigest())
+        if etag in request.META.get('HTTP_IF_NONE_MATCH', ''):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response(data)
+        response['ETag'] = etag
+        patch_cache_control(response, private=True, max_age=self.max_age)
+        return response
+
+
+class ProjectListAPIView(IncludeViewMixin, APIViewMixin, ListAPIView):
     serializer_class = ProjectsListSerializer
     permission_classes = (IsAuthenticated, ProjectListPermission, )
+    include_relations = PROJECT_INCLUDES
 
     def get_queryset(self):
-        if self.request.user.is_staff:
-            return Project.objects.all()
-
-        qs = (ProjectContributor.objects
-                .select_related('project')
-                .filter(user=self.request.user)
-                .filter(Q(project_admin=True) | Q(activity_viewer=True) | Q(activity_editor=True))
-                .all())
-        projects = [q.project for q in qs]
-        return projects
+        return visible_projects(self.request.user).with_roles_for(self.request.user).order_by('id')
 
 
-class OrgProjectListCreateAPIView(ListCreateAPIView):
+class OrgProjectListCreateAPIView(CoalescedListMixin, IncludeViewMixin, APIViewMixin, ListCreateAPIView):
     serializer_class = OrganizationProjectSerializer
     permission_classes = (IsAuthenticated, OrganizationProjectPermission,)
+    include_relations = PROJECT_INCLUDES
 
     def get_queryset(self):
-        org_slug = self.kwargs['org_slug']
+        org_id = resolve_organization_id(self.kwargs['org_slug'])
+        if org_id is None:
+            return Project.objects.none()
+
+        qs = (Project.objects
+                .filter(organization_id=org_id)
+                .with_roles_for(self.request.user)
+                .order_by('id'))
         if self.request.user.is_staff:
-            return Project.objects.filter(organization__slug=org_slug).all()
+            return qs
 
-        qs = (ProjectContributor.objects
-                    .filter(user=self.request.user)
-                    .filter(Q(project_admin=True) | Q(activity_viewer=True) | Q(activity_editor=True))
-                    .select_related('project').all())
-        return [q.project for q in qs]
+        return qs.contributed_to_by(self.request.user)
 
 
-class OrgProjectDetailAPIView(RetrieveUpdateDestroyAPIView):
+class OrgProjectDetailAPIView(IncludeViewMixin, APIViewMixin, RetrieveUpdateDestroyAPIView):
     serializer_class = OrganizationProjectSerializer
     permission_classes = (IsAuthenticated, OrganizationProjectPermission,)
+    include_relations = PROJECT_INCLUDES
     
     def get_object(self):
-        project = get_object_or_404(Project,
-            organization__slug=self.kwargs['org_slug'],
-            slug=self.kwargs['project_slug'])
+        queryset = self.filter_queryset(Project.objects.all())
+        if not self.get_includes():
+            queryset = current_row_queryset(self.request, queryset)
+        project = get_project_or_404(self.kwargs['org_slug'], self.kwargs['project_slug'], queryset)
 
         self.check_object_permissions(self.request, project)
         return project
 
 
-class ProjectContributorListCreateAPIView(ListCreateAPIView):
+class ProjectContributorListCreateAPIView(IncludeViewMixin, APIViewMixin, ListCreateAPIView):
     serializer_class = ProjectContributorSerializer
     permission_classes = (IsAuthenticated, ProjectContributorPermission,)
+    include_relations = PROJECT_CONTRIBUTOR_INCLUDES
 
     def get_queryset(self):
-        project = get_object_or_404(Project, organization__slug=self.kwargs['org_slug'], slug=self.kwargs['project_slug'])
-        return ProjectContributor.objects.filter(project=project).all()
+        project_id = get_project_id_or_404(self.kwargs['org_slug'], self.kwargs['project_slug'])
+        return ProjectContributor.objects.filter(project_id=project_id)
 
     def post(self, request, *args, **kwargs):
         context = self.get_serializer_context()
@@ -174,16 +351,15 @@ class ProjectContributorListCreateAPIView(ListCreateAPIView):
         return Response(data=serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class ProjectContributorDetailAPIView(RetrieveUpdateDestroyAPIView):
+class ProjectContributorDetailAPIView(IncludeViewMixin, APIViewMixin, RetrieveUpdateDestroyAPIView):
     serializer_class = ProjectContributorSerializer
     permission_classes = (IsAuthenticated, ProjectContributorPermission,)
+    include_relations = PROJECT_CONTRIBUTOR_INCLUDES
 
     def get_object(self):
-        project = get_object_or_404(Project,
-                                    slug=self.kwargs['project_slug'],
-                                    organization__slug=self.kwargs['org_slug'])
-        obj = get_object_or_404(ProjectContributor,
-                                project=project,
+        project_id = get_project_id_or_404(self.kwargs['org_slug'], self.kwargs['project_slug'])
+        obj = get_object_or_404(self.filter_queryset(ProjectContributor.objects.all()),
+                                project_id=project_id,
                                 pk=self.kwargs['pk'])
         self.check_object_permissions(self.request, obj)
         return obj
@@ -202,32 +378,211 @@ class ProjectContributorDetailAPIView(RetrieveUpdateDestroyAPIView):
         return Response(data=update_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class ActivityEntryListCreateAPIView(ListCreateAPIView):
+class ActivityEntryListCreateAPIView(CoalescedListMixin, IncludeViewMixin, APIViewMixin, ListCreateAPIView):
     serializer_class = ActivityEntrySerializer
     permission_classes = (IsAuthenticated, ActivityEntryPermission, )
+    include_relations = ACTIVITY_ENTRY_INCLUDES
+
+    def get_coalescing_key(self):
+        # staff, project admins and activity viewers all list every entry of the project
+        user = self.request.user
+        if user.is_staff:
+            return 'project'
+        access = get_project_access(user, self.kwargs['project_slug'])
+        if access is not None and access.has_role(ProjectContributor.PROJECT_ADMIN | ProjectContributor.ACTIVITY_VIEWER):
+            return 'project'
+        return ('user', user.id)
 
     def get_queryset(self):
-        project_slug = self.kwargs['project_slug']
-        qs = ActivityEntry.objects.all()
+        project_id = get_project_id_or_404(self.kwargs['org_slug'], self.kwargs['project_slug'])
+        qs = ActivityEntry.objects.filter(project_id=project_id)
         if self.request.user.is_staff:
-            return qs.filter(project__slug=project_slug)
+            return qs
         
         contributor = get_object_or_404(ProjectContributor,
-                                        project__slug=project_slug,
+                                        project_id=project_id,
                                         user=self.request.user)
         if contributor.project_admin or contributor.activity_viewer:
-            return qs.filter(project=contributor.project)
+            return qs
         
-        return qs.filter(project=contributor.project, contributor=contributor)
+        return qs.filter(contributor=contributor)
 
 
-class ActivityEntryDetailAPIVIew(RetrieveUpdateDestroyAPIView):
+class ActivityEntryDetailAPIVIew(IncludeViewMixin, APIViewMixin, RetrieveUpdateDestroyAPIView):
     serializer_class = ActivityEntrySerializer
     permission_classes = (IsAuthenticated, ActivityEntryPermission, )
+    include_relations = ACTIVITY_ENTRY_INCLUDES
 
     def get_object(self):
-        obj = get_object_or_404(ActivityEntry,
-                                project__slug=self.kwargs['project_slug'],
-                                slug=self.kwargs['activity_slug'])
+        # activity_slug is either the entry's ulid or its slug
+        project_id = get_project_id_or_404(self.kwargs['org_slug'], self.kwargs['project_slug'])
+        qs = self.filter_queryset(ActivityEntry.objects.filter(project_id=project_id))
+        ulid = normalize_ulid(self.kwargs['activity_slug'])
+        obj = qs.filter(ulid=ulid).first() if ulid else None
+        if obj is None:
+            obj = get_object_or_404(qs, slug=self.kwargs['activity_slug'])
         self.check_object_permissions(self.request, obj)
         return obj
+
+
+def parse_date_param(request, name, end_of_day=False):
+    '''Aware datetime from a date (YYYY-MM-DD) or ISO 8601 datetime query parameter,
+    dates are expanded to the start or end of the day in the current time zone'''
+    value = request.query_params.get(name)
+    if not value:
+        return None
+
+    try:
+        # well formed but impossible values such as 2020-02-30 raise ValueError
+        parsed = parse_datetime(value)
+        day = parse_date(value) if parsed is None else None
+    except ValueError:
+        parsed = day = None
+    if parsed is None:
+        if day is None:
+            raise ValidationError({name: 'Expected a date (YYYY-MM-DD) or ISO 8601 datetime'})
+        parsed = datetime.combine(day, time.max if end_of_day else time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+class MyActivityEntryListAPIView(CoalescedListMixin, IncludeViewMixin, APIViewMixin, ListAPIView):
+    '''The authenticated user's activity entries across every project and organization,
+    newest first, optionally limited with ?from= and ?to= (inclusive) on start. Served
+    by a range scan of the (user, start) index.'''
+    serializer_class = ActivityEntrySerializer
+    permission_classes = (IsAuthenticated,)
+    include_relations = ACTIVITY_ENTRY_INCLUDES
+    pagination_class = ActivityEntryPagination
+
+    def get_queryset(self):
+        qs = ActivityEntry.objects.filter(user=self.request.user)
+
+        start_from = parse_date_param(self.request, 'from')
+        if start_from is not None:
+            qs = qs.filter(start__gte=start_from)
+
+        start_to = parse_date_param(self.request, 'to', end_of_day=True)
+        if start_to is not None:
+            qs = qs.filter(start__lte=start_to)
+
+        return qs.order_by('-start', '-id')
+
+
+class OrganizationTimesheetAPIView(APIViewMixin, APIView):
+    '''Per day minutes of an organization for the week or month containing ?date=
+    (default today), one row per user and project, optionally limited to ?user='''
+    permission_classes = (IsAuthenticated, TimesheetPermission)
+
+    def get(self, request, *args, **kwargs):
+        org = get_organization_or_404(self.kwargs['org_slug'])
+
+        period = request.query_params.get('period', 'week')
+        if period not in PERIODS:
+            raise ValidationError({'period': 'Expected one of {}'.format(', '.join(PERIODS))})
+
+        day = timezone.localdate()
+        if request.query_params.get('date'):
+            try:
+                day = parse_date(request.query_params['date'])
+            except ValueError:
+                # well formed but impossible dates such as 2020-02-30
+                day = None
+            if day is None:
+                raise ValidationError({'date': 'Expected a date (YYYY-MM-DD)'})
+
+        entries = visible_activity_entries(request.user, org)
+        user_id = request.query_params.get('user')
+        if user_id:
+            if not user_id.isdigit():
+                raise ValidationError({'user': 'Expected a user id'})
+            entries = entries.filter(user_id=int(user_id))
+
+        # staff see every entry, everyone else what their own roles allow
+        visibility = 'staff' if request.user.is_staff else ('user', request.user.id)
+        data = coalesce((type(self).__name__, request.get_full_path(), visibility),
+                        lambda: dict(build_timesheet(entries, period, day), organization=org.slug))
+        return Response(data)
+
+
+class SearchAPIView(APIViewMixin, ListAPIView):
+    '''Full text search, ?q= over the name / description of the activity entries (default),
+    projects or organizations (?type=) the user may see, best matches first. Every word
+    must match, the last one as a prefix (see core.search).'''
+    permission_classes = (IsAuthenticated,)
+    pagination_class = SearchPagination
+    search_types = {
+        'entries': (visible_activity_entries, ActivityEntrySerializer),
+        'projects': (visible_projects, ProjectsListSerializer),
+        'organizations': (visible_organizations, OrganizationSummarySerializer),
+    }
+
+    def get_search_type(self):
+        search_type = self.request.query_params.get('type', 'entries')
+        if search_type not in self.search_types:
+            raise ValidationError({'type': 'Expected one of {}'.format(', '.join(self.search_types))})
+        return search_type
+
+    def get_serializer_class(self):
+        return self.search_types[self.get_search_type()][1]
+
+    def get_queryset(self):
+        text = self.request.query_params.get('q', '').strip()
+        if not text:
+            raise ValidationError({'q': 'This query parameter is required'})
+
+        search_type = self.get_search_type()
+        qs = self.search_types[search_type][0](self.request.user)
+        if search_type == 'projects':
+            qs = qs.with_roles_for(self.request.user)
+        return search(qs, text)
+
+
+class BatchAPIView(APIViewMixin, APIView):
+    '''Executes several api requests in one round trip, see api/batch.py'''
+    permission_classes = (IsAuthenticated,)
+
+    def post(self, request, *args, **kwargs):
+        specs = validate_batch(request.data)
+        parallel = bool(request.data.get('parallel', False))
+        return Response({'responses': execute_batch(request, specs, type(self), parallel=parallel)})
+
+
+class BootstrapAPIView(APIViewMixin, APIView):
+    '''Everything a client needs at session start: the user, their organizations and
+    projects with what they may do on each (see api.permissions capabilities). Three
+    queries however many organizations and projects: access rows, organizations, projects.'''
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request, *args, **kwargs):
+        user = request.user
+        org_access, project_access = {}, {}
+        for access in UserAccess.objects.filter(user_id=user.id):
+            if access.project_id is None:
+                org_access[access.organization_id] = access
+            elif access.roles:
+                project_access[access.project_id] = access
+
+        organizations = Organization.objects.order_by('id')
+        projects = Project.objects.order_by('id')
+        if not user.is_staff:
+            organizations = organizations.filter(id__in=list(org_access))
+            projects = projects.filter(id__in=list(project_access))
+
+        return Response({
+            'user': UserSerializer(user).data,
+            'organizations': [
+                dict(OrganizationSummarySerializer(org).data,
+                     is_member=org.id in org_access and org_access[org.id].is_member,
+                     is_contact=org.id in org_access and org_access[org.id].is_contact,
+                     capabilities=organization_capabilities(user, org_access.get(org.id)))
+                for org in organizations
+            ],
+            'projects': [
+                dict(ProjectSummarySerializer(project).data,
+                     capabilities=project_capabilities(user, project_access.get(project.id),
+                                                       org_access.get(project.organization_id)))
+                for project in projects
+            ],
+        })
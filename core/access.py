@@ -0,0 +1,267 @@
+import threading
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete, m2m_changed
+from django.http import Http404
+
+from .models import Organization, Project, ProjectContributor, UserAccess
+
+
+###############################################################################################
+# User Access
+#
+# UserAccess rows are derived data, every change to the tables they are derived from
+# recomputes the rows of the affected (user, organization) pairs inside a transaction
+#
+# - ProjectContributor saved / deleted (including user or project changes)
+# - Organization.members added / removed / cleared
+# - Organization.contact or slug changed, Organization deleted
+# - Project organization or slug changed, Project deleted
+# - User deleted
+#
+# bulk_create and queryset update() skip signals, call rebuild_user_access() after them
+# (see the seed_load_data command) and use the rebuild_user_access command to detect drift.
+
+_local = threading.local()
+
+
+def build_access_rows(user_id=None, organization_id=None):
+    '''Expected UserAccess rows keyed by primary key, optionally limited to a user
+    and / or organization'''
+    Membership = Organization.members.through
+
+    organizations = Organization.objects.all()
+    memberships = Membership.objects.all()
+    contributors = ProjectContributor.objects.filter(user__isnull=False)
+    if user_id is not None:
+        memberships = memberships.filter(user_id=user_id)
+        contributors = contributors.filter(user_id=user_id)
+    if organization_id is not None:
+        organizations = organizations.filter(id=organization_id)
+        memberships = memberships.filter(organization_id=organization_id)
+        contributors = contributors.filter(project__organization_id=organization_id)
+
+    org_slugs = dict(organizations.values_list('id', 'slug'))
+    rows = {}
+
+    def organization_row(uid, oid):
+        key = UserAccess.organization_key(uid, org_slugs[oid])
+        if key not in rows:
+            rows[key] = UserAccess(key=key, user_id=uid, organization_id=oid)
+        return rows[key]
+
+    # organizations may already be gone while a cascading delete sends signals
+    for uid, oid in memberships.values_list('user_id', 'organization_id'):
+        if oid in org_slugs:
+            organization_row(uid, oid).is_member = True
+
+    contacts = organizations.filter(contact__isnull=False)
+    if user_id is not None:
+        contacts = contacts.filter(contact_id=user_id)
+    for oid, uid in contacts.values_list('id', 'contact_id'):
+        organization_row(uid, oid).is_contact = True
+
+    contributor_values = contributors.order_by('id').values_list(
+        'id', 'user_id', 'roles', 'project_id', 'project__slug', 'project__organization_id'
+    )
+    for cid, uid, roles, pid, project_slug, oid in contributor_values:
+        if oid not in org_slugs:
+            continue
+        organization_row(uid, oid).roles |= roles
+
+        key = UserAccess.project_key(uid, project_slug)
+        if key not in rows:
+            rows[key] = UserAccess(key=key, user_id=uid, organization_id=oid,
+                                   project_id=pid, contributor_id=cid)
+        rows[key].roles |= roles
+
+    return rows
+
+
+def lock_organizations(*organization_ids):
+    '''Locks the organization rows until the transaction ends. Refreshes delete rows and
+    insert them again, two concurrent refreshes of the same rows would both delete and
+    then both insert the same keys. Locks are taken in id order so refreshes spanning
+    several organizations cannot deadlock. A no-op on SQLite where writes are
+    serialized by the database lock.'''
+    ids = sorted(oid for oid in set(organization_ids) if oid is not None)
+    if ids:
+        list(Organization.objects.select_for_update().filter(pk__in=ids).order_by('pk').values_list('pk', flat=True))
+
+
+def refresh_user_access(user_id, organization_id):
+    '''Recomputes the rows of one user within one organization'''
+    if user_id is None or organization_id is None:
+        return
+
+    with transaction.atomic():
+        lock_organizations(organization_id)
+        UserAccess.objects.filter(user_id=user_id, organization_id=organization_id).delete()
+        UserAccess.objects.bulk_create(build_access_rows(user_id, organization_id).values())
+
+
+def refresh_organization_access(organization_id):
+    '''Recomputes the rows of every user of one organization'''
+    with transaction.atomic():
+        lock_organizations(organization_id)
+        UserAccess.objects.filter(organization_id=organization_id).delete()
+        UserAccess.objects.bulk_create(build_access_rows(organization_id=organization_id).values())
+
+
+def rebuild_user_access(batch_size=5000):
+    with transaction.atomic():
+        lock_organizations(*Organization.objects.values_list('pk', flat=True))
+        UserAccess.objects.all().delete()
+        UserAccess.objects.bulk_create(build_access_rows().values(), batch_size=batch_size)
+
+
+def find_user_access_drift():
+    '''Returns (missing, unexpected, different) primary keys comparing the stored
+    rows with the rows expected from the source tables'''
+    fields = ('user_id', 'organization_id', 'project_id', 'contributor_id', 'is_member', 'is_contact', 'roles')
+    expected = {key: tuple(getattr(row, f) for f in fields) for key, row in build_access_rows().items()}
+    stored = {row[0]: row[1:] for row in UserAccess.objects.values_list('key', *fields)}
+
+    missing = sorted(expected.keys() - stored.keys())
+    unexpected = sorted(stored.keys() - expected.keys())
+    different = sorted(key for key in expected.keys() & stored.keys() if expected[key] != stored[key])
+    return missing, unexpected, different
+
+
+def get_organization_access(user, org_slug):
+    return UserAccess.objects.filter(pk=UserAccess.organization_key(user.id, org_slug)).first()
+
+
+def get_project_access(user, project_slug):
+    return UserAccess.objects.filter(pk=UserAccess.project_key(user.id, project_slug)).first()
+
+
+def get_project_access_or_404(user, project_slug):
+    access = get_project_access(user, project_slug)
+    if access is None:
+        raise Http404('Entity not found')
+    return access
+
+
+###############################################################################################
+# Signal receivers, connected in CoreConfig.ready
+
+def remember_previous_values(sender, instance, fields, **kwargs):
+    previous = None
+    if instance.pk is not None:
+        previous = sender.objects.filter(pk=instance.pk).values(*fields).first()
+    instance._access_previous = previous
+
+
+def contributor_pre_save(sender, instance, **kwargs):
+    remember_previous_values(sender, instance, ('user_id', 'project__organization_id'))
+
+
+def contributor_post_save(sender, instance, **kwargs):
+    organization_id = Project.objects.filter(pk=instance.project_id).values_list('organization_id', flat=True).first()
+    refresh_user_access(instance.user_id, organization_id)
+
+    previous = getattr(instance, '_access_previous', None)
+    if previous and (previous['user_id'], previous['project__organization_id']) != (instance.user_id, organization_id):
+        refresh_user_access(previous['user_id'], previous['project__organization_id'])
+
+
+def contributor_post_delete(sender, instance, **kwargs):
+    organization_id = Project.objects.filter(pk=instance.project_id).values_list('organization_id', flat=True).first()
+    refresh_user_access(instance.user_id, organization_id)
+
+
+def organization_pre_save(sender, instance, **kwargs):
+    remember_previous_values(sender, instance, ('contact_id', 'slug'))
+
+
+def organization_post_save(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_access_previous', None)
+    if previous and previous['slug'] != instance.slug:
+        refresh_organization_access(instance.id)
+        return
+
+    refresh_user_access(instance.contact_id, instance.id)
+    if previous and previous['contact_id'] != instance.contact_id:
+        refresh_user_access(previous['contact_id'], instance.id)
+
+
+def organization_post_delete(sender, instance, **kwargs):
+    UserAccess.objects.filter(organization_id=instance.id).delete()
+
+
+def organization_members_pre_clear(instance, reverse):
+    # clear() does not send the removed ids, remember them beforehand
+    if reverse:
+        _local.cleared = {(instance.id, oid) for oid in instance.organization_set.values_list('id', flat=True)}
+    else:
+        _local.cleared = {(uid, instance.id) for uid in instance.members.values_list('id', flat=True)}
+
+
+def organization_members_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear':
+        organization_members_pre_clear(instance, reverse)
+        return
+
+    if action == 'post_clear':
+        pairs = getattr(_local, 'cleared', set())
+        _local.cleared = set()
+    elif action in ('post_add', 'post_remove'):
+        if reverse:
+            pairs = {(instance.id, oid) for oid in pk_set}
+        else:
+            pairs = {(uid, instance.id) for uid in pk_set}
+    else:
+        return
+
+    for user_id, organization_id in pairs:
+        refresh_user_access(user_id, organization_id)
+
+
+def project_pre_save(sender, instance, **kwargs):
+    remember_previous_values(sender, instance, ('organization_id', 'slug'))
+
+
+def project_post_save(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_access_previous', None)
+    if not previous or (previous['organization_id'], previous['slug']) == (instance.organization_id, instance.slug):
+        return
+
+    with transaction.atomic():
+        lock_organizations(previous['organization_id'], instance.organization_id)
+        # project rows are keyed by slug only, drop them before the new organization's
+        # rows are inserted
+        UserAccess.objects.filter(project_id=instance.id).delete()
+        if previous['organization_id'] != instance.organization_id:
+            refresh_organization_access(previous['organization_id'])
+        refresh_organization_access(instance.organization_id)
+
+
+def project_post_delete(sender, instance, **kwargs):
+    user_ids = set(UserAccess.objects.filter(organization_id=instance.organization_id)
+                                     .values_list('user_id', flat=True))
+    UserAccess.objects.filter(project_id=instance.id).delete()
+    if Organization.objects.filter(pk=instance.organization_id).exists():
+        for user_id in user_ids:
+            refresh_user_access(user_id, instance.organization_id)
+
+
+def user_post_delete(sender, instance, **kwargs):
+    UserAccess.objects.filter(user_id=instance.id).delete()
+
+
+def connect_signals():
+    uid = 'core.access.{}'.format
+    pre_save.connect(contributor_pre_save, sender=ProjectContributor, dispatch_uid=uid('contributor_pre_save'))
+    post_save.connect(contributor_post_save, sender=ProjectContributor, dispatch_uid=uid('contributor_post_save'))
+    post_delete.connect(contributor_post_delete, sender=ProjectContributor, dispatch_uid=uid('contributor_post_delete'))
+    pre_save.connect(organization_pre_save, sender=Organization, dispatch_uid=uid('organization_pre_save'))
+    post_save.connect(organization_post_save, sender=Organization, dispatch_uid=uid('organization_post_save'))
+    post_delete.connect(organization_post_delete, sender=Organization, dispatch_uid=uid('organization_post_delete'))
+    m2m_changed.connect(organization_members_changed, sender=Organization.members.through,
+                        dispatch_uid=uid('organization_members_changed'))
+    pre_save.connect(project_pre_save, sender=Project, dispatch_uid=uid('project_pre_save'))
+    post_save.connect(project_post_save, sender=Project, dispatch_uid=uid('project_post_save'))
+    post_delete.connect(project_post_delete, sender=Project, dispatch_uid=uid('project_post_delete'))
+    post_delete.connect(user_post_delete, sender=get_user_model(), dispatch_uid=uid('user_post_delete'))
@@ -1,7 +1,15 @@
+import csv
+
+from django import forms
+from django.conf import settings
 from django.contrib import admin
 from django.contrib.auth import get_user_model
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth.forms import UserCreationForm, UserChangeForm
+from django.core.paginator import Paginator
+from django.db import connection
+from django.http import StreamingHttpResponse
+from django.utils.functional import cached_property
 
 from core import models
 
@@ -24,6 +32,7 @@ class UserAdmin(BaseUserAdmin):
     ordering = ['id']
     list_display = ('email', 'name',)
     list_filter = ('email', 'name',)
+    search_fields = ('email', 'name')
     fieldsets = (
         (None, {'fields': ['email', 'password', 'phone_number']}),
         ('Personal Info', {'fields': ['name']}),
@@ -39,8 +48,159 @@ class UserAdmin(BaseUserAdmin):
     )
 
 
+###############################################################################################
+# Scalable Admin
+#
+# ActivityEntry and ProjectContributor have millions of rows, their admins
+#
+# - join the relations shown in the changelist (list_select_related) instead of
+#   loading them per row through __str__
+# - use raw id / autocomplete widgets instead of <select>s listing every row
+# - estimate the count of unfiltered changelists (EstimatedCountPaginator) and skip
+#   the second, unfiltered count Django shows next to filtered results
+# - navigate entries by date over the start index
+# - export the selected rows (or every filtered row with "select all") as CSV streamed
+#   from a server side iterator
+
+def estimate_row_count(model):
+    '''Approximate number of rows of model's table without scanning it, None when the
+    database keeps no statistics'''
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE relname = %s', [table])
+            row = cursor.fetchone()
+            return row[0] if row and row[0] >= 0 else None
+
+        if connection.vendor == 'sqlite':
+            cursor.execute("SELECT count(*) FROM sqlite_master WHERE name = 'sqlite_stat1'")
+            if cursor.fetchone()[0]:
+                # ANALYZE statistics, the first number of an index' stat is the row count
+                cursor.execute('SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1', [table])
+                row = cursor.fetchone()
+                if row:
+                    return int(row[0].split()[0])
+            # no statistics, fall back to the largest rowid (an index lookup). Rowids are
+            # unique positive integers so it only bounds the count from above: deleted rows
+            # make it overestimate, and without AUTOINCREMENT SQLite reuses freed ids so it
+            # is not a high water mark either
+            cursor.execute('SELECT max(rowid) FROM {}'.format(connection.ops.quote_name(table)))
+            return cursor.fetchone()[0] or 0
+    return None
+
+
+class EstimatedCountPaginator(Paginator):
+    '''Counts filtered changelists exactly, unfiltered ones from estimate_row_count once
+    the table is larger than ADMIN_EXACT_COUNT_LIMIT rows'''
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, 'query', None)
+        if query is not None and not query.where:
+            estimate = estimate_row_count(self.object_list.model)
+            if estimate is not None and estimate > getattr(settings, 'ADMIN_EXACT_COUNT_LIMIT', 10000):
+                return estimate
+        return super().count
+
+
+def export_as_csv(modeladmin, request, queryset):
+    '''Streams the csv_export_fields of the selected rows'''
+    fields = modeladmin.csv_export_fields
+
+    class Echo:
+        def write(self, value):
+            return value
+
+    writer = csv.writer(Echo())
+    rows = queryset.order_by('pk').values_list(*fields).iterator(chunk_size=2000)
+    response = StreamingHttpResponse((writer.writerow(row) for row in _with_header(fields, rows)),
+                                     content_type='text/csv')
+    response['Content-Disposition'] = 'attachment; filename="{}.csv"'.format(modeladmin.model._meta.model_name)
+    return response
+
+
+export_as_csv.short_description = 'Export selected rows as CSV'
+
+
+def _with_header(header, rows):
+    yield header
+    yield from rows
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = (export_as_csv,)
+    csv_export_fields = ()
+
+
+class OrganizationAdmin(admin.ModelAdmin):
+    list_display = ('name', 'slug', 'contact')
+    list_select_related = ('contact',)
+    search_fields = ('name', 'slug')
+    raw_id_fields = ('contact', 'members')
+
+
+class ProjectAdmin(admin.ModelAdmin):
+    list_display = ('name', 'slug', 'organization', 'entry_count', 'contributor_count')
+    list_select_related = ('organization',)
+    search_fields = ('name', 'slug')
+    raw_id_fields = ('creator',)
+    autocomplete_fields = ('organization',)
+    # maintained by core.counters, CounterFieldsMixin.save() never writes them
+    readonly_fields = models.Project.counter_fields
+
+
+class ProjectContributorAdminForm(forms.ModelForm):
+    '''Edits the roles bitmask through the model's boolean role properties'''
+    role_fields = ('project_admin', 'activity_viewer', 'activity_editor')
+
+    project_admin = forms.BooleanField(required=False)
+    activity_viewer = forms.BooleanField(required=False)
+    activity_editor = forms.BooleanField(required=False)
+
+    class Meta:
+        model = models.ProjectContributor
+        exclude = ('roles',)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        for name in self.role_fields:
+            self.initial.setdefault(name, getattr(self.instance, name))
+
+    def save(self, commit=True):
+        for name in self.role_fields:
+            setattr(self.instance, name, self.cleaned_data[name])
+        return super().save(commit)
+
+
+class ProjectContributorAdmin(LargeTableAdmin):
+    form = ProjectContributorAdminForm
+    fields = ('project', 'user') + ProjectContributorAdminForm.role_fields + models.ProjectContributor.counter_fields
+    readonly_fields = models.ProjectContributor.counter_fields
+    list_display = ('id', 'project', 'user', 'project_admin', 'activity_viewer', 'activity_editor',
+                    'entry_count', 'total_minutes')
+    list_select_related = ('project', 'user')
+    raw_id_fields = ('user',)
+    autocomplete_fields = ('project',)
+    csv_export_fields = ('id', 'project__slug', 'user__email', 'roles', 'entry_count', 'total_minutes',
+                         'created_at')
+
+
+class ActivityEntryAdmin(LargeTableAdmin):
+    list_display = ('name', 'project', 'user', 'start', 'minutes')
+    list_select_related = ('project', 'user')
+    raw_id_fields = ('contributor', 'project')
+    # denormalized from the contributor and project by ActivityEntry.save()
+    readonly_fields = ('organization', 'user')
+    date_hierarchy = 'start'
+    ordering = ('-start',)
+    csv_export_fields = ('id', 'ulid', 'slug', 'name', 'description', 'organization__slug', 'project__slug',
+                         'user__email', 'start', 'end', 'minutes')
+
+
 admin.site.register(models.User, UserAdmin)
-admin.site.register(models.Organization)
-admin.site.register(models.Project)
-admin.site.register(models.ProjectContributor)
-admin.site.register(models.ActivityEntry)
+admin.site.register(models.Organization, OrganizationAdmin)
+admin.site.register(models.Project, ProjectAdmin)
+admin.site.register(models.ProjectContributor, ProjectContributorAdmin)
+admin.site.register(models.ActivityEntry, ActivityEntryAdmin)
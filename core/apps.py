@@ -1,5 +1,22 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_migrate
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from . import access, counters, denormalization, object_cache, slug_cache
+        from .search import install_search_indexes_post_migrate
+        from .slow_queries import install_slow_query_logger
+
+        access.connect_signals()
+        counters.connect_signals()
+        denormalization.connect_signals()
+        object_cache.connect_signals()
+        slug_cache.connect_signals()
+        connection_created.connect(install_slow_query_logger,
+                                   dispatch_uid='core.slow_queries.install_slow_query_logger')
+        post_migrate.connect(install_search_indexes_post_migrate, sender=self,
+                             dispatch_uid='core.search.install_search_indexes')
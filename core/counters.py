@@ -0,0 +1,152 @@
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce, Greatest
+from django.db.models.signals import pre_save, post_save, post_delete
+
+from .models import Project, ProjectContributor, ActivityEntry
+from .object_cache import project_cache
+
+
+###############################################################################################
+# Counters
+#
+# Project.entry_count / total_minutes / contributor_count and ProjectContributor.entry_count
+# / total_minutes are adjusted with F() expressions (UPDATE ... SET x = x + n) whenever an
+# ActivityEntry or ProjectContributor is saved or deleted, so concurrent writers never lose
+# increments. CounterFieldsMixin keeps plain save() calls from writing the counters back.
+# Project updates skip signals so they invalidate core.object_cache explicitly.
+#
+# bulk_create and queryset update() skip signals, call reconcile_counters() after them (see
+# the seed_load_data command) or run the reconcile_counters command to repair drift. Counts
+# are clamped at 0 so deleting rows of a drifted counter never violates the CHECK
+# constraint of the positive integer columns.
+
+def _count_plus(field, n):
+    return Greatest(F(field) + n, 0)
+
+
+def adjust_counters(project_id, contributor_id, entries, minutes):
+    if not entries and not minutes:
+        return
+
+    Project.objects.filter(pk=project_id).update(entry_count=_count_plus('entry_count', entries),
+                                                 total_minutes=F('total_minutes') + minutes)
+    project_cache.invalidate(project_id)
+    ProjectContributor.objects.filter(pk=contributor_id).update(entry_count=_count_plus('entry_count', entries),
+                                                                total_minutes=F('total_minutes') + minutes)
+
+
+def adjust_contributor_count(project_id, contributors):
+    Project.objects.filter(pk=project_id).update(contributor_count=_count_plus('contributor_count', contributors))
+    project_cache.invalidate(project_id)
+
+
+def _aggregate_subquery(model, field, aggregate):
+    values = (model.objects.filter(**{field: OuterRef('pk')})
+                           .order_by()
+                           .values(field)
+                           .annotate(value=aggregate)
+                           .values('value'))
+    return Coalesce(Subquery(values, output_field=IntegerField()), 0)
+
+
+def expected_project_counters():
+    return {
+        'entry_count': _aggregate_subquery(ActivityEntry, 'project', Count('id')),
+        'total_minutes': _aggregate_subquery(ActivityEntry, 'project', Sum('minutes')),
+        'contributor_count': _aggregate_subquery(ProjectContributor, 'project', Count('id')),
+    }
+
+
+def expected_contributor_counters():
+    return {
+        'entry_count': _aggregate_subquery(ActivityEntry, 'contributor', Count('id')),
+        'total_minutes': _aggregate_subquery(ActivityEntry, 'contributor', Sum('minutes')),
+    }
+
+
+def find_counter_drift(model, counters):
+    '''Primary keys of rows whose stored counters differ from the aggregated values'''
+    annotations = {'expected_' + name: expression for name, expression in counters.items()}
+    return list(model.objects.annotate(**annotations)
+                             .exclude(**{name: F('expected_' + name) for name in counters})
+                             .order_by('pk')
+                             .values_list('pk', flat=True))
+
+
+def reconcile_counters(dry_run=False):
+    '''Recomputes drifted counters, returns {model name: [primary keys]} of the rows
+    that were (or with dry_run would be) repaired'''
+    repaired = {}
+    with transaction.atomic():
+        for model, counters in ((Project, expected_project_counters()),
+                                (ProjectContributor, expected_contributor_counters())):
+            pks = find_counter_drift(model, counters)
+            if pks and not dry_run:
+                model.objects.filter(pk__in=pks).update(**counters)
+                if model is Project:
+                    for pk in pks:
+                        project_cache.invalidate(pk)
+            repaired[model.__name__] = pks
+    return repaired
+
+
+###############################################################################################
+# Signal receivers, connected in CoreConfig.ready
+
+def activity_entry_pre_save(sender, instance, **kwargs):
+    previous = None
+    if instance.pk is not None:
+        previous = (sender.objects.filter(pk=instance.pk)
+                                  .values('project_id', 'contributor_id', 'minutes')
+                                  .first())
+    instance._counters_previous = previous
+
+
+def activity_entry_post_save(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_counters_previous', None)
+    if created or previous is None:
+        adjust_counters(instance.project_id, instance.contributor_id, 1, instance.minutes)
+        return
+
+    if (previous['project_id'], previous['contributor_id']) == (instance.project_id, instance.contributor_id):
+        adjust_counters(instance.project_id, instance.contributor_id, 0, instance.minutes - previous['minutes'])
+    else:
+        adjust_counters(previous['project_id'], previous['contributor_id'], -1, -previous['minutes'])
+        adjust_counters(instance.project_id, instance.contributor_id, 1, instance.minutes)
+
+
+def activity_entry_post_delete(sender, instance, **kwargs):
+    adjust_counters(instance.project_id, instance.contributor_id, -1, -instance.minutes)
+
+
+def contributor_pre_save(sender, instance, **kwargs):
+    previous = None
+    if instance.pk is not None:
+        previous = sender.objects.filter(pk=instance.pk).values_list('project_id', flat=True).first()
+    instance._counters_previous_project_id = previous
+
+
+def contributor_post_save(sender, instance, created, **kwargs):
+    previous_project_id = getattr(instance, '_counters_previous_project_id', None)
+    if created or previous_project_id is None:
+        adjust_contributor_count(instance.project_id, 1)
+    elif previous_project_id != instance.project_id:
+        adjust_contributor_count(previous_project_id, -1)
+        adjust_contributor_count(instance.project_id, 1)
+
+
+def contributor_post_delete(sender, instance, **kwargs):
+    adjust_contributor_count(instance.project_id, -1)
+
+
+def connect_signals():
+    uid = 'core.counters.{}'.format
+    pre_save.connect(activity_entry_pre_save, sender=ActivityEntry, dispatch_uid=uid('activity_entry_pre_save'))
+    post_save.connect(activity_entry_post_save, sender=ActivityEntry, dispatch_uid=uid('activity_entry_post_save'))
+    post_delete.connect(activity_entry_post_delete, sender=ActivityEntry,
+                        dispatch_uid=uid('activity_entry_post_delete'))
+    pre_save.connect(contributor_pre_save, sender=ProjectContributor, dispatch_uid=uid('contributor_pre_save'))
+    post_save.connect(contributor_post_save, sender=ProjectContributor, dispatch_uid=uid('contributor_post_save'))
+    post_delete.connect(contributor_post_delete, sender=ProjectContributor,
+                        dispatch_uid=uid('contributor_post_delete'))
@@ -0,0 +1,35 @@
+from django.db.models.signals import post_save
+
+from .models import Project, ProjectContributor, ActivityEntry
+
+
+###############################################################################################
+# Activity Entry Denormalization
+#
+# ActivityEntry.organization and ActivityEntry.user copy project.organization and
+# contributor.user. ActivityEntry.save() sets them for the entry being written, the
+# receivers below rewrite the entries of a project moved to another organization or of
+# a contributor reassigned to another user. Deleting a user nulls ActivityEntry.user
+# through on_delete=SET_NULL like it nulls ProjectContributor.user.
+#
+# bulk_create and queryset update() skip save() and signals, set organization / user
+# explicitly (see the seed_load_data command).
+
+def project_post_save(sender, instance, created, **kwargs):
+    if not created:
+        (ActivityEntry.objects.filter(project_id=instance.pk)
+                              .exclude(organization_id=instance.organization_id)
+                              .update(organization_id=instance.organization_id))
+
+
+def contributor_post_save(sender, instance, created, **kwargs):
+    if not created:
+        (ActivityEntry.objects.filter(contributor_id=instance.pk)
+                              .exclude(user_id=instance.user_id)
+                              .update(user_id=instance.user_id))
+
+
+def connect_signals():
+    uid = 'core.denormalization.{}'.format
+    post_save.connect(project_post_save, sender=Project, dispatch_uid=uid('project_post_save'))
+    post_save.connect(contributor_post_save, sender=ProjectContributor, dispatch_uid=uid('contributor_post_save'))
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.access import find_user_access_drift, rebuild_user_access
+
+
+###############################################################################################
+# Rebuild User Access
+#
+# Recomputes core.models.UserAccess from organizations, members and project contributors.
+# Run it after bulk loads or raw SQL that bypass the signals maintaining the table.
+#
+#   python manage.py rebuild_user_access           # rebuild every row
+#   python manage.py rebuild_user_access --verify  # report drift, exits non-zero if any
+
+class Command(BaseCommand):
+    help = 'Rebuilds or verifies the precomputed user access table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verify', action='store_true',
+                            help='Only compare the stored rows with the expected rows')
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help='Rows per bulk_create batch')
+
+    def handle(self, *args, **options):
+        if not options['verify']:
+            rebuild_user_access(options['batch_size'])
+            self.stdout.write(self.style.SUCCESS('Rebuilt user access'))
+            return
+
+        missing, unexpected, different = find_user_access_drift()
+        for label, keys in (('missing', missing), ('unexpected', unexpected), ('different', different)):
+            for key in keys:
+                self.stdout.write(f'{label}: {key}')
+
+        if missing or unexpected or different:
+            raise CommandError('User access drift: {} missing, {} unexpected, {} different'.format(
+                len(missing), len(unexpected), len(different)
+            ))
+        self.stdout.write(self.style.SUCCESS('User access is up to date'))
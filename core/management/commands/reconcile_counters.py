@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from core.counters import reconcile_counters
+
+
+###############################################################################################
+# Reconcile Counters
+#
+# Recomputes the activity entry / contributor counters of Project and ProjectContributor
+# from the source rows and repairs the rows that drifted, e.g. after bulk loads or raw SQL.
+#
+#   python manage.py reconcile_counters            # repair drifted rows
+#   python manage.py reconcile_counters --dry-run  # only report them
+
+class Command(BaseCommand):
+    help = 'Repairs drifted project and project contributor counters'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Report drifted rows without repairing them')
+
+    def handle(self, *args, **options):
+        repaired = reconcile_counters(dry_run=options['dry_run'])
+        verb = 'Drifted' if options['dry_run'] else 'Repaired'
+        for model_name, pks in repaired.items():
+            self.stdout.write('{} {} {} rows{}'.format(
+                verb, len(pks), model_name, ': {}'.format(', '.join(map(str, pks))) if pks else ''
+            ))
@@ -0,0 +1,195 @@
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils.timezone import now
+
+from core.access import rebuild_user_access
+from core.counters import reconcile_counters
+from core.models import Organization, Project, ProjectContributor, ActivityEntry
+from core.utils import normalize_lookup_text
+
+
+###############################################################################################
+# Seed Load Data
+#
+# Generates a production shaped data set for local benchmarking. Every row is inserted
+# with bulk_create and slugs are pre-computed from the --prefix so make_object_slug_field
+# (one query per candidate slug) is never hit.
+#
+# - N organizations, each with a contact and a pool of member users
+# - M projects per organization, the organization contact is project_admin on each
+#   like OrganizationProjectSerializer.create does
+# - K contributors per project sampled from the organization members
+# - E activity entries spread across the activity_editor contributors
+#
+# bulk_create skips the signals that maintain UserAccess and the project / contributor
+# counters so both are rebuilt at the end, and User.save() so the lookup columns are
+# filled in here.
+#
+# Example:
+#   python manage.py seed_load_data --organizations 20 --projects 25 \
+#       --contributors 8 --entries 2000000
+
+class Command(BaseCommand):
+    help = 'Seeds synthetic organizations, projects, contributors and activity entries for load testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--organizations', type=int, default=10,
+                            help='Number of organizations to create')
+        parser.add_argument('--projects', type=int, default=10,
+                            help='Number of projects per organization')
+        parser.add_argument('--contributors', type=int, default=5,
+                            help='Number of contributors per project (including the organization contact)')
+        parser.add_argument('--members', type=int, default=20,
+                            help='Number of member users per organization')
+        parser.add_argument('--entries', type=int, default=100000,
+                            help='Total number of activity entries to create')
+        parser.add_argument('--days', type=int, default=365,
+                            help='Spread activity entry start times over this many past days')
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help='Rows per bulk_create batch')
+        parser.add_argument('--prefix', default='seed',
+                            help='Prefix used for slugs and emails so runs do not collide')
+        parser.add_argument('--password', default='password123',
+                            help='Password assigned to every generated user')
+        parser.add_argument('--random-seed', type=int, default=None,
+                            help='Seed for the random number generator to make runs reproducible')
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        if Organization.objects.filter(slug__startswith=f'{prefix}-org-').exists():
+            raise CommandError(f'Data with prefix "{prefix}" already exists, choose another --prefix')
+
+        if options['contributors'] > options['members']:
+            raise CommandError('--contributors cannot exceed --members')
+
+        self.rng = random.Random(options['random_seed'])
+        self.batch_size = options['batch_size']
+
+        started = time.perf_counter()
+        with transaction.atomic():
+            members_by_org = self.create_organizations(prefix,
+                                                       options['organizations'],
+                                                       options['members'],
+                                                       options['password'])
+            projects = self.create_projects(prefix, members_by_org, options['projects'])
+            editors = self.create_contributors(projects, members_by_org, options['contributors'])
+            self.create_activity_entries(prefix, editors, options['entries'], options['days'])
+            rebuild_user_access(self.batch_size)
+            reconcile_counters()
+
+        self.stdout.write(self.style.SUCCESS(
+            'Seeded data with prefix "{}" in {:.1f}s'.format(prefix, time.perf_counter() - started)
+        ))
+
+    def create_organizations(self, prefix, org_count, member_count, password):
+        UserModel = get_user_model()
+        hashed_password = make_password(password)
+
+        new_users = []
+        for i in range(org_count):
+            for j in range(member_count):
+                email, name = f'{prefix}-user-{i}-{j}@example.com', f'Seed User {i}-{j}'
+                new_users.append(UserModel(email=email,
+                                           name=name,
+                                           email_lookup=normalize_lookup_text(email),
+                                           name_lookup=normalize_lookup_text(name),
+                                           password=hashed_password,
+                                           is_active=True))
+        UserModel.objects.bulk_create(new_users, batch_size=self.batch_size)
+
+        # sqlite does not return primary keys from bulk_create so refetch them
+        users = {u.email: u for u in UserModel.objects.filter(email__startswith=f'{prefix}-user-')}
+
+        Organization.objects.bulk_create([
+            Organization(name=f'{prefix} Org {i}',
+                         slug=f'{prefix}-org-{i}',
+                         contact=users[f'{prefix}-user-{i}-0@example.com'])
+            for i in range(org_count)
+        ], batch_size=self.batch_size)
+
+        members_by_org = {}
+        memberships = []
+        for org in Organization.objects.filter(slug__startswith=f'{prefix}-org-'):
+            i = org.slug.rsplit('-', 1)[1]
+            members = [users[f'{prefix}-user-{i}-{j}@example.com'] for j in range(member_count)]
+            members_by_org[org] = members
+            memberships.extend(
+                Organization.members.through(organization_id=org.id, user_id=member.id)
+                for member in members
+            )
+        Organization.members.through.objects.bulk_create(memberships, batch_size=self.batch_size)
+
+        self.stdout.write(f'Created {org_count} organizations and {len(users)} users')
+        return members_by_org
+
+    def create_projects(self, prefix, members_by_org, project_count):
+        Project.objects.bulk_create([
+            Project(name=f'{org.name} Project {j}',
+                    description=f'Synthetic project {j} for {org.name}',
+                    slug=f'{org.slug}-project-{j}',
+                    creator=org.contact,
+                    organization=org)
+            for org in members_by_org
+            for j in range(project_count)
+        ], batch_size=self.batch_size)
+
+        projects = list(Project.objects.filter(slug__startswith=f'{prefix}-org-')
+                                       .select_related('organization'))
+        self.stdout.write(f'Created {len(projects)} projects')
+        return projects
+
+    def create_contributors(self, projects, members_by_org, contributor_count):
+        contributors = []
+        for project in projects:
+            contact, *others = members_by_org[project.organization]
+            contributors.append(ProjectContributor(user=contact, project=project, project_admin=True))
+            for user in self.rng.sample(others, contributor_count - 1):
+                viewer = self.rng.random() < 0.2
+                contributors.append(ProjectContributor(user=user,
+                                                       project=project,
+                                                       activity_viewer=viewer,
+                                                       activity_editor=not viewer))
+        ProjectContributor.objects.bulk_create(contributors, batch_size=self.batch_size)
+
+        editors = list(ProjectContributor.objects
+                        .filter(project__in=projects)
+                        .with_role(ProjectContributor.ACTIVITY_EDITOR)
+                        .select_related('project')
+                        .only('id', 'project_id', 'user_id', 'project__organization_id'))
+        self.stdout.write(f'Created {len(contributors)} project contributors')
+        return editors
+
+    def create_activity_entries(self, prefix, editors, entry_count, days):
+        if entry_count and not editors:
+            raise CommandError('No activity_editor contributors to assign activity entries to')
+
+        current_time = now()
+        max_offset = days * 24 * 60
+        batch = []
+        for n in range(entry_count):
+            contributor = self.rng.choice(editors)
+            minutes = self.rng.randint(15, 480)
+            start = current_time - timedelta(minutes=self.rng.randint(minutes, max_offset))
+            batch.append(ActivityEntry(name=f'Seed Entry {n}',
+                                       description='Synthetic activity entry',
+                                       slug=f'{prefix}-entry-{n}',
+                                       contributor_id=contributor.id,
+                                       project_id=contributor.project_id,
+                                       organization_id=contributor.project.organization_id,
+                                       user_id=contributor.user_id,
+                                       start=start,
+                                       end=start + timedelta(minutes=minutes),
+                                       minutes=minutes))
+            if len(batch) >= self.batch_size:
+                ActivityEntry.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            ActivityEntry.objects.bulk_create(batch)
+
+        self.stdout.write(f'Created {entry_count} activity entries')
@@ -0,0 +1,117 @@
+import os
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from prometheus_client import (
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    REGISTRY,
+    generate_latest,
+    multiprocess,
+)
+
+
+###############################################################################################
+# Prometheus Metrics
+#
+# Multiple worker processes are aggregated by prometheus_client's multiprocess mode which
+# keeps every worker's values in mmap'd files of a shared directory. Set the
+# prometheus_multiproc_dir environment variable to an empty directory before the workers
+# start (clear it on every deploy) and, with gunicorn, call
+# prometheus_client.multiprocess.mark_process_dead(worker.pid) from the child_exit hook.
+# Without the variable metrics are kept in process which is fine for runserver.
+
+LATENCY_BUCKETS = (.005, .01, .025, .05, .075, .1, .25, .5, .75, 1.0, 2.5, 5.0, 10.0)
+
+REQUEST_LATENCY = Histogram('timetracker_http_request_duration_seconds',
+                            'Request latency by route',
+                            ['route', 'method'],
+                            buckets=LATENCY_BUCKETS)
+
+REQUESTS = Counter('timetracker_http_requests_total',
+                   'Requests by route and status code',
+                   ['route', 'method', 'status'])
+
+REQUESTS_IN_FLIGHT = Gauge('timetracker_http_requests_in_flight',
+                           'Requests currently being processed',
+                           multiprocess_mode='livesum')
+
+DB_QUERIES = Counter('timetracker_db_queries_total',
+                     'SQL queries executed by route',
+                     ['route'])
+
+DB_QUERY_TIME = Counter('timetracker_db_query_duration_seconds_total',
+                        'Time spent executing SQL by route',
+                        ['route'])
+
+CACHE_REQUESTS = Counter('timetracker_cache_requests_total',
+                         'Cache lookups by cache name and result (hit or miss)',
+                         ['cache', 'result'])
+
+
+def record_cache_lookup(cache_name, hit):
+    '''Counts a hit or miss for one of the application caches'''
+    CACHE_REQUESTS.labels(cache=cache_name, result='hit' if hit else 'miss').inc()
+
+
+def get_route_name(request):
+    resolver_match = getattr(request, 'resolver_match', None)
+    if resolver_match is None:
+        return 'unmatched'
+    return resolver_match.url_name or resolver_match.view_name
+
+
+def render_metrics():
+    if 'prometheus_multiproc_dir' in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - started
+
+
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        if not getattr(settings, 'METRICS_ENABLED', True):
+            raise MiddlewareNotUsed()
+
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = QueryCounter()
+        started = time.perf_counter()
+        REQUESTS_IN_FLIGHT.inc()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(queries))
+                response = self.get_response(request)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+
+        route = get_route_name(request)
+        REQUEST_LATENCY.labels(route=route, method=request.method).observe(time.perf_counter() - started)
+        REQUESTS.labels(route=route, method=request.method, status=str(response.status_code)).inc()
+        DB_QUERIES.labels(route=route).inc(queries.count)
+        DB_QUERY_TIME.labels(route=route).inc(queries.duration)
+
+        return response
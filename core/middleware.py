@@ -0,0 +1,63 @@
+from django.conf import settings
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.messages.middleware import MessageMiddleware
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.middleware.clickjacking import XFrameOptionsMiddleware
+from django.middleware.csrf import CsrfViewMiddleware
+
+
+def is_token_api_request(request):
+    '''True for requests under LEAN_API_PATH_PREFIX that carry a Bearer token,
+    these never use the session, messages or CSRF cookie'''
+    prefix = getattr(settings, 'LEAN_API_PATH_PREFIX', None)
+    if not prefix or not request.path_info.startswith(prefix):
+        return False
+    if request.path_info.startswith(tuple(getattr(settings, 'LEAN_API_EXCLUDED_PATH_PREFIXES', ()))):
+        return False
+    return request.META.get('HTTP_AUTHORIZATION', '').startswith('Bearer ')
+
+
+###############################################################################################
+# Lean API Middleware
+#
+# Drop in replacements for the session, CSRF, authentication, messages and X-Frame-Options
+# middleware that step aside for token authenticated api requests (see
+# is_token_api_request). Everything else, including the admin, api-admin/ and the
+# dj-rest-auth endpoints (logout flushes the session), still goes through the full stack.
+#
+# The views in api/views.py pair this with JWT only authentication and JSON only rendering
+# for the same requests (see api.views.APIViewMixin).
+
+class LeanAPIMiddlewareMixin:
+    def __call__(self, request):
+        if is_token_api_request(request):
+            return self.get_response(request)
+        return super().__call__(request)
+
+
+class LeanSessionMiddleware(LeanAPIMiddlewareMixin, SessionMiddleware):
+    pass
+
+
+class LeanCsrfViewMiddleware(LeanAPIMiddlewareMixin, CsrfViewMiddleware):
+    def process_view(self, request, callback, callback_args, callback_kwargs):
+        if is_token_api_request(request):
+            return None
+        return super().process_view(request, callback, callback_args, callback_kwargs)
+
+
+class LeanAuthenticationMiddleware(LeanAPIMiddlewareMixin, AuthenticationMiddleware):
+    def __call__(self, request):
+        if is_token_api_request(request):
+            # there is no session to load a user from, DRF authenticates the token
+            request.user = AnonymousUser()
+        return super().__call__(request)
+
+
+class LeanMessageMiddleware(LeanAPIMiddlewareMixin, MessageMiddleware):
+    pass
+
+
+class LeanXFrameOptionsMiddleware(LeanAPIMiddlewareMixin, XFrameOptionsMiddleware):
+    pass
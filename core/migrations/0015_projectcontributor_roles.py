@@ -0,0 +1,57 @@
+# Generated by Django 3.0.14 on 2026-10-18 23:46
+
+from django.db import migrations, models
+
+
+PROJECT_ADMIN = 1
+ACTIVITY_VIEWER = 2
+ACTIVITY_EDITOR = 4
+
+
+def booleans_to_roles(apps, schema_editor):
+    ProjectContributor = apps.get_model('core', 'ProjectContributor')
+    for role, field in ((PROJECT_ADMIN, 'project_admin'),
+                        (ACTIVITY_VIEWER, 'activity_viewer'),
+                        (ACTIVITY_EDITOR, 'activity_editor')):
+        ProjectContributor.objects.filter(**{field: True}).update(roles=models.F('roles') + role)
+
+
+def roles_to_booleans(apps, schema_editor):
+    ProjectContributor = apps.get_model('core', 'ProjectContributor')
+    for role, field in ((PROJECT_ADMIN, 'project_admin'),
+                        (ACTIVITY_VIEWER, 'activity_viewer'),
+                        (ACTIVITY_EDITOR, 'activity_editor')):
+        values = [value for value in range(1, 8) if value & role]
+        ProjectContributor.objects.filter(roles__in=values).update(**{field: True})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_auto_20200801_2040'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='projectcontributor',
+            name='roles',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.RunPython(booleans_to_roles, roles_to_booleans),
+        migrations.RemoveField(
+            model_name='projectcontributor',
+            name='activity_editor',
+        ),
+        migrations.RemoveField(
+            model_name='projectcontributor',
+            name='activity_viewer',
+        ),
+        migrations.RemoveField(
+            model_name='projectcontributor',
+            name='project_admin',
+        ),
+        migrations.AddIndex(
+            model_name='projectcontributor',
+            index=models.Index(fields=['user', 'roles', 'project'], name='core_contributor_user_roles'),
+        ),
+    ]
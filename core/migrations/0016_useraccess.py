@@ -0,0 +1,61 @@
+# Generated by Django 3.0.14 on 2026-10-18 23:49
+
+from django.db import migrations, models
+
+
+def populate_user_access(apps, schema_editor):
+    Organization = apps.get_model('core', 'Organization')
+    ProjectContributor = apps.get_model('core', 'ProjectContributor')
+    UserAccess = apps.get_model('core', 'UserAccess')
+
+    org_slugs = dict(Organization.objects.values_list('id', 'slug'))
+    rows = {}
+
+    def organization_row(uid, oid):
+        key = '{}:org:{}'.format(uid, org_slugs[oid])
+        if key not in rows:
+            rows[key] = UserAccess(key=key, user_id=uid, organization_id=oid)
+        return rows[key]
+
+    for uid, oid in Organization.members.through.objects.values_list('user_id', 'organization_id'):
+        organization_row(uid, oid).is_member = True
+
+    for oid, uid in Organization.objects.filter(contact__isnull=False).values_list('id', 'contact_id'):
+        organization_row(uid, oid).is_contact = True
+
+    contributors = (ProjectContributor.objects
+                        .filter(user__isnull=False)
+                        .order_by('id')
+                        .values_list('id', 'user_id', 'roles', 'project_id', 'project__slug', 'project__organization_id'))
+    for cid, uid, roles, pid, project_slug, oid in contributors:
+        organization_row(uid, oid).roles |= roles
+        key = '{}:project:{}'.format(uid, project_slug)
+        if key not in rows:
+            rows[key] = UserAccess(key=key, user_id=uid, organization_id=oid, project_id=pid, contributor_id=cid)
+        rows[key].roles |= roles
+
+    UserAccess.objects.bulk_create(rows.values(), batch_size=5000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_projectcontributor_roles'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserAccess',
+            fields=[
+                ('key', models.CharField(max_length=150, primary_key=True, serialize=False)),
+                ('user_id', models.IntegerField(db_index=True)),
+                ('organization_id', models.IntegerField(db_index=True)),
+                ('project_id', models.IntegerField(db_index=True, null=True)),
+                ('contributor_id', models.IntegerField(null=True)),
+                ('is_member', models.BooleanField(default=False)),
+                ('is_contact', models.BooleanField(default=False)),
+                ('roles', models.PositiveSmallIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(populate_user_access, migrations.RunPython.noop),
+    ]
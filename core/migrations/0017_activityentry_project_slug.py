@@ -0,0 +1,26 @@
+# Generated by Django 3.0.14 on 2026-10-18 23:55
+
+from django.db import migrations, models
+
+
+# Slugs used to be globally unique so every existing slug is already unique within its
+# project, existing activity entry urls keep resolving without rewriting any rows.
+# Reversing fails once two projects share an activity entry slug.
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_useraccess'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='activityentry',
+            name='slug',
+            field=models.SlugField(db_index=False),
+        ),
+        migrations.AddConstraint(
+            model_name='activityentry',
+            constraint=models.UniqueConstraint(fields=('project', 'slug'), name='core_activityentry_project_slug'),
+        ),
+    ]
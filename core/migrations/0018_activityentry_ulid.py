@@ -0,0 +1,18 @@
+# Generated by Django 3.0.14 on 2026-10-18 23:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_activityentry_project_slug'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='activityentry',
+            name='ulid',
+            field=models.CharField(blank=True, max_length=26, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 3.0.14 on 2026-10-18 23:58
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def populate_counters(apps, schema_editor):
+    Project = apps.get_model('core', 'Project')
+    ProjectContributor = apps.get_model('core', 'ProjectContributor')
+    ActivityEntry = apps.get_model('core', 'ActivityEntry')
+
+    def aggregate(model, field, expression):
+        values = (model.objects.filter(**{field: OuterRef('pk')})
+                               .order_by()
+                               .values(field)
+                               .annotate(value=expression)
+                               .values('value'))
+        return Coalesce(Subquery(values, output_field=IntegerField()), 0)
+
+    Project.objects.update(entry_count=aggregate(ActivityEntry, 'project', Count('id')),
+                           total_minutes=aggregate(ActivityEntry, 'project', Sum('minutes')),
+                           contributor_count=aggregate(ProjectContributor, 'project', Count('id')))
+    ProjectContributor.objects.update(entry_count=aggregate(ActivityEntry, 'contributor', Count('id')),
+                                      total_minutes=aggregate(ActivityEntry, 'contributor', Sum('minutes')))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_activityentry_ulid'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='contributor_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='entry_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='total_minutes',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='projectcontributor',
+            name='entry_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='projectcontributor',
+            name='total_minutes',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
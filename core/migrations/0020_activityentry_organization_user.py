@@ -0,0 +1,50 @@
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+import django.db.models.deletion
+
+
+def backfill_organization_user(apps, schema_editor):
+    ActivityEntry = apps.get_model('core', 'ActivityEntry')
+    Project = apps.get_model('core', 'Project')
+    ProjectContributor = apps.get_model('core', 'ProjectContributor')
+
+    ActivityEntry.objects.update(
+        organization_id=Subquery(Project.objects.filter(pk=OuterRef('project_id')).values('organization_id')[:1]),
+        user_id=Subquery(ProjectContributor.objects.filter(pk=OuterRef('contributor_id')).values('user_id')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('core', '0019_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='activityentry',
+            name='organization',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, to='core.Organization'),
+        ),
+        migrations.AddField(
+            model_name='activityentry',
+            name='user',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(backfill_organization_user, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='activityentry',
+            name='organization',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='core.Organization'),
+        ),
+        migrations.AddIndex(
+            model_name='activityentry',
+            index=models.Index(fields=['organization', 'start'], name='core_entry_org_start'),
+        ),
+        migrations.AddIndex(
+            model_name='activityentry',
+            index=models.Index(fields=['user', 'start'], name='core_entry_user_start'),
+        ),
+    ]
@@ -0,0 +1,67 @@
+from django.db import migrations
+
+
+# frozen copy of the indexes as of this migration, core.search only repairs them
+# on post_migrate and later changes need migrations of their own
+SEARCH_INDEXES = {
+    'core_activityentry': ('name', 'description'),
+    'core_project': ('name', 'description'),
+    'core_organization': ('name',),
+}
+
+
+def index_statements(table, columns):
+    fts = '{}_fts'.format(table)
+    cols = ', '.join(columns)
+    new_cols = ', '.join('new.{}'.format(c) for c in columns)
+    old_cols = ', '.join('old.{}'.format(c) for c in columns)
+    return [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({cols}, content='{table}', content_rowid='id', "
+        "tokenize='unicode61 remove_diacritics 2', prefix='2 3')".format(fts=fts, cols=cols, table=table),
+
+        "CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+        "INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_cols}); END".format(
+            fts=fts, table=table, cols=cols, new_cols=new_cols),
+
+        "CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+        "INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_cols}); END".format(
+            fts=fts, table=table, cols=cols, old_cols=old_cols),
+
+        "CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {cols} ON {table} BEGIN "
+        "INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_cols}); "
+        "INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_cols}); END".format(
+            fts=fts, table=table, cols=cols, old_cols=old_cols, new_cols=new_cols),
+
+        "INSERT INTO {fts}({fts}) VALUES ('rebuild')".format(fts=fts),
+    ]
+
+
+def create_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+
+    for table, columns in SEARCH_INDEXES.items():
+        for statement in index_statements(table, columns):
+            schema_editor.execute(statement)
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+
+    for table in SEARCH_INDEXES:
+        fts = '{}_fts'.format(table)
+        for suffix in ('ai', 'ad', 'au'):
+            schema_editor.execute('DROP TRIGGER IF EXISTS {}_{}'.format(fts, suffix))
+        schema_editor.execute('DROP TABLE IF EXISTS {}'.format(fts))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_activityentry_organization_user'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,38 @@
+from django.db import migrations, models
+
+
+# frozen copy of core.utils.normalize_lookup_text as of this migration, later changes
+# to it need a migration of their own to recompute the columns
+def normalize_lookup_text(value):
+    return ' '.join((value or '').split()).casefold()
+
+
+def populate_lookup_fields(apps, schema_editor):
+    User = apps.get_model('core', 'User')
+
+    users = list(User.objects.only('id', 'email', 'name'))
+    for user in users:
+        user.email_lookup = normalize_lookup_text(user.email)[:255]
+        user.name_lookup = normalize_lookup_text(user.name)[:255]
+    User.objects.bulk_update(users, ['email_lookup', 'name_lookup'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='email_lookup',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='name_lookup',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=255),
+        ),
+        migrations.RunPython(populate_lookup_fields, migrations.RunPython.noop),
+    ]
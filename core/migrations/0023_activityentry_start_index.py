@@ -0,0 +1,17 @@
+# Generated by Django 3.0.14 on 2026-10-19 00:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_user_lookup_fields'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='activityentry',
+            index=models.Index(fields=['start'], name='core_entry_start'),
+        ),
+    ]
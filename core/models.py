@@ -4,7 +4,7 @@ from django.conf import settings
 from django.template.defaultfilters import slugify
 from django.utils.timezone import now
 
-from .utils import make_object_slug_field
+from .utils import ULID_LENGTH, make_object_slug_field, normalize_lookup_text
 
 
 class UserManager(BaseUserManager):
@@ -32,12 +32,24 @@ class User(AbstractBaseUser, PermissionsMixin):
     is_active = models.BooleanField(default=False)
     is_staff = models.BooleanField(default=False)
     phone_number = models.CharField(max_length=100, null=True)
+    # case normalized copies of email / name for indexed prefix lookups (autocomplete),
+    # maintained by save(), bulk_create callers have to set them
+    email_lookup = models.CharField(max_length=255, db_index=True, default='', editable=False)
+    name_lookup = models.CharField(max_length=255, db_index=True, default='', editable=False)
 
     objects = UserManager()
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = []
 
+    def save(self, *args, **kwargs):
+        self.email_lookup = normalize_lookup_text(self.email)[:255]
+        self.name_lookup = normalize_lookup_text(self.name)[:255]
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | {'email_lookup', 'name_lookup'}
+        return super().save(*args, **kwargs)
+
     def __str__(self):
         return self.email
 
@@ -60,7 +72,39 @@ class Organization(models.Model):
         return self.name
 
 
-class Project(models.Model):
+class CounterFieldsMixin:
+    '''Models with counters maintained by core.counters through F() updates, a plain
+    save() of an existing row leaves the counter columns alone so it cannot overwrite
+    concurrent increments with the stale values held in memory'''
+    counter_fields = ()
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in self.counter_fields
+            ]
+        return super().save(*args, **kwargs)
+
+
+class ProjectQuerySet(models.QuerySet):
+    def _contributors(self, user):
+        return ProjectContributor.objects.filter(project=models.OuterRef('pk'), user=user)
+
+    def contributed_to_by(self, user):
+        '''Projects the user is a ProjectContributor with at least one role on'''
+        return self.filter(models.Exists(self._contributors(user).with_any_role()))
+
+    def with_roles_for(self, user):
+        '''Annotates the user's project_admin, activity_viewer and activity_editor flags'''
+        return self.annotate(
+            project_admin=models.Exists(self._contributors(user).with_role(ProjectContributor.PROJECT_ADMIN)),
+            activity_viewer=models.Exists(self._contributors(user).with_role(ProjectContributor.ACTIVITY_VIEWER)),
+            activity_editor=models.Exists(self._contributors(user).with_role(ProjectContributor.ACTIVITY_EDITOR)),
+        )
+
+
+class Project(CounterFieldsMixin, models.Model):
     name = models.CharField(max_length=100)
     description = models.CharField(max_length=255)
     slug = models.SlugField(null=False, unique=True)
@@ -68,6 +112,14 @@ class Project(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     creator = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, on_delete=models.CASCADE)
     organization = models.ForeignKey(Organization, on_delete=models.CASCADE)
+    # maintained by core.counters
+    entry_count = models.PositiveIntegerField(default=0)
+    total_minutes = models.BigIntegerField(default=0)
+    contributor_count = models.PositiveIntegerField(default=0)
+
+    objects = ProjectQuerySet.as_manager()
+
+    counter_fields = ('entry_count', 'total_minutes', 'contributor_count')
 
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -78,15 +130,63 @@ class Project(models.Model):
         return self.name
 
 
-class ProjectContributor(models.Model):
+def role_values(mask):
+    '''All roles bitmask values having at least one of the bits in mask set,
+    filtering with roles__in on these can use the (user, roles, project) index'''
+    return [value for value in range(1, ProjectContributor.ALL_ROLES + 1) if value & mask]
+
+
+class ProjectContributorQuerySet(models.QuerySet):
+    def with_role(self, mask):
+        '''Contributors having any of the roles in mask'''
+        return self.filter(roles__in=role_values(mask))
+
+    def with_any_role(self):
+        return self.with_role(ProjectContributor.ALL_ROLES)
+
+
+def _role_property(role):
+    def getter(self):
+        return bool(self.roles & role)
+
+    def setter(self, value):
+        if value:
+            self.roles |= role
+        else:
+            self.roles &= ~role
+
+    return property(getter, setter)
+
+
+class ProjectContributor(CounterFieldsMixin, models.Model):
+    PROJECT_ADMIN = 1
+    ACTIVITY_VIEWER = 2
+    ACTIVITY_EDITOR = 4
+    ALL_ROLES = PROJECT_ADMIN | ACTIVITY_VIEWER | ACTIVITY_EDITOR
+
     user = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, on_delete=models.SET_NULL)
     project = models.ForeignKey(Project, on_delete=models.CASCADE)
-    activity_viewer = models.BooleanField(default=False)
-    activity_editor = models.BooleanField(default=False)
-    project_admin = models.BooleanField(default=False)
+    roles = models.PositiveSmallIntegerField(default=0)
     # rate = models.DecimalField(decimal_places=2, max_digits=6, blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # maintained by core.counters
+    entry_count = models.PositiveIntegerField(default=0)
+    total_minutes = models.BigIntegerField(default=0)
+
+    objects = ProjectContributorQuerySet.as_manager()
+
+    counter_fields = ('entry_count', 'total_minutes')
+
+    # boolean views of the roles bitmask, also accepted as model init kwargs
+    project_admin = _role_property(PROJECT_ADMIN)
+    activity_viewer = _role_property(ACTIVITY_VIEWER)
+    activity_editor = _role_property(ACTIVITY_EDITOR)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'roles', 'project'], name='core_contributor_user_roles'),
+        ]
 
     def __str__(self):
         return str(self.project) + ' ' + str(self.user)
@@ -95,18 +195,75 @@ class ProjectContributor(models.Model):
 class ActivityEntry(models.Model):
     name = models.CharField(max_length=100)
     description = models.CharField(max_length=255)
-    slug = models.SlugField(null=False, unique=True)
+    # unique per project, see Meta.constraints
+    slug = models.SlugField(null=False, db_index=False)
     contributor = models.ForeignKey(ProjectContributor, on_delete=models.CASCADE)
     project = models.ForeignKey(Project, on_delete=models.CASCADE)
+    # copies of project.organization and contributor.user so organization and user
+    # queries are range scans of the (organization, start) and (user, start) indexes,
+    # set in save() and kept in sync by core.denormalization
+    organization = models.ForeignKey(Organization, on_delete=models.CASCADE, db_index=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, on_delete=models.SET_NULL, db_index=False)
     start = models.DateTimeField(null=True, blank=True)
     end = models.DateTimeField(null=True, blank=True)
     minutes = models.IntegerField(default=0)
+    # optional client generated identifier (see core.utils.generate_ulid)
+    ulid = models.CharField(max_length=ULID_LENGTH, null=True, blank=True, unique=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['project', 'slug'], name='core_activityentry_project_slug'),
+        ]
+        indexes = [
+            models.Index(fields=['organization', 'start'], name='core_entry_org_start'),
+            models.Index(fields=['user', 'start'], name='core_entry_user_start'),
+            # admin date_hierarchy and changelist ordering across every entry
+            models.Index(fields=['start'], name='core_entry_start'),
+        ]
 
     def save(self, *args, **kwargs):
+        self.organization_id = self.project.organization_id
+        self.user_id = self.contributor.user_id
         if not self.slug:
-            self.slug = make_object_slug_field(ActivityEntry, self.name)
+            # entries with a ulid skip the name based slug queries
+            if self.ulid:
+                self.slug = self.ulid.lower()
+            else:
+                self.slug = make_object_slug_field(ActivityEntry, self.name, project_id=self.project_id)
         return super().save(*args, **kwargs)
 
     def __str__(self):
         return self.name
 
+
+
+class UserAccess(models.Model):
+    '''Effective rights of a user on an organization or on a project, denormalized
+    from Organization.members, Organization.contact and ProjectContributor so the
+    permission classes need a single primary key lookup. Rows are only written by
+    core.access which keeps them in sync with the source tables.'''
+    key = models.CharField(max_length=150, primary_key=True)
+    user_id = models.IntegerField(db_index=True)
+    organization_id = models.IntegerField(db_index=True)
+    project_id = models.IntegerField(null=True, db_index=True)
+    # the user's (first) ProjectContributor for project rows
+    contributor_id = models.IntegerField(null=True)
+    is_member = models.BooleanField(default=False)
+    is_contact = models.BooleanField(default=False)
+    # ProjectContributor.roles bitmask, for organization rows the union of the
+    # user's roles over all projects of the organization
+    roles = models.PositiveSmallIntegerField(default=0)
+
+    @staticmethod
+    def organization_key(user_id, org_slug):
+        return '{}:org:{}'.format(user_id, org_slug)
+
+    @staticmethod
+    def project_key(user_id, project_slug):
+        return '{}:project:{}'.format(user_id, project_slug)
+
+    def has_role(self, mask):
+        return bool(self.roles & mask)
+
+    def __str__(self):
+        return self.key
@@ -0,0 +1,153 @@
+import copy
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+
+from .metrics import record_cache_lookup
+from .models import Organization, Project
+
+
+###############################################################################################
+# Object Cache
+#
+# Read-through cache of Organization and Project rows by id and by slug with two tiers
+#
+# - shared tier (OBJECT_CACHE_SHARED_ALIAS, the default cache): one version number per
+#   row plus the pickled rows keyed by (id, version) and slug -> id entries
+# - local tier (OBJECT_CACHE_LOCAL_ALIAS, a per process LocMemCache): rows keyed by
+#   (id, version)
+#
+# Every lookup reads the row's current version from the shared tier, so a process never
+# serves a row from its local tier once any process bumped the version. Saving or
+# deleting a row bumps its version right away and again after commit. Rows are only
+# stored once the transaction that read them commits, so rows of rolled back
+# transactions never get cached.
+#
+# With the default in process cache backend every worker has its own shared tier and
+# never sees the version bumps of the others, the production settings require a shared
+# backend (memcached, redis) for the default cache. Authorization decisions and writes
+# only use cached rows when is_shared() (see get_current()). Queryset update() skips
+# signals, call invalidate() after it (see core.counters).
+
+def get_shared_cache():
+    return caches[getattr(settings, 'OBJECT_CACHE_SHARED_ALIAS', 'default')]
+
+
+def get_local_cache():
+    return caches[getattr(settings, 'OBJECT_CACHE_LOCAL_ALIAS', 'local')]
+
+
+def is_shared():
+    '''Whether every worker process sees the same shared tier'''
+    return not isinstance(get_shared_cache(), LocMemCache)
+
+
+class VersionedObjectCache:
+    def __init__(self, model, name):
+        self.model = model
+        self.name = name
+
+    def version_key(self, pk):
+        return 'obj-version:{}:{}'.format(self.name, pk)
+
+    def object_key(self, pk, version):
+        return 'obj:{}:{}:{}'.format(self.name, pk, version)
+
+    def slug_key(self, slug):
+        return 'obj-slug:{}:{}'.format(self.name, slug)
+
+    def get_version(self, pk):
+        shared = get_shared_cache()
+        version = shared.get(self.version_key(pk))
+        if version is None:
+            # start from the clock so a version evicted from the cache is never reused
+            shared.add(self.version_key(pk), time.time_ns(), None)
+            version = shared.get(self.version_key(pk))
+        return version
+
+    def get(self, pk):
+        '''Row of primary key pk or None'''
+        version = self.get_version(pk)
+        key = self.object_key(pk, version)
+        local = get_local_cache()
+
+        obj = local.get(key)
+        if obj is None:
+            obj = get_shared_cache().get(key)
+            if obj is not None:
+                local.set(key, obj, getattr(settings, 'OBJECT_CACHE_LOCAL_TIMEOUT', 300))
+        record_cache_lookup(self.name, obj is not None)
+        if obj is not None:
+            return obj
+
+        obj = self.model.objects.filter(pk=pk).first()
+        if obj is not None:
+            # the caller may modify obj before the transaction commits
+            snapshot = copy.deepcopy(obj)
+            transaction.on_commit(lambda: self.store(key, snapshot))
+        return obj
+
+    def get_current(self, pk):
+        '''Row of pk for authorization decisions, from the cache only when is_shared()'''
+        if is_shared():
+            return self.get(pk)
+        return self.model.objects.filter(pk=pk).first()
+
+    def get_by_slug(self, slug):
+        '''Row of slug or None'''
+        shared = get_shared_cache()
+        pk = shared.get(self.slug_key(slug))
+        if pk is not None:
+            obj = self.get(pk)
+            if obj is not None and obj.slug == slug:
+                return obj
+            shared.delete(self.slug_key(slug))
+
+        pk = self.model.objects.filter(slug=slug).values_list('pk', flat=True).first()
+        if pk is None:
+            return None
+        transaction.on_commit(lambda: shared.set(self.slug_key(slug), pk,
+                                                 getattr(settings, 'OBJECT_CACHE_TIMEOUT', 3600)))
+        return self.get(pk)
+
+    def store(self, key, obj):
+        get_shared_cache().set(key, obj, getattr(settings, 'OBJECT_CACHE_TIMEOUT', 3600))
+        get_local_cache().set(key, obj, getattr(settings, 'OBJECT_CACHE_LOCAL_TIMEOUT', 300))
+
+    def bump(self, pk):
+        shared = get_shared_cache()
+        try:
+            shared.incr(self.version_key(pk))
+        except ValueError:
+            shared.set(self.version_key(pk), time.time_ns(), None)
+
+    def invalidate(self, pk):
+        self.bump(pk)
+        transaction.on_commit(lambda: self.bump(pk))
+
+
+organization_cache = VersionedObjectCache(Organization, 'organization')
+project_cache = VersionedObjectCache(Project, 'project')
+
+
+###############################################################################################
+# Signal receivers, connected in CoreConfig.ready
+
+def organization_changed(sender, instance, **kwargs):
+    organization_cache.invalidate(instance.pk)
+
+
+def project_changed(sender, instance, **kwargs):
+    project_cache.invalidate(instance.pk)
+
+
+def connect_signals():
+    uid = 'core.object_cache.{}'.format
+    post_save.connect(organization_changed, sender=Organization, dispatch_uid=uid('organization_post_save'))
+    post_delete.connect(organization_changed, sender=Organization, dispatch_uid=uid('organization_post_delete'))
+    post_save.connect(project_changed, sender=Project, dispatch_uid=uid('project_post_save'))
+    post_delete.connect(project_changed, sender=Project, dispatch_uid=uid('project_post_delete'))
@@ -0,0 +1,194 @@
+import cProfile
+import json
+import logging
+import os
+import random
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.utils.text import slugify
+
+
+logger = logging.getLogger('timetracker.profiling')
+
+_local = threading.local()
+
+
+class RequestProfile:
+    '''Phase timings and SQL statistics collected over a single request.
+
+    Phases may nest, the time recorded against a phase excludes the time of any
+    phase started while it was running so the phases add up to the total.
+    '''
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.finished = None
+        self.phases = OrderedDict()
+        self.query_count = 0
+        self.query_time = 0.0
+        self._stack = []
+
+    def start(self, name):
+        self._stack.append([name, time.perf_counter(), 0.0])
+
+    def stop(self, name):
+        if not self._stack or self._stack[-1][0] != name:
+            return
+
+        _, started, child_time = self._stack.pop()
+        elapsed = time.perf_counter() - started
+        self.phases[name] = self.phases.get(name, 0.0) + elapsed - child_time
+        if self._stack:
+            self._stack[-1][2] += elapsed
+
+    def record_query(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.query_count += 1
+            self.query_time += time.perf_counter() - started
+
+    def finish(self):
+        self.finished = time.perf_counter()
+
+    @property
+    def total(self):
+        return (self.finished or time.perf_counter()) - self.started
+
+    def server_timing(self):
+        '''Value for the Server-Timing response header, durations in milliseconds'''
+        metrics = ['{};dur={:.2f}'.format(name, duration * 1000) for name, duration in self.phases.items()]
+        metrics.append('db;dur={:.2f};desc="{} queries"'.format(self.query_time * 1000, self.query_count))
+        metrics.append('total;dur={:.2f}'.format(self.total * 1000))
+        return ', '.join(metrics)
+
+    def to_dict(self):
+        return {
+            'phases_ms': {name: round(duration * 1000, 3) for name, duration in self.phases.items()},
+            'query_count': self.query_count,
+            'query_ms': round(self.query_time * 1000, 3),
+            'total_ms': round(self.total * 1000, 3),
+        }
+
+
+def get_current_profile():
+    return getattr(_local, 'profile', None)
+
+
+@contextmanager
+def profile_phase(name):
+    '''Records the wrapped block as a phase of the current request profile,
+    does nothing when profiling is not enabled'''
+    profile = get_current_profile()
+    if profile is None:
+        yield
+        return
+
+    profile.start(name)
+    try:
+        yield
+    finally:
+        profile.stop(name)
+
+
+###############################################################################################
+# Profiling Middleware
+#
+# Opt-in with PROFILING_ENABLED, otherwise the middleware removes itself from the stack.
+#
+# - adds a Server-Timing header with auth, perm, view and render phases (recorded by
+#   api.views.APIViewMixin and this middleware) plus SQL time and query count
+# - logs one JSON line per request to the timetracker.profiling logger
+# - writes a cProfile dump to PROFILING_OUTPUT_DIR for a PROFILING_SAMPLE_RATE fraction
+#   of requests, or for requests sending PROFILING_TRIGGER_HEADER with a value equal to
+#   PROFILING_TRIGGER_TOKEN
+#
+# Should be first in MIDDLEWARE so the total covers the rest of the middleware.
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        if not getattr(settings, 'PROFILING_ENABLED', False):
+            raise MiddlewareNotUsed()
+
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'PROFILING_SAMPLE_RATE', 0.0)
+        self.output_dir = getattr(settings, 'PROFILING_OUTPUT_DIR', None)
+        self.trigger_token = getattr(settings, 'PROFILING_TRIGGER_TOKEN', None)
+        trigger_header = getattr(settings, 'PROFILING_TRIGGER_HEADER', 'X-Profile')
+        self.trigger_meta_key = 'HTTP_' + trigger_header.upper().replace('-', '_')
+
+    def __call__(self, request):
+        profile = RequestProfile()
+        profiler = cProfile.Profile() if self.should_profile(request) else None
+
+        _local.profile = profile
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(profile.record_query))
+
+                if profiler is not None:
+                    profiler.enable()
+                try:
+                    response = self.get_response(request)
+                finally:
+                    if profiler is not None:
+                        profiler.disable()
+        finally:
+            _local.profile = None
+
+        profile.finish()
+        response['Server-Timing'] = profile.server_timing()
+        self.log(request, response, profile)
+
+        if profiler is not None:
+            self.dump(request, profiler)
+
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered after the view returns, the post render
+        # callback closes the phase once rendering is done
+        profile = get_current_profile()
+        if profile is not None:
+            profile.start('render')
+            response.add_post_render_callback(lambda r: profile.stop('render'))
+        return response
+
+    def should_profile(self, request):
+        if not self.output_dir:
+            return False
+
+        if self.trigger_token and request.META.get(self.trigger_meta_key) == self.trigger_token:
+            return True
+
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def log(self, request, response, profile):
+        resolver_match = getattr(request, 'resolver_match', None)
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'route': resolver_match.url_name if resolver_match else None,
+            'status': response.status_code,
+        }
+        record.update(profile.to_dict())
+        logger.info(json.dumps(record))
+
+    def dump(self, request, profiler):
+        os.makedirs(self.output_dir, exist_ok=True)
+        filename = '{}-{}-{}-{}.prof'.format(
+            time.strftime('%Y%m%d%H%M%S'),
+            request.method.lower(),
+            slugify(request.path) or 'root',
+            uuid.uuid4().hex[:8]
+        )
+        profiler.dump_stats(os.path.join(self.output_dir, filename))
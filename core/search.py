@@ -0,0 +1,122 @@
+import re
+
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.db.models import Q
+
+
+###############################################################################################
+# Full Text Search
+#
+# On SQLite every searchable table gets an external content FTS5 index, <table>_fts, kept
+# in sync by AFTER INSERT / UPDATE OF / DELETE triggers, so bulk_create, queryset update()
+# and raw SQL are indexed too. The 0021 migration creates the indexes (with a frozen copy
+# of their definitions) and install_search_indexes(), which is idempotent, repairs them on
+# post_migrate because SQLite migrations that remake a table (AlterField and friends) drop
+# the table's triggers, in which case the index is rebuilt. Changing SEARCH_INDEXES needs a
+# migration as well.
+#
+# Other databases fall back to case insensitive containment filters.
+
+SEARCH_INDEXES = {
+    'core_activityentry': ('name', 'description'),
+    'core_project': ('name', 'description'),
+    'core_organization': ('name',),
+}
+
+_token_re = re.compile(r'\w+', re.UNICODE)
+
+
+def fts_table(table):
+    return '{}_fts'.format(table)
+
+
+def _index_statements(table, columns):
+    fts = fts_table(table)
+    cols = ', '.join(columns)
+    new_cols = ', '.join('new.{}'.format(c) for c in columns)
+    old_cols = ', '.join('old.{}'.format(c) for c in columns)
+    return [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({cols}, content='{table}', content_rowid='id', "
+        "tokenize='unicode61 remove_diacritics 2', prefix='2 3')".format(fts=fts, cols=cols, table=table),
+
+        "CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+        "INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_cols}); END".format(
+            fts=fts, table=table, cols=cols, new_cols=new_cols),
+
+        "CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+        "INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_cols}); END".format(
+            fts=fts, table=table, cols=cols, old_cols=old_cols),
+
+        # only text changes reindex, counter updates on core_project do not
+        "CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {cols} ON {table} BEGIN "
+        "INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_cols}); "
+        "INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_cols}); END".format(
+            fts=fts, table=table, cols=cols, old_cols=old_cols, new_cols=new_cols),
+    ]
+
+
+def install_search_indexes(using=DEFAULT_DB_ALIAS, repair_only=False):
+    '''Creates missing FTS tables / triggers, rebuilding the indexes whose triggers were
+    missing. With repair_only indexes that do not exist yet are left alone.'''
+    conn = connections[using]
+    if conn.vendor != 'sqlite':
+        return
+
+    with conn.cursor() as cursor:
+        for table, columns in SEARCH_INDEXES.items():
+            fts = fts_table(table)
+            if repair_only:
+                cursor.execute("SELECT count(*) FROM sqlite_master WHERE type = 'table' AND name = %s", [fts])
+                if not cursor.fetchone()[0]:
+                    continue
+
+            cursor.execute("SELECT count(*) FROM sqlite_master WHERE type = 'trigger' AND tbl_name = %s "
+                           "AND name LIKE %s", [table, fts + '_a_'])
+            complete = cursor.fetchone()[0] == 3
+            for statement in _index_statements(table, columns):
+                cursor.execute(statement)
+            if not complete:
+                cursor.execute("INSERT INTO {fts}({fts}) VALUES ('rebuild')".format(fts=fts))
+
+
+def install_search_indexes_post_migrate(sender, using, **kwargs):
+    install_search_indexes(using, repair_only=True)
+
+
+def fts_match_expression(text):
+    '''FTS5 query matching every word of text, the last one as a prefix, None when
+    text has no words. Words are quoted so user input cannot inject FTS5 syntax.'''
+    tokens = _token_re.findall(text or '')
+    if not tokens:
+        return None
+    return ' '.join('"{}"'.format(token) for token in tokens) + '*'
+
+
+def search(queryset, text):
+    '''Filters queryset to rows matching text, best matches first'''
+    model = queryset.model
+    table = model._meta.db_table
+    columns = SEARCH_INDEXES[table]
+
+    if connection.vendor != 'sqlite':
+        tokens = _token_re.findall(text or '')
+        if not tokens:
+            return queryset.none()
+        for token in tokens:
+            match = Q()
+            for column in columns:
+                match |= Q(**{'{}__icontains'.format(column): token})
+            queryset = queryset.filter(match)
+        return queryset.order_by('-pk')
+
+    expression = fts_match_expression(text)
+    if expression is None:
+        return queryset.none()
+
+    fts = fts_table(table)
+    return queryset.extra(
+        select={'search_rank': '{}.rank'.format(fts)},
+        tables=[fts],
+        where=['{table}.id = +{fts}.rowid'.format(fts=fts, table=table), '{} MATCH %s'.format(fts)],
+        params=[expression],
+    ).order_by('search_rank', '-pk')
@@ -0,0 +1,169 @@
+import json
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import transaction
+
+
+logger = logging.getLogger('timetracker.slow_queries')
+
+_local = threading.local()
+
+_whitespace_re = re.compile(r'\s+')
+_string_literal_re = re.compile(r"'(?:[^']|'')*'")
+_number_literal_re = re.compile(r'\b\d+(?:\.\d+)?\b')
+_in_list_re = re.compile(r'\((?:\s*(?:%s|\?)\s*,)+\s*(?:%s|\?)\s*\)')
+_savepoint_re = re.compile(r'"s\d+_x\d+"')
+
+
+def normalize_sql(sql):
+    '''Reduces a statement to its shape so that executions differing only by
+    literals or IN list length are grouped together'''
+    sql = _savepoint_re.sub('?', sql)
+    sql = _string_literal_re.sub('?', sql)
+    sql = _number_literal_re.sub('?', sql)
+    sql = sql.replace('%s', '?')
+    sql = _in_list_re.sub('(...)', sql)
+    return _whitespace_re.sub(' ', sql).strip()
+
+
+class RateLimiter:
+    '''Allows each key once per interval and at most max_events of any key per interval'''
+
+    def __init__(self, interval, max_events, max_keys=1000):
+        self.interval = interval
+        self.max_events = max_events
+        self.max_keys = max_keys
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.last_seen = OrderedDict()
+        self.window_started = 0.0
+        self.window_events = 0
+
+    def allow(self, key, now=None):
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            if now - self.window_started >= self.interval:
+                self.window_started = now
+                self.window_events = 0
+
+            if self.window_events >= self.max_events:
+                return False
+
+            last_seen = self.last_seen.get(key)
+            if last_seen is not None and now - last_seen < self.interval:
+                return False
+
+            self.last_seen[key] = now
+            self.last_seen.move_to_end(key)
+            while len(self.last_seen) > self.max_keys:
+                self.last_seen.popitem(last=False)
+
+            self.window_events += 1
+            return True
+
+
+###############################################################################################
+# Slow Query Log
+#
+# SlowQueryLogger is installed as an execute wrapper on every database connection (see
+# CoreConfig.ready) and SlowQueryMiddleware records which view / route the current thread
+# is serving. Queries slower than SLOW_QUERY_THRESHOLD_MS (0 disables) are logged as one
+# JSON line to the timetracker.slow_queries logger with
+#
+# - the view and route that issued it
+# - the normalized sql, the raw sql and its parameters
+# - the EXPLAIN QUERY PLAN (sqlite) or EXPLAIN (other vendors) output for SELECTs
+#
+# Each normalized statement is logged at most once per SLOW_QUERY_LOG_INTERVAL seconds and
+# no more than SLOW_QUERY_LOG_MAX_PER_INTERVAL statements are logged per interval so a
+# slow database does not get hammered with EXPLAINs.
+
+class SlowQueryLogger:
+    def __init__(self):
+        self.rate_limiter = RateLimiter(getattr(settings, 'SLOW_QUERY_LOG_INTERVAL', 60),
+                                        getattr(settings, 'SLOW_QUERY_LOG_MAX_PER_INTERVAL', 10))
+
+    def __call__(self, execute, sql, params, many, context):
+        threshold_ms = getattr(settings, 'SLOW_QUERY_THRESHOLD_MS', 0)
+        if not threshold_ms or getattr(_local, 'explaining', False):
+            return execute(sql, params, many, context)
+
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration_ms = (time.perf_counter() - started) * 1000
+            if duration_ms >= threshold_ms:
+                self.log(sql, params, many, context['connection'], duration_ms)
+
+    def log(self, sql, params, many, connection, duration_ms):
+        normalized = normalize_sql(sql)
+        if not self.rate_limiter.allow(normalized):
+            return
+
+        request_info = getattr(_local, 'request_info', None) or {}
+        record = {
+            'duration_ms': round(duration_ms, 3),
+            'view': request_info.get('view'),
+            'route': request_info.get('route'),
+            'normalized_sql': normalized,
+            'sql': sql,
+            'params': None if many else [str(param) for param in params or ()],
+            'explain': None if many else self.explain(connection, sql, params),
+        }
+        logger.warning(json.dumps(record))
+
+    def explain(self, connection, sql, params):
+        if not sql.lstrip().upper().startswith('SELECT'):
+            return None
+
+        prefix = 'EXPLAIN QUERY PLAN ' if connection.vendor == 'sqlite' else 'EXPLAIN '
+        _local.explaining = True
+        try:
+            # savepoint so a failed EXPLAIN does not break the caller's transaction
+            with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+                cursor.execute(prefix + sql, params)
+                return [' '.join(str(column) for column in row) for row in cursor.fetchall()]
+        except Exception as e:
+            return ['EXPLAIN failed: {}'.format(e)]
+        finally:
+            _local.explaining = False
+
+
+slow_query_logger = SlowQueryLogger()
+
+
+def install_slow_query_logger(sender, connection, **kwargs):
+    '''connection_created receiver, fires again whenever a connection is reopened'''
+    if slow_query_logger not in connection.execute_wrappers:
+        # connections (re)open in the middle of requests, while middleware have their
+        # execute_wrapper() context managers entered. Those pop() the last wrapper on
+        # exit, so appending would get the logger popped and leave theirs behind.
+        connection.execute_wrappers.insert(0, slow_query_logger)
+
+
+class SlowQueryMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        _local.request_info = {'view': None, 'route': None}
+        try:
+            return self.get_response(request)
+        finally:
+            _local.request_info = None
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, 'view_class', None) or getattr(view_func, 'cls', None)
+        view = view_class or view_func
+        _local.request_info = {
+            'view': '{}.{}'.format(view.__module__, view.__qualname__),
+            'route': request.resolver_match.url_name if request.resolver_match else None,
+        }
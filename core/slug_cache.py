@@ -0,0 +1,219 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.http import Http404
+
+from .models import Organization, Project
+from .object_cache import organization_cache, project_cache
+
+
+###############################################################################################
+# Slug Cache
+#
+# Bounded, per process LRU cache of organization slug -> id and project slug ->
+# (id, organization id) so url slugs resolve without joins and views fetch rows by primary
+# key. Only existing slugs are cached, and only once the transaction that read them
+# commits so rows created by a transaction that is rolled back never get cached.
+#
+# Every entry records the core.object_cache version of its row when it was resolved and
+# is only used while that version is current, so a rename or delete in any process (which
+# bumps the shared version) makes every process resolve the slug again. Saving or deleting
+# an Organization / Project also evicts its entries in the process doing the write, and
+# SLUG_CACHE_TTL bounds the life of entries regardless.
+
+class SlugCache:
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._keys_by_id = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        entry = self.get_versioned(key)
+        return None if entry is None else entry[0]
+
+    def get_versioned(self, key):
+        '''(value, version) of key or None'''
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires, version = entry
+            if expires < time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return value, version
+
+    def set(self, key, id_key, value, version=None):
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (value, time.monotonic() + self.ttl, version)
+            self._keys_by_id[id_key] = key
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+
+    def evict(self, key):
+        with self._lock:
+            self._remove(key)
+
+    def evict_id(self, id_key):
+        with self._lock:
+            key = self._keys_by_id.get(id_key)
+            if key is not None:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_id.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        id_key = self._id_key(key, entry[0])
+        if self._keys_by_id.get(id_key) == key:
+            del self._keys_by_id[id_key]
+
+    @staticmethod
+    def _id_key(key, value):
+        return (key[0], value[0] if isinstance(value, tuple) else value)
+
+
+slug_cache = SlugCache(getattr(settings, 'SLUG_CACHE_SIZE', 10000),
+                       getattr(settings, 'SLUG_CACHE_TTL', 300))
+
+
+def remember(key, id_key, value, version):
+    transaction.on_commit(lambda: slug_cache.set(key, id_key, value, version))
+
+
+def lookup(key, object_cache):
+    '''Cached value of key while the version of its row is current, None otherwise'''
+    entry = slug_cache.get_versioned(key)
+    if entry is None:
+        return None
+    value, version = entry
+    if version != object_cache.get_version(value[0] if isinstance(value, tuple) else value):
+        # renamed, moved or deleted since, possibly by another process
+        slug_cache.evict(key)
+        return None
+    return value
+
+
+def forget(id_key):
+    # again after commit, a concurrent request may have cached the old slug meanwhile
+    slug_cache.evict_id(id_key)
+    transaction.on_commit(lambda: slug_cache.evict_id(id_key))
+
+
+def resolve_organization_id(slug):
+    '''Organization id of slug or None'''
+    key = ('organization', slug)
+    value = lookup(key, organization_cache)
+    if value is None:
+        value = Organization.objects.filter(slug=slug).values_list('id', flat=True).first()
+        if value is not None:
+            # writers bump again after commit, only a write committing between this
+            # query and the version read goes unnoticed (until SLUG_CACHE_TTL)
+            remember(key, ('organization', value), value, organization_cache.get_version(value))
+    return value
+
+
+def resolve_project_ids(org_slug, project_slug):
+    '''(project id, organization id) of project_slug when it belongs to org_slug, or None'''
+    key = ('project', project_slug)
+    value = lookup(key, project_cache)
+    if value is None:
+        value = Project.objects.filter(slug=project_slug).values_list('id', 'organization_id').first()
+        if value is None:
+            return None
+        remember(key, ('project', value[0]), value, project_cache.get_version(value[0]))
+
+    if resolve_organization_id(org_slug) != value[1]:
+        return None
+    return value
+
+
+def get_organization_id_or_404(slug):
+    organization_id = resolve_organization_id(slug)
+    if organization_id is None:
+        raise Http404('Entity not found')
+    return organization_id
+
+
+def get_project_id_or_404(org_slug, project_slug):
+    ids = resolve_project_ids(org_slug, project_slug)
+    if ids is None:
+        raise Http404('Entity not found')
+    return ids[0]
+
+
+def get_organization_or_404(slug, queryset=None):
+    '''Organization of slug fetched by primary key, from core.object_cache unless a
+    queryset adding select_related / annotations is given'''
+    if queryset is None:
+        obj = organization_cache.get_by_slug(slug)
+        if obj is None:
+            raise Http404('Entity not found')
+        return obj
+
+    for attempt in range(2):
+        organization_id = resolve_organization_id(slug)
+        if organization_id is None:
+            break
+        obj = queryset.filter(pk=organization_id).first()
+        if obj is not None and obj.slug == slug:
+            return obj
+        # renamed or deleted by another process, resolve once more from the database
+        slug_cache.evict(('organization', slug))
+    raise Http404('Entity not found')
+
+
+def get_project_or_404(org_slug, project_slug, queryset=None):
+    '''Project of project_slug within org_slug fetched by primary key, from
+    core.object_cache unless a queryset adding select_related / annotations is given'''
+    if queryset is None:
+        obj = project_cache.get_by_slug(project_slug)
+        if obj is None or obj.organization_id != resolve_organization_id(org_slug):
+            raise Http404('Entity not found')
+        return obj
+
+    for attempt in range(2):
+        ids = resolve_project_ids(org_slug, project_slug)
+        if ids is None:
+            break
+        obj = queryset.filter(pk=ids[0]).first()
+        if obj is not None and (obj.slug, obj.organization_id) == (project_slug, ids[1]):
+            return obj
+        slug_cache.evict(('project', project_slug))
+        slug_cache.evict(('organization', org_slug))
+    raise Http404('Entity not found')
+
+
+###############################################################################################
+# Signal receivers, connected in CoreConfig.ready
+
+def organization_changed(sender, instance, **kwargs):
+    forget(('organization', instance.pk))
+
+
+def project_changed(sender, instance, **kwargs):
+    forget(('project', instance.pk))
+
+
+def connect_signals():
+    uid = 'core.slug_cache.{}'.format
+    post_save.connect(organization_changed, sender=Organization, dispatch_uid=uid('organization_post_save'))
+    post_delete.connect(organization_changed, sender=Organization, dispatch_uid=uid('organization_post_delete'))
+    post_save.connect(project_changed, sender=Project, dispatch_uid=uid('project_post_save'))
+    post_delete.connect(project_changed, sender=Project, dispatch_uid=uid('project_post_delete'))
@@ -1,3 +1,625 @@
-from django.test import TestCase
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection, transaction
+from django.http import Http404
+from django.shortcuts import reverse
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from core.access import find_user_access_drift, lock_organizations
+from core.counters import reconcile_counters
+from core.admin import EstimatedCountPaginator
+from core.models import Organization, Project, ProjectContributor, ActivityEntry, UserAccess
+from core.object_cache import organization_cache, project_cache
+from core.slug_cache import (
+    SlugCache,
+    get_organization_or_404,
+    get_project_id_or_404,
+    get_project_or_404,
+    slug_cache,
+)
+from core.utils import generate_ulid, normalize_ulid
+
+
+class SeedLoadDataCommandTests(TestCase):
+
+    def seed(self, **kwargs):
+        options = {
+            'organizations': 2,
+            'projects': 3,
+            'contributors': 3,
+            'members': 4,
+            'entries': 25,
+            'batch_size': 10,
+            'random_seed': 1,
+        }
+        options.update(kwargs)
+        call_command('seed_load_data', stdout=StringIO(), **options)
+
+    def test_seed_load_data_creates_expected_shape(self):
+        '''Tests seeding creates the requested number of rows with pre-computed slugs'''
+        self.seed()
+
+        self.assertEqual(2, Organization.objects.count())
+        self.assertEqual(8, get_user_model().objects.count())
+        self.assertEqual(6, Project.objects.count())
+        self.assertEqual(18, ProjectContributor.objects.count())
+        self.assertEqual(25, ActivityEntry.objects.count())
+
+        org = Organization.objects.get(slug='seed-org-0')
+        self.assertEqual(4, org.members.count())
+        self.assertTrue(Project.objects.filter(slug='seed-org-0-project-2', organization=org).exists())
+
+        # organization contact is project admin on every project
+        self.assertEqual(3, ProjectContributor.objects.filter(user=org.contact,
+                                                              project__organization=org)
+                                                      .with_role(ProjectContributor.PROJECT_ADMIN)
+                                                      .count())
+
+        project = Project.objects.get(slug='seed-org-0-project-0')
+        self.assertEqual(project.activityentry_set.count(), project.entry_count)
+
+        # entries always belong to the project of their contributor
+        for entry in ActivityEntry.objects.select_related('contributor'):
+            self.assertEqual(entry.project_id, entry.contributor.project_id)
+            self.assertTrue(entry.contributor.activity_editor)
+
+    def test_seed_load_data_existing_prefix_fails(self):
+        '''Tests seeding twice with the same prefix is rejected'''
+        self.seed(entries=0)
+        with self.assertRaises(CommandError):
+            self.seed(entries=0)
+
+        self.seed(entries=0, prefix='other')
+        self.assertEqual(4, Organization.objects.count())
+
+    def test_seed_load_data_builds_user_access(self):
+        '''Tests seeding rebuilds the user access rows skipped by bulk_create'''
+        self.seed(entries=0)
+        self.assertTrue(UserAccess.objects.exists())
+        self.assertEqual(([], [], []), find_user_access_drift())
+
+
+class ProjectContributorRolesTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(email='roles@mail.com', password='password1')
+        cls.org = Organization.objects.create(name='Roles Org', contact=cls.user)
+        cls.project = Project.objects.create(name='Roles Project', description='abc',
+                                             creator=cls.user, organization=cls.org)
+
+    def test_boolean_roles_map_to_bitmask(self):
+        '''Tests the boolean role attributes read and write the roles bitmask'''
+        contributor = ProjectContributor.objects.create(user=self.user, project=self.project,
+                                                        activity_viewer=True, activity_editor=True)
+        contributor.refresh_from_db()
+        self.assertEqual(ProjectContributor.ACTIVITY_VIEWER | ProjectContributor.ACTIVITY_EDITOR,
+                         contributor.roles)
+        self.assertFalse(contributor.project_admin)
+
+        contributor.activity_viewer = False
+        contributor.project_admin = True
+        contributor.save()
+        contributor.refresh_from_db()
+        self.assertEqual(ProjectContributor.PROJECT_ADMIN | ProjectContributor.ACTIVITY_EDITOR,
+                         contributor.roles)
+
+    def test_role_filters(self):
+        '''Tests filtering by role only matches contributors having one of the roles'''
+        viewer = ProjectContributor.objects.create(user=self.user, project=self.project, activity_viewer=True)
+        admin = ProjectContributor.objects.create(user=self.user, project=self.project, project_admin=True)
+        none = ProjectContributor.objects.create(user=self.user, project=self.project)
+
+        self.assertEqual({viewer, admin}, set(ProjectContributor.objects.with_any_role()))
+        self.assertEqual({admin}, set(ProjectContributor.objects.with_role(ProjectContributor.PROJECT_ADMIN)))
+        self.assertNotIn(none, ProjectContributor.objects.with_role(
+            ProjectContributor.ACTIVITY_VIEWER | ProjectContributor.ACTIVITY_EDITOR))
+
+
+class UserAccessTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        UserModel = get_user_model()
+        cls.contact = UserModel.objects.create_user(email='contact@mail.com', password='password1')
+        cls.member = UserModel.objects.create_user(email='member@mail.com', password='password1')
+        cls.org = Organization.objects.create(name='Access Org', contact=cls.contact)
+        cls.project = Project.objects.create(name='Access Project', description='abc',
+                                             creator=cls.contact, organization=cls.org)
+
+    def get_access(self, key):
+        return UserAccess.objects.filter(pk=key).first()
+
+    def assertNoDrift(self):
+        self.assertEqual(([], [], []), find_user_access_drift())
+
+    def test_contributor_changes_maintain_access(self):
+        '''Tests saving and deleting contributors updates organization and project rows'''
+        contributor = ProjectContributor.objects.create(user=self.member, project=self.project,
+                                                        activity_viewer=True)
+        org_key = UserAccess.organization_key(self.member.id, self.org.slug)
+        project_key = UserAccess.project_key(self.member.id, self.project.slug)
+        self.assertEqual(ProjectContributor.ACTIVITY_VIEWER, self.get_access(org_key).roles)
+        self.assertEqual(contributor.id, self.get_access(project_key).contributor_id)
+
+        contributor.project_admin = True
+        contributor.save()
+        self.assertTrue(self.get_access(project_key).has_role(ProjectContributor.PROJECT_ADMIN))
+        self.assertNoDrift()
+
+        contributor.delete()
+        self.assertIsNone(self.get_access(org_key))
+        self.assertIsNone(self.get_access(project_key))
+        self.assertNoDrift()
+
+    def test_refreshes_lock_their_organizations(self):
+        '''Tests every refresh locks the organization rows before deleting and inserting'''
+        with mock.patch('core.access.lock_organizations', wraps=lock_organizations) as lock:
+            self.org.members.add(self.member)
+            ProjectContributor.objects.create(user=self.member, project=self.project, activity_viewer=True)
+        self.assertEqual([mock.call(self.org.id)] * 2, lock.call_args_list)
+        self.assertNoDrift()
+
+    def test_membership_and_contact_changes_maintain_access(self):
+        '''Tests adding / removing members and changing the contact updates organization rows'''
+        org_key = UserAccess.organization_key(self.member.id, self.org.slug)
+        self.assertTrue(self.get_access(UserAccess.organization_key(self.contact.id, self.org.slug)).is_contact)
+
+        self.org.members.add(self.member)
+        self.assertTrue(self.get_access(org_key).is_member)
+
+        self.org.contact = self.member
+        self.org.save()
+        self.assertTrue(self.get_access(org_key).is_contact)
+        self.assertIsNone(self.get_access(UserAccess.organization_key(self.contact.id, self.org.slug)))
+        self.assertNoDrift()
+
+        self.member.organization_set.clear()
+        self.assertFalse(self.get_access(org_key).is_member)
+        self.assertNoDrift()
+
+    def test_slug_changes_and_deletes_maintain_access(self):
+        '''Tests renamed and deleted organizations and projects do not leave stale rows'''
+        ProjectContributor.objects.create(user=self.member, project=self.project, activity_editor=True)
+        self.org.members.add(self.member)
+
+        self.project.slug = 'renamed-project'
+        self.project.save()
+        self.assertIsNotNone(self.get_access(UserAccess.project_key(self.member.id, 'renamed-project')))
+        self.assertNoDrift()
+
+        self.org.slug = 'renamed-org'
+        self.org.save()
+        self.assertIsNotNone(self.get_access(UserAccess.organization_key(self.member.id, 'renamed-org')))
+        self.assertNoDrift()
+
+        self.project.delete()
+        self.assertFalse(UserAccess.objects.filter(project_id__isnull=False).exists())
+        self.assertNoDrift()
+
+        self.member.delete()
+        self.assertFalse(UserAccess.objects.filter(user_id=self.member.id).exists())
+        self.org.delete()
+        self.assertFalse(UserAccess.objects.exists())
+
+    def test_rebuild_user_access_command(self):
+        '''Tests --verify reports drift and a rebuild repairs it'''
+        ProjectContributor.objects.filter(pk=ProjectContributor.objects.create(
+            user=self.member, project=self.project).pk).update(roles=ProjectContributor.ALL_ROLES)
+
+        with self.assertRaises(CommandError):
+            call_command('rebuild_user_access', verify=True, stdout=StringIO())
+
+        call_command('rebuild_user_access', stdout=StringIO())
+        out = StringIO()
+        call_command('rebuild_user_access', verify=True, stdout=out)
+        self.assertIn('up to date', out.getvalue())
+
+
+class ULIDTests(TestCase):
+
+    def test_generate_ulid_is_time_ordered(self):
+        '''Tests generated ULIDs are valid and sort by their timestamp'''
+        earlier = generate_ulid(timestamp=1600000000)
+        later = generate_ulid(timestamp=1600000000.001)
+
+        self.assertEqual(26, len(earlier))
+        self.assertEqual(earlier, normalize_ulid(earlier.lower()))
+        self.assertLess(earlier, later)
+        self.assertEqual(earlier[:10], generate_ulid(timestamp=1600000000)[:10])
+
+    def test_normalize_ulid_rejects_invalid_values(self):
+        '''Tests values that are not ULIDs normalize to None'''
+        self.assertIsNone(normalize_ulid('standup'))
+        self.assertIsNone(normalize_ulid('8' * 26))
+        self.assertIsNone(normalize_ulid('I' * 26))
+        self.assertIsNone(normalize_ulid(None))
+
+
+class CounterTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(email='counters@mail.com', password='password1')
+        cls.org = Organization.objects.create(name='Counters Org', contact=cls.user)
+        cls.project1 = Project.objects.create(name='Counters Project 1', description='abc',
+                                              creator=cls.user, organization=cls.org)
+        cls.project2 = Project.objects.create(name='Counters Project 2', description='abc',
+                                              creator=cls.user, organization=cls.org)
+
+    def assertCounters(self, obj, **expected):
+        obj.refresh_from_db()
+        self.assertEqual(expected, {name: getattr(obj, name) for name in expected})
+
+    def test_counters_follow_writes(self):
+        '''Tests creating, updating, moving and deleting entries and contributors adjusts counters'''
+        contributor1 = ProjectContributor.objects.create(user=self.user, project=self.project1, activity_editor=True)
+        contributor2 = ProjectContributor.objects.create(user=self.user, project=self.project2, activity_editor=True)
+        self.assertCounters(self.project1, contributor_count=1)
+
+        entry = ActivityEntry.objects.create(name='Entry', description='abc', contributor=contributor1,
+                                             project=self.project1, minutes=30)
+        ActivityEntry.objects.create(name='Entry', description='abc', contributor=contributor1,
+                                     project=self.project1, minutes=15)
+        self.assertCounters(self.project1, entry_count=2, total_minutes=45)
+        self.assertCounters(contributor1, entry_count=2, total_minutes=45)
+
+        entry.minutes = 60
+        entry.save()
+        self.assertCounters(self.project1, entry_count=2, total_minutes=75)
+
+        entry.contributor = contributor2
+        entry.project = self.project2
+        entry.save()
+        self.assertCounters(self.project1, entry_count=1, total_minutes=15)
+        self.assertCounters(contributor2, entry_count=1, total_minutes=60)
+        self.assertCounters(self.project2, entry_count=1, total_minutes=60, contributor_count=1)
+
+        # a stale in memory project does not write its counters back
+        self.project2.name = 'Renamed'
+        self.project2.entry_count = 0
+        self.project2.save()
+        self.assertCounters(self.project2, entry_count=1, name='Renamed')
+
+        contributor1.delete()
+        self.assertCounters(self.project1, entry_count=0, total_minutes=0, contributor_count=0)
+
+    def test_reconcile_counters_command(self):
+        '''Tests reconcile_counters repairs counters that drifted through bulk writes'''
+        contributor = ProjectContributor.objects.create(user=self.user, project=self.project1, activity_editor=True)
+        ActivityEntry.objects.bulk_create([
+            ActivityEntry(name='Entry', description='abc', slug='entry-{}'.format(i),
+                          contributor=contributor, project=self.project1, organization=self.org,
+                          user=self.user, minutes=10)
+            for i in range(3)
+        ])
+        self.assertCounters(self.project1, entry_count=0)
+
+        out = StringIO()
+        call_command('reconcile_counters', dry_run=True, stdout=out)
+        self.assertIn('Drifted 1 Project rows', out.getvalue())
+        self.assertCounters(self.project1, entry_count=0)
+
+        call_command('reconcile_counters', stdout=StringIO())
+        self.assertCounters(self.project1, entry_count=3, total_minutes=30, contributor_count=1)
+        self.assertCounters(contributor, entry_count=3, total_minutes=30)
+
+        out = StringIO()
+        call_command('reconcile_counters', dry_run=True, stdout=out)
+        self.assertIn('Drifted 0 Project rows', out.getvalue())
+
+    def test_deletes_clamp_drifted_counters(self):
+        '''Tests deleting rows whose counters drifted below their real value keeps them at 0'''
+        contributor = ProjectContributor.objects.create(user=self.user, project=self.project1, activity_editor=True)
+        entry = ActivityEntry.objects.create(name='Entry', description='abc', contributor=contributor,
+                                             project=self.project1, minutes=30)
+        # as after bulk_create or queryset update(), which skip the signals
+        Project.objects.filter(pk=self.project1.pk).update(entry_count=0, contributor_count=0)
+        ProjectContributor.objects.filter(pk=contributor.pk).update(entry_count=0)
+
+        entry.delete()
+        contributor.delete()
+        self.assertCounters(self.project1, entry_count=0, total_minutes=0, contributor_count=0)
+
+        reconcile_counters()
+        self.assertCounters(self.project1, entry_count=0, total_minutes=0, contributor_count=0)
+
+
+class ActivityEntryDenormalizationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        UserModel = get_user_model()
+        cls.user1 = UserModel.objects.create_user(email='denorm1@mail.com', password='password1')
+        cls.user2 = UserModel.objects.create_user(email='denorm2@mail.com', password='password1')
+        cls.org1 = Organization.objects.create(name='Denorm Org 1', contact=cls.user1)
+        cls.org2 = Organization.objects.create(name='Denorm Org 2', contact=cls.user1)
+        cls.project = Project.objects.create(name='Denorm Project', description='abc',
+                                             creator=cls.user1, organization=cls.org1)
+
+    def test_organization_and_user_follow_project_and_contributor(self):
+        '''Tests entries copy organization and user on save and follow moved projects and contributors'''
+        contributor = ProjectContributor.objects.create(user=self.user1, project=self.project, activity_editor=True)
+        entry = ActivityEntry.objects.create(name='Entry', description='abc', contributor=contributor,
+                                             project=self.project, minutes=30)
+        self.assertEqual((self.org1.id, self.user1.id), (entry.organization_id, entry.user_id))
+
+        self.project.organization = self.org2
+        self.project.save()
+        contributor.user = self.user2
+        contributor.save()
+        entry.refresh_from_db()
+        self.assertEqual((self.org2.id, self.user2.id), (entry.organization_id, entry.user_id))
+        self.assertEqual(([], [], []), find_user_access_drift())
+
+        self.user2.delete()
+        entry.refresh_from_db()
+        self.assertIsNone(entry.user_id)
+
+
+class SlugCacheTests(TransactionTestCase):
+    '''Slugs are only cached once committed so these tests commit'''
+
+    def setUp(self):
+        self.addCleanup(slug_cache.clear)
+        slug_cache.clear()
+        caches['default'].clear()
+        self.addCleanup(caches['default'].clear)
+        user = get_user_model().objects.create_user(email='slugs@mail.com', password='password1')
+        self.org = Organization.objects.create(name='Slug Org', contact=user)
+        self.other_org = Organization.objects.create(name='Other Slug Org', contact=user)
+        self.project = Project.objects.create(name='Slug Project', description='abc',
+                                              creator=user, organization=self.org)
+
+    def test_lru_evicts_least_recently_used_and_expired(self):
+        '''Tests the cache stays within max_size and drops entries past their ttl'''
+        cache = SlugCache(max_size=2, ttl=60)
+        cache.set(('organization', 'a'), ('organization', 1), 1)
+        cache.set(('organization', 'b'), ('organization', 2), 2)
+        cache.get(('organization', 'a'))
+        cache.set(('organization', 'c'), ('organization', 3), 3)
+        self.assertEqual((1, None, 3), tuple(cache.get(('organization', k)) for k in 'abc'))
+
+        cache.evict_id(('organization', 3))
+        self.assertIsNone(cache.get(('organization', 'c')))
+
+        cache = SlugCache(max_size=2, ttl=-1)
+        cache.set(('organization', 'a'), ('organization', 1), 1)
+        self.assertIsNone(cache.get(('organization', 'a')))
+
+    def test_resolves_by_primary_key_once_cached(self):
+        '''Tests cached slugs resolve without queries and fetch rows by primary key'''
+        self.assertEqual(self.project.id, get_project_id_or_404(self.org.slug, self.project.slug))
+        with self.assertNumQueries(0):
+            self.assertEqual(self.project.id, get_project_id_or_404(self.org.slug, self.project.slug))
+        with self.assertNumQueries(1):
+            self.assertEqual(self.project, get_project_or_404(self.org.slug, self.project.slug,
+                                                              Project.objects.all()))
+
+        with self.assertRaises(Http404):
+            get_project_id_or_404(self.other_org.slug, self.project.slug)
+
+    def test_rename_move_and_delete_invalidate(self):
+        '''Tests saving or deleting a row evicts its slug'''
+        old_slug = self.project.slug
+        get_project_id_or_404(self.org.slug, old_slug)
+
+        self.project.slug = 'renamed-slug-project'
+        self.project.save()
+        with self.assertRaises(Http404):
+            get_project_id_or_404(self.org.slug, old_slug)
+        self.assertEqual(self.project.id, get_project_id_or_404(self.org.slug, 'renamed-slug-project'))
+
+        self.project.organization = self.other_org
+        self.project.save()
+        with self.assertRaises(Http404):
+            get_project_id_or_404(self.org.slug, 'renamed-slug-project')
+        self.assertEqual(self.project.id, get_project_id_or_404(self.other_org.slug, 'renamed-slug-project'))
+
+        self.project.delete()
+        with self.assertRaises(Http404):
+            get_project_id_or_404(self.other_org.slug, 'renamed-slug-project')
+
+    def test_version_bumps_by_other_processes_evict(self):
+        '''Tests a slug another process renamed and reused (no signal here) resolves to the
+        row holding it now once the renamed row's version was bumped'''
+        old_slug = self.project.slug
+        get_project_id_or_404(self.org.slug, old_slug)
+
+        Project.objects.filter(pk=self.project.pk).update(slug='renamed-elsewhere')
+        project_cache.bump(self.project.pk)
+        other = Project.objects.create(name='Other Slug Project', description='abc', organization=self.org)
+        Project.objects.filter(pk=other.pk).update(slug=old_slug)
+
+        self.assertEqual(other.id, get_project_id_or_404(self.org.slug, old_slug))
+
+    def test_stale_entries_are_detected_on_fetch(self):
+        '''Tests a slug renamed by another process (no signal here) resolves again'''
+        organizations = Organization.objects.all()
+        get_organization_or_404(self.org.slug, organizations)
+        Organization.objects.filter(pk=self.org.pk).update(slug='renamed-elsewhere')
+        Organization.objects.filter(pk=self.other_org.pk).update(slug=self.org.slug)
+
+        self.assertEqual(self.other_org.id, get_organization_or_404(self.org.slug, organizations).id)
+
+
+class ObjectCacheTests(TransactionTestCase):
+    '''Rows are only cached once committed so these tests commit'''
+
+    def setUp(self):
+        for alias in ('default', 'local'):
+            caches[alias].clear()
+            self.addCleanup(caches[alias].clear)
+        self.user = get_user_model().objects.create_user(email='objects@mail.com', password='password1')
+        self.org = Organization.objects.create(name='Object Org', contact=self.user)
+        self.project = Project.objects.create(name='Object Project', description='abc',
+                                              creator=self.user, organization=self.org)
+
+    def test_reads_through_by_id_and_slug(self):
+        '''Tests rows are read from the database once, then from the cache'''
+        with self.assertNumQueries(1):
+            self.assertEqual(self.org, organization_cache.get(self.org.id))
+        with self.assertNumQueries(0):
+            self.assertEqual('Object Org', organization_cache.get(self.org.id).name)
+
+        with self.assertNumQueries(2):
+            self.assertEqual(self.project, project_cache.get_by_slug(self.project.slug))
+        with self.assertNumQueries(0):
+            self.assertEqual(self.project, project_cache.get_by_slug(self.project.slug))
+
+        self.assertIsNone(organization_cache.get(0))
+        self.assertIsNone(project_cache.get_by_slug('missing'))
+
+    def test_save_delete_and_counter_updates_bump_versions(self):
+        '''Tests writes make the next read return the new row'''
+        project_cache.get(self.project.id)
+        self.project.name = 'Renamed Project'
+        self.project.save()
+        self.assertEqual('Renamed Project', project_cache.get(self.project.id).name)
+
+        contributor = ProjectContributor.objects.create(user=self.user, project=self.project, activity_editor=True)
+        ActivityEntry.objects.create(name='Entry', description='abc', contributor=contributor,
+                                     project=self.project, minutes=30)
+        project = project_cache.get(self.project.id)
+        self.assertEqual((1, 30, 1), (project.entry_count, project.total_minutes, project.contributor_count))
+
+        old_slug = self.project.slug
+        self.project.slug = 'renamed-object-project'
+        self.project.save()
+        self.assertIsNone(project_cache.get_by_slug(old_slug))
+        self.assertEqual(self.project.id, project_cache.get_by_slug('renamed-object-project').id)
+
+        self.project.delete()
+        self.assertIsNone(project_cache.get(self.project.id))
+
+    def test_version_bumps_reach_other_processes(self):
+        '''Tests the local tier is bypassed once the shared tier has a newer version, as
+        after a write by another worker'''
+        organization_cache.get(self.org.id)
+        caches['default'].delete(organization_cache.object_key(self.org.id, organization_cache.get_version(self.org.id)))
+        with self.assertNumQueries(0):
+            organization_cache.get(self.org.id)
+
+        Organization.objects.filter(pk=self.org.id).update(name='Renamed Elsewhere')
+        organization_cache.bump(self.org.id)
+        self.assertEqual('Renamed Elsewhere', organization_cache.get(self.org.id).name)
+
+    def test_rolled_back_reads_are_not_cached(self):
+        '''Tests rows read inside a transaction that rolls back are not stored'''
+        try:
+            with transaction.atomic():
+                organization_cache.get(self.org.id)
+                raise RuntimeError('rollback')
+        except RuntimeError:
+            pass
+
+        with self.assertNumQueries(1):
+            organization_cache.get(self.org.id)
+
+
+class AdminTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = get_user_model().objects.create_superuser('admin@mail.com', 'password1')
+        cls.org = Organization.objects.create(name='Admin Org', contact=cls.admin_user)
+        cls.project = Project.objects.create(name='Admin Project', description='abc',
+                                             creator=cls.admin_user, organization=cls.org)
+
+    def setUp(self):
+        self.client.force_login(self.admin_user)
+
+    def create_entries(self, count):
+        first = ActivityEntry.objects.count()
+        for i in range(first, first + count):
+            user = get_user_model().objects.create_user(email='admin-{}@mail.com'.format(i), password='password1')
+            contributor = ProjectContributor.objects.create(user=user, project=self.project, activity_editor=True)
+            ActivityEntry.objects.create(name='Entry {}'.format(i), description='abc', contributor=contributor,
+                                         project=self.project, minutes=30)
+
+    def count_changelist_queries(self, view_name):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse(view_name))
+        self.assertEqual(200, response.status_code)
+        return len(context)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        '''Tests the entry and contributor changelists join their relations instead of
+        loading them per row'''
+        self.create_entries(1)
+        entry_queries = self.count_changelist_queries('admin:core_activityentry_changelist')
+        contributor_queries = self.count_changelist_queries('admin:core_projectcontributor_changelist')
+
+        self.create_entries(5)
+        self.assertEqual(entry_queries, self.count_changelist_queries('admin:core_activityentry_changelist'))
+        self.assertEqual(contributor_queries,
+                         self.count_changelist_queries('admin:core_projectcontributor_changelist'))
+
+    def test_change_forms_do_not_list_related_rows(self):
+        '''Tests the entry change form uses raw id inputs instead of selects of every row'''
+        self.create_entries(1)
+        entry = ActivityEntry.objects.get()
+        response = self.client.get(reverse('admin:core_activityentry_change', args=(entry.id,)))
+        self.assertContains(response, 'vForeignKeyRawIdAdminField', count=2)
+        # organization and user follow the contributor and project, they are shown but not editable
+        self.assertNotContains(response, 'name="organization"')
+        self.assertNotContains(response, 'name="user"')
+        self.assertContains(response, 'field-organization')
+        self.assertNotContains(response, '<select name="contributor"')
+
+    def test_counters_are_read_only_and_roles_are_flags(self):
+        '''Tests counters are not editable and the role flags update the roles bitmask'''
+        self.create_entries(1)
+        contributor = ProjectContributor.objects.get()
+        url = reverse('admin:core_projectcontributor_change', args=(contributor.id,))
+        response = self.client.get(url)
+        self.assertNotContains(response, 'name="entry_count"')
+        self.assertNotContains(response, 'name="roles"')
+        self.assertContains(response, 'id="id_activity_editor" checked')
+
+        response = self.client.get(reverse('admin:core_project_change', args=(self.project.id,)))
+        self.assertNotContains(response, 'name="contributor_count"')
+
+        response = self.client.post(url, {
+            'project': self.project.id,
+            'user': contributor.user_id,
+            'project_admin': 'on',
+            'activity_viewer': 'on',
+        })
+        self.assertEqual(302, response.status_code)
+        contributor.refresh_from_db()
+        self.assertEqual(ProjectContributor.PROJECT_ADMIN | ProjectContributor.ACTIVITY_VIEWER, contributor.roles)
+        self.assertEqual((1, 30), (contributor.entry_count, contributor.total_minutes))
+
+    def test_export_csv_streams_selected_rows(self):
+        '''Tests the export action streams a header and one row per selected entry'''
+        self.create_entries(3)
+        ids = list(ActivityEntry.objects.order_by('pk').values_list('pk', flat=True))
+        response = self.client.post(reverse('admin:core_activityentry_changelist'), {
+            'action': 'export_as_csv',
+            '_selected_action': ids[:2],
+        })
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(3, len(lines))
+        self.assertTrue(lines[0].startswith('id,ulid,slug,name'))
+        self.assertTrue(lines[1].startswith('{},'.format(ids[0])))
+
+    def test_unfiltered_counts_are_estimated_above_the_limit(self):
+        '''Tests only unfiltered querysets of tables above ADMIN_EXACT_COUNT_LIMIT are estimated'''
+        self.create_entries(3)
+        ActivityEntry.objects.filter(name='Entry 1').delete()
+        entries = ActivityEntry.objects.order_by('pk')
+
+        with override_settings(ADMIN_EXACT_COUNT_LIMIT=1):
+            # the largest id bounds the count without scanning the table
+            self.assertEqual(3, EstimatedCountPaginator(entries, 10).count)
+            self.assertEqual(1, EstimatedCountPaginator(entries.filter(name='Entry 0'), 10).count)
+        with override_settings(ADMIN_EXACT_COUNT_LIMIT=10000):
+            self.assertEqual(2, EstimatedCountPaginator(entries, 10).count)
@@ -1,3 +1,7 @@
+import os
+import re
+import time
+
 from django.conf import settings
 from django.contrib.auth.tokens import default_token_generator
 from django.contrib.auth import get_user_model
@@ -43,12 +47,54 @@ def send_activate_account_email(request, email,
     email_message.send()
 
 
-def make_object_slug_field(klass, slug_input):
+def make_object_slug_field(klass, slug_input, **scope):
+    '''Slug for slug_input not yet used by klass, scope limits the uniqueness check
+    for models whose slugs are only unique together with other fields'''
     slug = slugify(slug_input)
     for i in range(2, 10000):
-        try:
-            _ = klass.objects.get(slug=slug)
-            slug = '{}-{}'.format(slugify(slug_input), i)
-        except klass.DoesNotExist:
+        if not klass.objects.filter(slug=slug, **scope).exists():
             break
+        slug = '{}-{}'.format(slugify(slug_input), i)
     return slug
+
+
+###############################################################################################
+# ULID
+#
+# 26 character, time sortable identifiers (https://github.com/ulid/spec), a 48 bit
+# millisecond timestamp followed by 80 random bits in Crockford's base32. Clients can
+# generate them offline and, being time ordered, new rows land at the end of the index.
+
+ULID_ALPHABET = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+ULID_LENGTH = 26
+
+_ulid_re = re.compile(r'^[0-7][0-9A-HJKMNP-TV-Z]{25}$')
+
+
+def generate_ulid(timestamp=None):
+    milliseconds = int((time.time() if timestamp is None else timestamp) * 1000)
+    value = (milliseconds << 80) | int.from_bytes(os.urandom(10), 'big')
+    chars = []
+    for _ in range(ULID_LENGTH):
+        value, index = divmod(value, 32)
+        chars.append(ULID_ALPHABET[index])
+    return ''.join(reversed(chars))
+
+
+def normalize_ulid(value):
+    '''Canonical (upper case) form of value or None if it is not a ULID'''
+    if not isinstance(value, str):
+        return None
+    value = value.upper()
+    return value if _ulid_re.match(value) else None
+
+
+def normalize_lookup_text(value):
+    '''Case and surrounding whitespace insensitive form of value for prefix lookups'''
+    return ' '.join((value or '').split()).casefold()
+
+
+def prefix_range(field, prefix):
+    '''Filter kwargs matching rows whose field starts with prefix as a plain index
+    range scan, unlike __startswith which SQLite runs as a case insensitive LIKE'''
+    return {'{}__gte'.format(field): prefix, '{}__lt'.format(field): prefix + '\U0010ffff'}
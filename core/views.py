@@ -1,3 +1,26 @@
-from django.shortcuts import render
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.http import require_GET
 
-# Create your views here.
+from prometheus_client import CONTENT_TYPE_LATEST
+
+from .metrics import render_metrics
+
+
+def metrics_allowed(request):
+    '''Scrapers are allowed from METRICS_ALLOWED_IPS or with an Authorization: Bearer
+    METRICS_TOKEN header'''
+    if request.META.get('REMOTE_ADDR') in getattr(settings, 'METRICS_ALLOWED_IPS', ()):
+        return True
+
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    authorization = request.META.get('HTTP_AUTHORIZATION', '')
+    return bool(token) and constant_time_compare(authorization, 'Bearer {}'.format(token))
+
+
+@require_GET
+def metrics_view(request):
+    if not metrics_allowed(request):
+        return HttpResponseForbidden()
+    return HttpResponse(render_metrics(), content_type=CONTENT_TYPE_LATEST)
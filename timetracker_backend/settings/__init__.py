@@ -0,0 +1,18 @@
+"""
+Selects the settings profile from the DJANGO_SETTINGS_PROFILE environment
+variable, one of development (default), test or production. manage.py test
+defaults it to test.
+"""
+
+import os
+
+_profile = os.environ.get('DJANGO_SETTINGS_PROFILE', 'development')
+
+if _profile == 'production':
+    from .production import *  # noqa: F401,F403
+elif _profile == 'test':
+    from .test import *  # noqa: F401,F403
+elif _profile == 'development':
+    from .development import *  # noqa: F401,F403
+else:
+    raise ValueError('Unknown DJANGO_SETTINGS_PROFILE {}'.format(_profile))
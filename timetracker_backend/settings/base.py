@@ -0,0 +1,285 @@
+"""
+Django settings for timetracker_backend project shared by every profile,
+see timetracker_backend/settings/__init__.py for how a profile is selected.
+
+Generated by 'django-admin startproject' using Django 3.0.8.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/3.0/topics/settings/
+
+For the full list of settings and their values, see
+https://docs.djangoproject.com/en/3.0/ref/settings/
+"""
+
+import os
+from datetime import timedelta
+from dotenv import load_dotenv
+
+# Build paths inside the project like this: os.path.join(BASE_DIR, ...)
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+load_dotenv(dotenv_path=os.path.join(os.path.dirname(BASE_DIR), '.env.backend'), verbose=True)
+
+
+# Quick-start development settings - unsuitable for production
+# See https://docs.djangoproject.com/en/3.0/howto/deployment/checklist/
+
+# SECURITY WARNING: keep the secret key used in production secret!
+SECRET_KEY = os.environ['SECRET_KEY']
+
+# SECURITY WARNING: don't run with debug turned on in production!
+# only the development profile turns it on, with DEBUG every executed
+# query is retained in connection.queries
+DEBUG = False
+
+ALLOWED_HOSTS = os.environ['ALLOWED_HOSTS'].split()
+
+
+# Application definition
+
+INSTALLED_APPS = [
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.sites',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'rest_framework',
+    'dj_rest_auth',
+    'core',
+    'api',
+]
+
+MIDDLEWARE = [
+    'core.profiling.ProfilingMiddleware',
+    'core.metrics.MetricsMiddleware',
+    'core.slow_queries.SlowQueryMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'core.middleware.LeanSessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'core.middleware.LeanCsrfViewMiddleware',
+    'core.middleware.LeanAuthenticationMiddleware',
+    'core.middleware.LeanMessageMiddleware',
+    'core.middleware.LeanXFrameOptionsMiddleware',
+]
+
+# requests under this prefix carrying a Bearer token skip the session, CSRF,
+# messages and X-Frame-Options middleware (see core/middleware.py)
+LEAN_API_PATH_PREFIX = '/api/'
+LEAN_API_EXCLUDED_PATH_PREFIXES = ('/api/v1/auth/',)
+
+ROOT_URLCONF = 'timetracker_backend.urls'
+
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'DIRS': [],
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.debug',
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+            ],
+        },
+    },
+]
+
+WSGI_APPLICATION = 'timetracker_backend.wsgi.application'
+
+
+# Database
+# https://docs.djangoproject.com/en/3.0/ref/settings/#databases
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+    }
+}
+
+
+# Password validation
+# https://docs.djangoproject.com/en/3.0/ref/settings/#auth-password-validators
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
+    },
+]
+
+
+# Internationalization
+# https://docs.djangoproject.com/en/3.0/topics/i18n/
+
+LANGUAGE_CODE = 'en-us'
+
+TIME_ZONE = 'UTC'
+
+USE_I18N = True
+
+USE_L10N = True
+
+USE_TZ = True
+
+
+# Static files (CSS, JavaScript, Images)
+# https://docs.djangoproject.com/en/3.0/howto/static-files/
+
+STATIC_URL = '/static/'
+
+#######################################################
+# AUTH SETTINGS
+#
+AUTH_USER_MODEL = 'core.User'
+
+SITE_ID = 1
+
+REST_FRAMEWORK = {
+    'DEFAULT_PERMISSION_CLASSES': (
+        'rest_framework.permissions.IsAuthenticated',
+    ),
+    'DEFAULT_AUTHENTICATION_CLASSES': (
+        'rest_framework.authentication.SessionAuthentication',
+        'api.authentication.CachedJWTAuthentication',
+    ),
+}
+
+# seconds a user resolved from a JWT is cached (see api/authentication.py),
+# also how long other workers may honor a deactivated user unless the alias
+# is shared by every worker as required by the production profile
+AUTH_USER_CACHE_ALIAS = 'default'
+AUTH_USER_CACHE_TIMEOUT = 60
+
+REST_USE_JWT = True
+
+REST_AUTH_SERIALIZERS = {
+    'USER_DETAILS_SERIALIZER': 'api.serializers.UserSerializer',
+}
+
+SIMPLE_JWT = {
+    'ACCESS_TOKEN_LIFETIME': timedelta(minutes=5),
+    'REFRESH_TOKEN_LIFETIME': timedelta(days=14),
+    'ROTATE_REFRESH_TOKENS': True,
+    'BLACKLIST_AFTER_ROTATION': False,
+    'ALGORITHM': 'HS256',
+    'SIGNING_KEY': SECRET_KEY,
+    'VERIFICATION_KEY': None,
+    'AUTH_HEADER_TYPES': ('Bearer',),
+    'USER_ID_FIELD': 'id',
+    'USER_ID_CLAIM': 'user_id',
+    'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
+    'TOKEN_TYPE_CLAIM': 'token_type',
+}
+
+##########################################################
+# PROFILING SETTINGS (see core/profiling.py)
+#
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'False') == 'True'
+PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', '0'))
+PROFILING_TRIGGER_HEADER = 'X-Profile'
+PROFILING_TRIGGER_TOKEN = os.environ.get('PROFILING_TRIGGER_TOKEN')
+PROFILING_OUTPUT_DIR = os.environ.get('PROFILING_OUTPUT_DIR', os.path.join(BASE_DIR, 'profiles'))
+
+
+##########################################################
+# METRICS SETTINGS (see core/metrics.py)
+#
+# for multiple worker processes also set the prometheus_multiproc_dir
+# environment variable to a directory shared by the workers
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'True') == 'True'
+# /metrics exposes route names and traffic, it only answers clients from
+# METRICS_ALLOWED_IPS (REMOTE_ADDR, so the address of the proxy when behind one)
+# or sending an Authorization: Bearer METRICS_TOKEN header
+METRICS_ALLOWED_IPS = os.environ.get('METRICS_ALLOWED_IPS', '127.0.0.1 ::1').split()
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
+
+##########################################################
+# SLOW QUERY LOG SETTINGS (see core/slow_queries.py)
+#
+# 0 disables the slow query log
+SLOW_QUERY_THRESHOLD_MS = float(os.environ.get('SLOW_QUERY_THRESHOLD_MS', '0'))
+SLOW_QUERY_LOG_INTERVAL = 60
+SLOW_QUERY_LOG_MAX_PER_INTERVAL = 10
+
+
+##########################################################
+# BATCH API SETTINGS (see api/batch.py)
+#
+# BATCH_MAX_WORKERS threads run independent read sub-requests of a batch
+# in parallel, 0 runs every sub-request sequentially
+BATCH_MAX_REQUESTS = 25
+BATCH_MAX_WORKERS = int(os.environ.get('BATCH_MAX_WORKERS', '4'))
+
+
+##########################################################
+# REQUEST COALESCING SETTINGS (see api/coalescing.py)
+#
+# concurrent identical reads of the designated list views share one
+# computation, waiting at most REQUEST_COALESCING_TIMEOUT seconds for it
+REQUEST_COALESCING = os.environ.get('REQUEST_COALESCING', 'True') == 'True'
+REQUEST_COALESCING_TIMEOUT = 30
+
+
+##########################################################
+# SLUG CACHE SETTINGS (see core/slug_cache.py)
+#
+# per process LRU of organization / project slug -> id, entries are checked
+# against the object cache versions, SLUG_CACHE_TTL (seconds) bounds their life
+SLUG_CACHE_SIZE = 10000
+SLUG_CACHE_TTL = 300
+
+
+##########################################################
+# OBJECT CACHE SETTINGS (see core/object_cache.py)
+#
+# 'default' is the shared tier and defaults to an in process cache, the
+# production profile points it at memcached (CACHE_BACKEND, CACHE_LOCATION)
+# so every worker sees the same versions, 'local' is each process' own tier
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'default',
+    },
+    'local': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'local',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+OBJECT_CACHE_SHARED_ALIAS = 'default'
+OBJECT_CACHE_LOCAL_ALIAS = 'local'
+OBJECT_CACHE_TIMEOUT = 3600
+OBJECT_CACHE_LOCAL_TIMEOUT = 300
+
+
+##########################################################
+# ADMIN SETTINGS (see core/admin.py)
+#
+# unfiltered changelists of larger tables show estimated counts
+ADMIN_EXACT_COUNT_LIMIT = 10000
+
+
+##########################################################
+# EMAIL SETTINGS
+#
+EMAIL_BACKEND = os.environ['EMAIL_BACKEND']
+
+EMAIL_USE_TLS = True
+EMAIL_HOST = os.environ['EMAIL_HOST']
+EMAIL_HOST_USER = os.environ['EMAIL_HOST_USER']
+EMAIL_HOST_PASSWORD = os.environ['EMAIL_HOST_PASSWORD']
+EMAIL_PORT = 587
+DEFAULT_FROM_EMAIL = os.environ['DEFAULT_FROM_EMAIL']
@@ -0,0 +1,13 @@
+from .base import *  # noqa: F401,F403
+
+
+DEBUG = True
+
+INSTALLED_APPS = INSTALLED_APPS + [
+    'django_extensions',
+]
+
+##########################################################
+# Django Extensions Settings
+#
+SHELL_PLUS_PRINT_SQL = True
@@ -0,0 +1,28 @@
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .base import *  # noqa: F401,F403
+
+
+# never DEBUG in production, besides verbose error pages it makes every
+# connection keep each executed query in connection.queries
+DEBUG = False
+
+REST_FRAMEWORK = dict(REST_FRAMEWORK, **{
+    'DEFAULT_RENDERER_CLASSES': (
+        'rest_framework.renderers.JSONRenderer',
+    ),
+})
+
+SESSION_COOKIE_SECURE = True
+CSRF_COOKIE_SECURE = True
+
+# the object cache versions and the authentication cache are only coherent
+# when every worker process talks to the same cache server
+CACHES = dict(CACHES, default={
+    'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.memcached.MemcachedCache'),
+    'LOCATION': os.environ['CACHE_LOCATION'].split(),
+})
+if CACHES['default']['BACKEND'] == 'django.core.cache.backends.locmem.LocMemCache':
+    raise ImproperlyConfigured('The default cache must be shared by every worker process in production')
@@ -0,0 +1,11 @@
+from .base import *  # noqa: F401,F403
+
+
+DEBUG = False
+
+# hashing passwords with the default PBKDF2 hasher dominates the test run
+PASSWORD_HASHERS = [
+    'django.contrib.auth.hashers.MD5PasswordHasher',
+]
+
+EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
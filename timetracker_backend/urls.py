@@ -19,6 +19,8 @@ from django.urls import path, include
 
 from dj_rest_auth.views import PasswordResetConfirmView
 
+from core.views import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api-admin/', include('rest_framework.urls')),
@@ -50,4 +52,8 @@ urlpatterns = [
     path('account-activation/<uidb64>/<token>/', lambda request: HttpResponse(''), name='account_activation'),
 
     path('api/', include('api.urls')),
+
+    # Prometheus text format metrics (see core/metrics.py), restricted to
+    # METRICS_ALLOWED_IPS and METRICS_TOKEN (see core/views.py)
+    path('metrics', metrics_view, name='metrics'),
 ]